@@ -1,12 +1,17 @@
 import asyncio
+import os
 import tempfile
-from typing import Callable, Optional, Union
+import time
+from typing import Callable, List, Optional, Union
 
 import discord
 
-from framework.core.logger import get_guild_log, get_logger, LoggerWrapper
+from framework.core.diagnostics import counters
+from framework.core.dispatcher import Priority, dispatch
+from framework.core.logger import LogLevel, export_guild_log, get_logger, LoggerWrapper, set_log_level
 from framework.interaction_handler.common import responde
-from framework.interaction_handler.decorator import admin_action, defer, guild_context, handle_exceptions
+from framework.interaction_handler.decorator import admin_action, defer, guild_context, handle_exceptions, operator_action
+from framework.utils.purge import PurgeableChannel, PurgeProgress, purge_channels
 
 
 logger: LoggerWrapper = get_logger(__name__)
@@ -14,26 +19,24 @@ logger: LoggerWrapper = get_logger(__name__)
 
 async def purge_channel_messages(
         interaction: discord.Interaction, 
-        channel: Union[discord.TextChannel, discord.Thread, discord.VoiceChannel], 
+        channels: List[PurgeableChannel], 
         condition: Callable[[discord.Message], bool]
     ):
 
-    logger.info(f"Purging messages in channel: {channel.name} (ID: {channel.id}).", interaction=interaction)
+    logger.info(f"Purging messages in {len(channels)} channel(s).", interaction=interaction)
 
-    deleted_count = 0
+    async def report_progress(progress: PurgeProgress):
+        await dispatch(
+            Priority.INTERACTION, 
+            f"interaction:{interaction.id}", 
+            lambda: interaction.edit_original_response(content=progress.format())
+        )
 
-    async for message in channel.history(limit=None):
-        if condition(message):
-            try:
-                await message.delete()
-                await asyncio.sleep(1)
-                deleted_count += 1
-            except Exception as e:
-                logger.error(f"Error deleting message(ID: {message.id}) : {e}")
+    progress = await purge_channels(channels, condition, report_progress)
 
-    logger.info(f"Deleted {deleted_count} message(s) in channel: {channel.name} (ID: {channel.id}).", interaction=interaction)
+    logger.info(f"Deleted {progress.deleted} message(s) in {len(channels)} channel(s).", interaction=interaction)
 
-    return deleted_count
+    return progress.deleted
 
 
 def is_bot(message: discord.Message):
@@ -49,19 +52,14 @@ async def _purge_messages(
         channel: Union[discord.TextChannel, discord.Thread, discord.VoiceChannel]=None
     ):
 
-    deleted_count = 0
-
     guild = interaction.guild
 
     if channel:
-        deleted_count = await purge_channel_messages(interaction, channel, condition)
+        channels = [channel]
     else:
-        for channel in guild.text_channels:
-            deleted_count += await purge_channel_messages(interaction, channel, condition)
-        for channel in guild.voice_channels:
-            deleted_count += await purge_channel_messages(interaction, channel, condition)
-        for thread in guild.threads:
-            deleted_count += await purge_channel_messages(interaction, thread, condition)
+        channels = [*guild.text_channels, *guild.voice_channels, *guild.threads]
+
+    deleted_count = await purge_channel_messages(interaction, channels, condition)
 
     return deleted_count
 
@@ -99,24 +97,54 @@ async def purge_messages(
 @admin_action
 @guild_context
 @defer()
-async def send_logs(interaction: discord.Interaction):
+async def send_logs(interaction: discord.Interaction, hours: Optional[int]=None, compressed: bool=False):
 
     guild: discord.Guild = interaction.guild
 
-    logs = get_guild_log(guild.id)
+    since = time.time() - hours * 3600 if hours else None
+    file_name = f"guild_{guild.id}_log.txt{'.gz' if compressed else ''}"
 
-    if not logs:
-        await responde(interaction, f"No logs found for guild {guild.name}.")
-        logger.warning(f"No logs found for guild {guild.name}.", interaction=interaction)
-        return
-    
-    with tempfile.NamedTemporaryFile(delete=True, mode="w+", encoding="utf-8") as temp_file:
-        
-        temp_file.write(logs)
-        temp_file_path = temp_file.name
+    with tempfile.TemporaryDirectory() as temp_dir:
+
+        temp_file_path = os.path.join(temp_dir, file_name)
+
+        # reading only the logs of this guild, in a worker thread
+        lines = await asyncio.to_thread(export_guild_log, guild.id, temp_file_path, since, compressed)
+
+        if not lines:
+            await responde(interaction, f"No logs found for guild {guild.name}.")
+            logger.warning(f"No logs found for guild {guild.name}.", interaction=interaction)
+            return
 
         await responde(
                 interaction, f"Guild `{guild.name}` log:", delete_after=None,
-                file=discord.File(temp_file_path, filename=f"guild_{guild.id}_log.txt")
+                file=discord.File(temp_file_path, filename=file_name)
             )
-        logger.info("Log sent.", interaction=interaction)
+        logger.info(f"Log sent ({lines} line(s)).", interaction=interaction)
+
+
+# discord rejects messages longer than 2000 characters
+MAX_DIAGNOSTICS_LENGTH = 1900
+
+
+@handle_exceptions()
+@guild_context
+@defer()
+@operator_action
+async def send_diagnostics(interaction: discord.Interaction):
+
+    report = counters.format() or "No counters recorded yet."
+
+    await responde(interaction, f"```\n{report[:MAX_DIAGNOSTICS_LENGTH]}\n```", ephemeral=True, delete_after=None)
+
+
+@handle_exceptions()
+@guild_context
+@defer()
+@operator_action
+async def change_log_level(interaction: discord.Interaction, module: str, level: LogLevel):
+
+    updated = set_log_level(module, level)
+
+    logger.warning(f"Log level of `{module}` set to {level.value} ({updated} logger(s)).", interaction=interaction)
+    await responde(interaction, f"Log level of `{module}` set to `{level.value}` ({updated} logger(s) updated).")
@@ -0,0 +1,107 @@
+# run from the app directory: python -m benchmarks.queue_benchmark [queue size]
+import random
+import sys
+import time
+from typing import Callable, List
+from uuid import UUID, uuid4
+
+from music.entity import QueueSong, SongRef
+from music.player.queue import QueueSongList
+
+
+class ListQueue:
+
+    # the list based implementation previously used by SongQueue
+    def __init__(self, q_songs: List[QueueSong]):
+        self.songs: List[QueueSong] = list(q_songs)
+        self._update_positions()
+
+    def _update_positions(self):
+        for idx, song in enumerate(self.songs):
+            song.position = idx + 1
+
+    def insert(self, idx: int, q_songs: List[QueueSong]) -> None:
+        self.songs[idx:idx] = q_songs
+        self._update_positions()
+
+    def extend(self, q_songs: List[QueueSong]) -> None:
+        self.songs.extend(q_songs)
+        self._update_positions()
+
+    def remove_song(self, song_id: UUID) -> None:
+        removed_idx = [idx for idx, song in enumerate(self.songs) if song.ref.id == song_id]
+        for idx in reversed(removed_idx):
+            self.songs.pop(idx)
+        self._update_positions()
+
+    def shuffle(self, pivot: int, seed: int) -> None:
+        before = self.songs[:pivot]
+        after = self.songs[pivot + 1:]
+        random.shuffle(before)
+        random.shuffle(after)
+        self.songs = before + [self.songs[pivot]] + after
+        self._update_positions()
+
+    def __getitem__(self, key):
+        return self.songs[key]
+
+
+def create_songs(count: int) -> List[QueueSong]:
+    return [QueueSong(SongRef({"id": str(uuid4()), "title": "song"}), 0, None) for _ in range(count)]
+
+
+def measure(name: str, factory: Callable, size: int, operation: Callable, repeat: int) -> float:
+
+    queue = factory(create_songs(size))
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        operation(queue)
+
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {name:<8} {elapsed * 1e6:>12.1f} us/op")
+    return elapsed
+
+
+def run(size: int) -> None:
+
+    pivot = size // 2
+
+    def add_next(queue):
+        queue.insert(pivot + 1, create_songs(1))
+
+    def add_end(queue):
+        queue.extend(create_songs(1))
+
+    def remove(queue):
+        q_song = queue[random.randrange(pivot)]
+        queue.remove_song(q_song.ref.id)
+
+    def shuffle_and_page(queue):
+        queue.shuffle(pivot, random.getrandbits(64))
+        queue[pivot:pivot + 5]
+
+    def shuffle_and_remove(queue):
+        shuffle_and_page(queue)
+        remove(queue)
+
+    operations = [
+        ("add next", add_next, 200),
+        ("add end", add_end, 200),
+        ("remove", remove, 200),
+        ("shuffle", shuffle_and_page, 50),
+        # removing right after a shuffle has to apply the pending permutation first
+        ("shuffle + remove", shuffle_and_remove, 20),
+    ]
+
+    print(f"Queue size: {size}")
+
+    for name, operation, repeat in operations:
+        print(f"{name}:")
+        old = measure("list", ListQueue, size, operation, repeat)
+        new = measure("indexed", QueueSongList, size, operation, repeat)
+        print(f"  speedup  {old / new:>12.1f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,80 @@
+# run from the app directory: python -m benchmarks.startup_benchmark [runs] [bot log file]
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+
+# the modules main.py pulls in before connecting, in import order
+STARTUP_MODULES = [
+    "framework.core.logger",
+    "framework.utils.emoji",
+    "framework.core.config",
+    "framework.core.command_sync",
+    "cogs.music",
+    "cogs.admin",
+    "cogs.games",
+]
+# dependencies that should only be loaded once they are needed
+HEAVY_MODULES = ["numpy", "PIL", "emoji"]
+
+READY_PATTERN = re.compile(r"Ready in (\d+) ms")
+
+
+PROBE = """
+import importlib, json, sys, time
+timings = {}
+start = time.perf_counter()
+for module in %r:
+    module_start = time.perf_counter()
+    importlib.import_module(module)
+    timings[module] = time.perf_counter() - module_start
+timings["total"] = time.perf_counter() - start
+print(json.dumps({"timings": timings, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def measure_imports(runs: int) -> None:
+
+    # every run is a fresh interpreter, nothing is cached in sys.modules between them
+    results: List[Dict] = []
+
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE % (STARTUP_MODULES, HEAVY_MODULES)],
+            capture_output=True, text=True, check=True, cwd=os.getcwd()
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"imports, median of {runs} run(s):")
+    for module in STARTUP_MODULES + ["total"]:
+        median = statistics.median(result["timings"][module] for result in results)
+        print(f"  {module:<28} {median * 1e3:>9.1f} ms")
+
+    loaded = results[-1]["loaded"]
+    print(f"  heavy modules loaded: {', '.join(loaded) if loaded else 'none'}")
+
+
+def measure_ready(log_path: str) -> None:
+
+    # the bot logs its own time to ready, the connection and the command sync can not be measured offline
+    with open(log_path, "r", encoding="utf-8", errors="replace") as file:
+        ready_times = [int(match.group(1)) for line in file if (match := READY_PATTERN.search(line))]
+
+    if not ready_times:
+        print(f"no time to ready found in {log_path}")
+        return
+
+    print(f"time to ready, {len(ready_times)} startup(s) in {log_path}:")
+    print(f"  last   {ready_times[-1]:>9} ms")
+    print(f"  median {statistics.median(ready_times):>9.0f} ms")
+    print(f"  max    {max(ready_times):>9} ms")
+
+
+if __name__ == "__main__":
+    measure_imports(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
+    if len(sys.argv) > 2:
+        measure_ready(sys.argv[2])
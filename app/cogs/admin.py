@@ -4,7 +4,7 @@ import discord
 from discord.ext import commands
 
 import admin.actions as admin_actions
-from framework.core.logger import get_logger, LoggerWrapper
+from framework.core.logger import LogLevel, get_logger, LoggerWrapper
 
 
 logger: LoggerWrapper = get_logger(__name__)
@@ -57,9 +57,33 @@ class AdminCommands(commands.Cog):
         await admin_actions.purge_messages(interaction, user, channel)
     
     @discord.app_commands.command(name="get_logs", description="Get the bot logs of the server.")
-    async def get_logs(self, interaction: discord.Interaction) -> None:
-        logger.info(f"Triggered 'get_logs'",interaction=interaction)
-        await admin_actions.send_logs(interaction)
+    @discord.app_commands.describe(
+        hours="Only send the logs of the last hours",
+        compressed="Send the logs as a gzip file"
+    )
+    async def get_logs(
+        self, 
+        interaction: discord.Interaction, 
+        hours: Optional[discord.app_commands.Range[int, 1]] = None, 
+        compressed: bool = False
+    ) -> None:
+        logger.info(f"Triggered 'get_logs' with hours={hours} and compressed={compressed}.",interaction=interaction)
+        await admin_actions.send_logs(interaction, hours, compressed)
+
+    @discord.app_commands.command(name="diagnostics", description="Show the internal counters of the bot.")
+    async def diagnostics(self, interaction: discord.Interaction) -> None:
+        logger.info(f"Triggered 'diagnostics'", interaction=interaction)
+        await admin_actions.send_diagnostics(interaction)
+
+
+    @discord.app_commands.command(name="log_level", description="Change the log level of a bot module at runtime.")
+    @discord.app_commands.describe(
+        module="The module, e.g. `music.player` for every module of the music player",
+        level="The new log level"
+    )
+    async def log_level(self, interaction: discord.Interaction, module: str, level: LogLevel) -> None:
+        logger.info(f"Triggered 'log_level' with module={module} and level={level}.", interaction=interaction)
+        await admin_actions.change_log_level(interaction, module, level)
 
 
 async def setup(bot: commands.Bot):
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 import discord
 from discord.ext import commands
@@ -31,6 +31,10 @@ class MusicCog(commands.Cog):
 
         await music_actions.play_song(interaction, self.bot, query=query, next=False, platform=platform)
 
+    @play.autocomplete('query')
+    async def play_autocomplete(self, interaction: discord.Interaction, current: str) -> List[discord.app_commands.Choice[str]]:
+        return await music_actions.autocomplete_song(interaction, current)
+
     @discord.app_commands.command(
         name='play_next', 
         description='Play a song after the current song'
@@ -44,6 +48,25 @@ class MusicCog(commands.Cog):
 
         await music_actions.play_song(interaction, self.bot, query=query, next=True, platform=platform)
 
+    @play_next.autocomplete('query')
+    async def play_next_autocomplete(self, interaction: discord.Interaction, current: str) -> List[discord.app_commands.Choice[str]]:
+        return await music_actions.autocomplete_song(interaction, current)
+
+    @discord.app_commands.command(
+        name='play_many', 
+        description='Play several songs at once, one title or link per line'
+    )
+    @discord.app_commands.describe(
+        next='Play the songs after the current song'
+    )
+    async def play_many(
+        self, interaction: discord.Interaction, next: bool=False, platform: Optional[SongPlatform]=None
+    ) -> None:
+
+        logger.info(f"Triggered 'play_many' with next '{next}' and platform '{platform}'.", interaction=interaction)
+
+        await music_actions.play_many(interaction, self.bot, next=next, platform=platform)
+
     @discord.app_commands.command(
         name='play_playlist', 
         description='Play a playlist'
@@ -365,3 +388,5 @@ class MusicCog(commands.Cog):
 
 async def setup(bot:commands.Bot):
     await bot.add_cog(MusicCog(bot))
+    await music_actions.restore_players(bot)
+    await music_actions.build_title_indexes(bot)
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+
+# the modules read DATA_PATH when they are imported, the tests never touch the data of a running bot
+os.environ["DATA_PATH"] = tempfile.mkdtemp(prefix="botx-tests-")
@@ -0,0 +1,51 @@
+import hashlib
+import json
+import os
+
+from discord.ext import commands
+
+from framework.core.env_loader import DATA_PATH
+from framework.core.logger import get_logger, LoggerWrapper
+from framework.utils.file import read_json_file_async, write_json_file_async
+
+
+logger: LoggerWrapper = get_logger(__name__)
+
+
+COMMAND_TREE_PATH = os.path.join(DATA_PATH, "app", "command_tree.json")
+
+
+def get_tree_fingerprint(bot: commands.Bot) -> str:
+
+    payload = sorted(
+        (command.to_dict(bot.tree) for command in bot.tree.get_commands()),
+        key=lambda command: (command["name"], command.get("type", 1))
+    )
+
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+async def sync_command_tree(bot: commands.Bot) -> bool:
+
+    # syncing is rate limited by discord and slow, it only runs when the commands changed since the last sync
+    fingerprint = get_tree_fingerprint(bot)
+
+    try:
+        synced_tree = await read_json_file_async(COMMAND_TREE_PATH) or {}
+    except Exception as e:
+        logger.warning(f"Could not read the fingerprint of the last synced command tree: {e}")
+        synced_tree = {}
+
+    if synced_tree.get("fingerprint") == fingerprint and synced_tree.get("applicationId") == bot.application_id:
+        logger.info("Command tree unchanged since the last sync, skipping sync.")
+        return False
+
+    synced = await bot.tree.sync()
+    logger.info(f"Commands synced {synced}")
+
+    try:
+        await write_json_file_async(COMMAND_TREE_PATH, {"fingerprint": fingerprint, "applicationId": bot.application_id})
+    except Exception as e:
+        logger.warning(f"Could not save the fingerprint of the synced command tree: {e}")
+
+    return True
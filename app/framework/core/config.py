@@ -1,15 +1,18 @@
 
 from abc import ABC, abstractmethod
+import asyncio
+import copy
 import os
-from typing import Dict, List, Optional, Type
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
 
 import discord
 
+from framework.core.diagnostics import counters
 from framework.core.env_loader import DATA_PATH
 from framework.ui.view import AppIcon
-from framework.utils.emoji import DEFAULT_EMOJI, get_colored_emoji, validate_emoji
+from framework.utils.emoji import DEFAULT_EMOJI, get_colored_emoji, prewarm_colored_emojis, validate_emoji
 from framework.core.exception import AppException, InvalidConfigException
-from framework.utils.file import InvalidJSONFileException, get_data_from_attachment, read_json_file, write_json_file
+from framework.utils.file import InvalidJSONFileException, get_data_from_attachment, read_json_file, write_json_file_async
 from framework.core.logger import LoggerWrapper, get_logger
 
 
@@ -18,6 +21,9 @@ logger: LoggerWrapper = get_logger(__name__)
 
 CONFIG_PATH = os.path.join(DATA_PATH, "config")
 
+# builds the config of a guild, registered by every guild config with buttons to pre-warm their emojis at startup
+guild_config_factories: List[Callable[[discord.Guild], "GuildConfig"]] = []
+
 
 class Config(ABC):
 
@@ -37,6 +43,9 @@ class Config(ABC):
     def to_dict(self) -> dict:
         pass
 
+    def get_button_configs(self) -> List["ButtonConfig"]:
+        return []
+
     @staticmethod
     def _validate_color(color: List[int]) -> List[int]:
 
@@ -70,6 +79,9 @@ class ButtonConfig(Config, ABC):
     
     def __init__(self, data: dict, app_icon_type: Type[AppIcon]):
         self.button_emojis: Dict[AppIcon, str] = {}
+        # final emojis of all the buttons, colored ones included, resolved once per config
+        self.resolved_emojis: Dict[str, str] = {}
+        self.resolve_lock: asyncio.Lock = asyncio.Lock()
         self.app_icon_type: Type[AppIcon] = app_icon_type
         self.colored_buttons: bool = False
         super().__init__(data)
@@ -105,7 +117,7 @@ class ButtonConfig(Config, ABC):
         else:
             self.button_sec_color = self._validate_color(data["buttonSecondaryColor"])
     
-    async def get_button_emoji(self, app_icon: AppIcon):
+    async def _resolve_button_emoji(self, app_icon: AppIcon) -> str:
 
         if not self.button_emojis:
             logger.warning("Trying to get button emoji, but none were found.")
@@ -122,6 +134,46 @@ class ButtonConfig(Config, ABC):
 
         return emoji
 
+    async def resolve_button_emojis(self) -> None:
+
+        async with self.resolve_lock:
+
+            if self.resolved_emojis:
+                return
+
+            resolved = {}
+            for app_icon in self.app_icon_type.__members__.values():
+                resolved[app_icon.value] = await self._resolve_button_emoji(app_icon)
+
+            self.resolved_emojis = resolved
+
+    def get_button_configs(self) -> List["ButtonConfig"]:
+        return [self]
+
+    def get_colored_emoji_combinations(self) -> List[Tuple[str, Optional[List[int]], Optional[List[int]]]]:
+
+        if not self.button_prim_color and not self.button_sec_color:
+            return []
+
+        return [(emoji, self.button_sec_color, self.button_prim_color) for emoji in set(self.button_emojis.values())]
+
+    async def get_button_emoji(self, app_icon: AppIcon) -> str:
+
+        emoji = self.resolved_emojis.get(app_icon.value)
+
+        # configs are shared by every view of the guild, a colored emoji evicted from the emoji cache since
+        # it was resolved no longer exists and every button is resolved again
+        if emoji and validate_emoji(emoji):
+            return emoji
+
+        if emoji:
+            self.resolved_emojis = {}
+
+        # every button is resolved on the first request, later views only read the result
+        await self.resolve_button_emojis()
+
+        return self.resolved_emojis.get(app_icon.value) or await self._resolve_button_emoji(app_icon)
+
     def to_dict(self):
         return {
             "buttons": self.button_emojis,
@@ -156,7 +208,7 @@ class GuildConfig(ABC):
     def _convert_data(self, data: dict) -> Config:
         pass
 
-    def _get_config(self) -> Config:
+    def _load_config(self) -> Config:
 
         try:
             cfg_path = self._get_config_path()
@@ -173,14 +225,71 @@ class GuildConfig(ABC):
         except InvalidJSONFileException as e:
             raise ConfigException(f"Invalid config file: {e}", "Invalid config found!")  
 
-    def save_config(self) -> None:
-        
-        cfg_path = self._get_config_path()
+    def _get_config(self) -> Config:
+        return config_registry.get(self)
 
+    async def _write_config(self, config: Config) -> None:
         try:
-            write_json_file(cfg_path, self.config.to_dict())
+            await write_json_file_async(self._get_config_path(), config.to_dict())
         except InvalidJSONFileException as e:
-            raise ConfigException(f"Invalid config file: {e}", "Invalid config file!")  
+            raise ConfigException(f"Invalid config file: {e}", "Invalid config file!")
+
+    async def save_config(self) -> None:
+        # the registry only gets the config once its file is written, a failed write changes nothing
+        await self._write_config(self.config)
+        config_registry.put(self)
+
+    async def update_config(self, **values: Any) -> None:
+
+        # the config is shared by every guild config object of the guild, the changes are made on a copy
+        # that replaces it only once its file is written
+        config = copy.copy(self.config)
+
+        for name, value in values.items():
+            setattr(config, name, value)
+
+        await self._write_config(config)
+
+        self.config = config
+        config_registry.put(self)
+
+
+class ConfigRegistry:
+
+    # parsed configs shared by every guild config object, a config is parsed again only once its file changed
+    def __init__(self):
+        self.entries: Dict[Tuple[Type[GuildConfig], int], Tuple[Optional[int], Config]] = {}
+
+    @staticmethod
+    def _get_mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            # guilds without a file of their own use the default data
+            return None
+
+    def get(self, guild_config: GuildConfig) -> Config:
+
+        key = (type(guild_config), guild_config.guild_id)
+        mtime = self._get_mtime(guild_config._get_config_path())
+        entry = self.entries.get(key)
+
+        if entry and entry[0] == mtime:
+            counters.increment("config", "hits")
+            return entry[1]
+
+        counters.increment("config", "loads")
+        config = guild_config._load_config()
+        self.entries[key] = (mtime, config)
+
+        return config
+
+    def put(self, guild_config: GuildConfig) -> None:
+        key = (type(guild_config), guild_config.guild_id)
+        self.entries[key] = (self._get_mtime(guild_config._get_config_path()), guild_config.config)
+
+
+config_registry = ConfigRegistry()
 
 
 async def upload_config(
@@ -194,4 +303,51 @@ async def upload_config(
     config_data = await get_data_from_attachment(file)
     config = config_type(config_data)
     guild_config = guild_config_type(config=config, *args, **kwargs)
-    guild_config.save_config()
+    await guild_config.save_config()
+
+    # the colored emojis are created now so the first render of the new config does not wait for them
+    asyncio.create_task(prewarm_button_emojis([config]))
+
+
+def register_guild_config(factory: Callable[[discord.Guild], GuildConfig]) -> None:
+    guild_config_factories.append(factory)
+
+
+async def prewarm_button_emojis(configs: List[Config]) -> None:
+
+    combinations = [
+        combination
+        for config in configs
+        for button_config in config.get_button_configs()
+        for combination in button_config.get_colored_emoji_combinations()
+    ]
+
+    if not combinations:
+        return
+
+    try:
+        created = await prewarm_colored_emojis(combinations)
+    except Exception as e:
+        logger.warning(f"Could not pre-warm colored emojis: {e}")
+        return
+
+    logger.info(f"Pre-warmed {created} colored emoji(s).")
+
+
+def _load_guild_configs(guilds: List[discord.Guild]) -> List[Config]:
+
+    configs: List[Config] = []
+
+    for guild in guilds:
+        for factory in guild_config_factories:
+            try:
+                configs.append(factory(guild).config)
+            except Exception as e:
+                logger.debug(f"Could not load config to pre-warm for guild (ID = {guild.id}): {e}")
+
+    return configs
+
+
+async def prewarm_guild_button_emojis(guilds: List[discord.Guild]) -> None:
+    # every config of every guild is read at startup, the files are read on a worker thread
+    await prewarm_button_emojis(await asyncio.to_thread(_load_guild_configs, guilds))
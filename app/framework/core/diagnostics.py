@@ -0,0 +1,35 @@
+from typing import Dict
+
+
+class Counters:
+
+    # process wide counters, grouped by the part of the bot that records them
+    def __init__(self):
+        self.values: Dict[str, Dict[str, int]] = {}
+
+    def increment(self, group: str, name: str, amount: int=1) -> None:
+        values = self.values.setdefault(group, {})
+        values[name] = values.get(name, 0) + amount
+
+    def set(self, group: str, name: str, value: int) -> None:
+        # for gauges such as queue depths
+        self.values.setdefault(group, {})[name] = value
+
+    def get(self, group: str, name: str) -> int:
+        return self.values.get(group, {}).get(name, 0)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {group: dict(values) for group, values in self.values.items()}
+
+    def format(self) -> str:
+
+        lines = []
+
+        for group, values in sorted(self.values.items()):
+            lines.append(f"[{group}]")
+            lines.extend(f"  {name}: {value}" for name, value in sorted(values.items()))
+
+        return "\n".join(lines)
+
+
+counters = Counters()
@@ -0,0 +1,187 @@
+import asyncio
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from framework.core.diagnostics import counters
+
+
+T = TypeVar("T")
+
+
+# discord calls running at the same time across the whole bot
+MAX_CONCURRENT_CALLS = 8
+# calls running at the same time on one route (a channel, a user, the emojis of a guild...)
+ROUTE_CONCURRENCY = 2
+# callers of a priority class wait for room once this many of its calls are queued
+MAX_QUEUED_CALLS = 200
+
+
+class Priority(IntEnum):
+
+    INTERACTION = 0
+    NOTIFIER = 1
+    DM = 2
+    CLEANUP = 3
+
+
+# slots each class leaves free for the classes above it, a rate limited burst of cleanup calls
+# sleeping through their retries can never take the slots interaction responses need
+RESERVED_SLOTS: Dict[Priority, int] = {
+    Priority.INTERACTION: 0,
+    Priority.NOTIFIER: 2,
+    Priority.DM: 2,
+    Priority.CLEANUP: 4,
+}
+
+
+class _Call:
+
+    __slots__ = ("route", "func", "future", "queued_at")
+
+    def __init__(self, route: str, func: Callable[[], Awaitable[Any]], future: asyncio.Future):
+        self.route: str = route
+        self.func: Callable[[], Awaitable[Any]] = func
+        self.future: asyncio.Future = future
+        self.queued_at: float = time.monotonic()
+
+
+class RestDispatcher:
+
+    # runs the discord calls started by the bot in priority order, so cleanup traffic
+    # cannot hold back responses users are waiting for when discord starts rate limiting
+    def __init__(
+        self,
+        max_concurrent: int=MAX_CONCURRENT_CALLS,
+        route_concurrency: int=ROUTE_CONCURRENCY,
+        max_queued: int=MAX_QUEUED_CALLS,
+        reserved_slots: Dict[Priority, int]=RESERVED_SLOTS
+    ):
+        self.max_concurrent: int = max_concurrent
+        self.route_concurrency: int = route_concurrency
+        self.max_queued: int = max_queued
+        # a class always keeps at least one slot
+        self.class_limits: Dict[Priority, int] = {
+            priority: max(1, max_concurrent - reserved_slots.get(priority, 0)) for priority in Priority
+        }
+
+        self.queues: Dict[Priority, Deque[_Call]] = {priority: deque() for priority in Priority}
+        self.active: int = 0
+        self.active_routes: Dict[str, int] = {}
+
+        self.changed: Optional[asyncio.Event] = None
+        self.scheduler: Optional[asyncio.Task] = None
+
+    def _notify(self) -> None:
+
+        # wakes up everyone waiting for a change, the event is replaced so later waiters block again
+        if self.changed:
+            self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def _wait_for_change(self) -> None:
+
+        if not self.changed:
+            self.changed = asyncio.Event()
+
+        await self.changed.wait()
+
+    def _record_depth(self, priority: Priority) -> None:
+        counters.set("dispatcher", f"queued {priority.name.lower()}", len(self.queues[priority]))
+
+    async def call(self, priority: Priority, route: str, func: Callable[[], Awaitable[T]]) -> T:
+
+        queue = self.queues[priority]
+
+        if len(queue) >= self.max_queued:
+            counters.increment("dispatcher", f"backpressure waits {priority.name.lower()}")
+
+        while len(queue) >= self.max_queued:
+            await self._wait_for_change()
+
+        call = _Call(route, func, asyncio.get_running_loop().create_future())
+        queue.append(call)
+        self._record_depth(priority)
+
+        if not self.scheduler or self.scheduler.done():
+            self.scheduler = asyncio.create_task(self._schedule())
+
+        self._notify()
+
+        return await call.future
+
+    def _pop_ready_call(self) -> Optional[_Call]:
+
+        for priority, queue in self.queues.items():
+
+            if self.active >= self.class_limits[priority]:
+                continue
+
+            for idx, call in enumerate(queue):
+
+                # the route of a higher priority call being busy does not block the other routes
+                if self.active_routes.get(call.route, 0) >= self.route_concurrency:
+                    continue
+
+                del queue[idx]
+                self._record_depth(priority)
+
+                wait_ms = int((time.monotonic() - call.queued_at) * 1000)
+                counters.increment("dispatcher", f"calls {priority.name.lower()}")
+                counters.increment("dispatcher", f"wait ms {priority.name.lower()}", wait_ms)
+
+                return call
+
+        return None
+
+    async def _schedule(self) -> None:
+
+        while True:
+
+            call = self._pop_ready_call() if self.active < self.max_concurrent else None
+
+            if not call:
+                await self._wait_for_change()
+                continue
+
+            if call.future.done():
+                # the caller was cancelled while the call was queued
+                self._notify()
+                continue
+
+            self.active += 1
+            self.active_routes[call.route] = self.active_routes.get(call.route, 0) + 1
+            asyncio.create_task(self._execute(call))
+
+    async def _execute(self, call: _Call) -> None:
+
+        try:
+            result = await call.func()
+            if not call.future.done():
+                call.future.set_result(result)
+        except Exception as e:
+            if not call.future.done():
+                call.future.set_exception(e)
+        except asyncio.CancelledError:
+            # the caller must not wait forever on a call that will never complete
+            if not call.future.done():
+                call.future.cancel()
+            raise
+        except BaseException as e:
+            if not call.future.done():
+                call.future.set_exception(e)
+            raise
+        finally:
+            self.active -= 1
+            self.active_routes[call.route] -= 1
+            if not self.active_routes[call.route]:
+                del self.active_routes[call.route]
+            self._notify()
+
+
+rest_dispatcher = RestDispatcher()
+
+
+async def dispatch(priority: Priority, route: str, func: Callable[[], Awaitable[T]]) -> T:
+    return await rest_dispatcher.call(priority, route, func)
@@ -4,3 +4,5 @@ BACKEND_URL = os.getenv('BACKEND_URL')
 DATA_PATH = os.getenv('DATA_PATH')
 BOT_API_KEY = os.getenv('BOT_API_KEY')
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
+# users allowed to run the commands that affect the bot on every server, besides the owner of the application
+BOT_OPERATOR_IDS = [int(user_id) for user_id in os.getenv('BOT_OPERATOR_IDS', '').split(',') if user_id.strip().isdigit()]
@@ -42,6 +42,15 @@ class NoAdminPermissionException(AppException):
         )
 
 
+class NoOperatorPermissionException(AppException):
+
+    def __init__(self, user_id: int):
+        super().__init__(
+            f"User with id {user_id} is not a bot operator",
+            "This command can be used only by the operators of the bot!"
+        )
+
+
 class InvalidConfigException(AppException):
 
     def __init__(self, dev_message: str, usr_message: str):
@@ -1,14 +1,21 @@
-import glob
+import atexit
+from collections import OrderedDict
+from datetime import datetime
+import gzip
+import json
 import logging
 from dotenv import load_dotenv
 import os
-import re
-from typing import Dict, Optional
+import queue
+import time
+from enum import StrEnum
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
 import colorlog
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 import discord
 
+from framework.core.diagnostics import counters
 from framework.core.env_loader import DATA_PATH
 
 
@@ -37,63 +44,289 @@ console_formatter = colorlog.ColoredFormatter(
 
 file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
 
+# records waiting for the writer thread, new ones are dropped once it is full
+LOG_QUEUE_SIZE = 10000
 
-class LoggerWrapper():
+guild_log_directory = os.path.join(log_directory, "guilds")
+GUILD_LOG_MAX_BYTES = 1024 * 1024
+GUILD_LOG_BACKUP_COUNT = 3
+MAX_OPEN_GUILD_LOGS = 64
 
-    def __init__(self, name: str):
 
-        self.logger: logging.Logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG)
-        if not self.logger.hasHandlers():
+def get_guild_log_path(guild_id: int) -> str:
+    return os.path.join(guild_log_directory, f"{guild_id}.log")
+
+
+class DroppingQueueHandler(QueueHandler):
+
+    # the calling thread only enqueues the record, formatting and file io happen on the listener thread
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            counters.increment("logging", f"dropped {record.levelname.lower()}")
+
+
+class GuildLogHandler(logging.Handler):
+
+    # every record tagged with a guild also goes to a log of its own, one json object per line,
+    # so the logs of a guild can be read without scanning the ones of every other guild
+    def __init__(self):
+        super().__init__()
+        # least recently written first, the oldest one is closed once too many are open
+        self.files: OrderedDict[int, TextIO] = OrderedDict()
+
+    def _get_file(self, guild_id: int) -> TextIO:
+
+        file = self.files.pop(guild_id, None)
+
+        if not file:
+            os.makedirs(guild_log_directory, exist_ok=True)
+            file = open(get_guild_log_path(guild_id), "a", encoding="utf-8")
+            if len(self.files) >= MAX_OPEN_GUILD_LOGS:
+                _, oldest = self.files.popitem(last=False)
+                oldest.close()
+
+        self.files[guild_id] = file
+        return file
+
+    def _rotate(self, guild_id: int) -> None:
+
+        self.files.pop(guild_id).close()
+        path = get_guild_log_path(guild_id)
+
+        for idx in range(GUILD_LOG_BACKUP_COUNT - 1, 0, -1):
+            if os.path.exists(f"{path}.{idx}"):
+                os.replace(f"{path}.{idx}", f"{path}.{idx + 1}")
+
+        os.replace(path, f"{path}.1")
+
+    def emit(self, record: logging.LogRecord) -> None:
+
+        guild_id = getattr(record, "guild_id", None)
+
+        if not guild_id:
+            return
+
+        try:
+            file = self._get_file(guild_id)
+            entry = {
+                "time": record.created,
+                "level": record.levelname,
+                "name": record.name,
+                "message": record.getMessage()
+            }
+
+            if isinstance(record.msg, LogMessage) and record.msg.fields:
+                entry["fields"] = {name: str(value) for name, value in record.msg.fields.items()}
+
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+
+            if file.tell() >= GUILD_LOG_MAX_BYTES:
+                self._rotate(guild_id)
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+
+        for file in self.files.values():
+            file.close()
+
+        self.files.clear()
+        super().close()
+
+
+console_handler = logging.StreamHandler()
+console_handler.setFormatter(console_formatter)
+
+rotating_file_handler = RotatingFileHandler(
+    log_file_name, maxBytes=5 * 1024 * 1024, backupCount=3
+)
+rotating_file_handler.setFormatter(file_formatter)
+
+log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+queue_handler = DroppingQueueHandler(log_queue)
+
+guild_log_handler = GuildLogHandler()
+
+log_listener = QueueListener(
+    log_queue, console_handler, rotating_file_handler, guild_log_handler, respect_handler_level=True
+)
+log_listener.start()
+# flushes the records still queued when the bot exits
+atexit.register(log_listener.stop)
+
+
+class LogLevel(StrEnum):
+
+    DEBUG="DEBUG"
+    INFO="INFO"
+    WARNING="WARNING"
+    ERROR="ERROR"
+
+
+# hot path events passing a sample key are logged at most this many times per window, the rest are counted
+SAMPLE_LIMIT = 5
+SAMPLE_WINDOW_SEC = 60
+
+
+class LogSampler:
+
+    def __init__(self):
+        # (sample key, guild id) -> [window start, logged, suppressed]
+        self.windows: Dict[Tuple[str, Optional[int]], List[float]] = {}
+
+    def allow(self, key: str, guild_id: Optional[int]=None) -> Tuple[bool, int]:
+
+        # returns whether to log and how many records of the previous window were suppressed
+        now = time.monotonic()
+        window = self.windows.get((key, guild_id))
 
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(console_formatter)
-            self.logger.addHandler(console_handler)
+        if not window or now - window[0] >= SAMPLE_WINDOW_SEC:
+            self.windows[(key, guild_id)] = [now, 1, 0]
+            return True, window[2] if window else 0
 
-            rotating_file_handler = RotatingFileHandler(
-                log_file_name, maxBytes=5 * 1024 * 1024, backupCount=3
-            )
-            rotating_file_handler.setFormatter(file_formatter)
-            self.logger.addHandler(rotating_file_handler)
+        if window[1] < SAMPLE_LIMIT:
+            window[1] += 1
+            return True, 0
 
-            self.logger.setLevel(logging.INFO)
+        window[2] += 1
+        counters.increment("logging", f"sampled out {key}")
+        return False, 0
 
-    def _add_tag(
-        self, log: str, 
+
+log_sampler = LogSampler()
+
+
+class LogMessage:
+
+    # formatted by the writer thread when the record is emitted, never for suppressed records
+    __slots__ = ("log", "args", "fields", "guild_id", "channel_id", "user_id", "tag")
+
+    def __init__(
+        self, log: str, args: tuple, fields: Dict[str, Any], 
+        guild_id: Optional[int], channel_id: Optional[int], user_id: Optional[int], tag: Optional[str]=None
+    ):
+        self.tag: Optional[str] = tag
+        self.log: Any = log
+        self.args: tuple = args
+        self.fields: Dict[str, Any] = fields
+        self.guild_id: Optional[int] = guild_id
+        self.channel_id: Optional[int] = channel_id
+        self.user_id: Optional[int] = user_id
+
+    def __str__(self) -> str:
+
+        tags = [
+            f"[GUILD {self.guild_id}]" if self.guild_id else "",
+            f"[CHANNEL {self.channel_id}]" if self.channel_id else "",
+            f"[USER {self.user_id}]" if self.user_id else "",
+            f"[{self.tag}]" if self.tag else "",
+            # exceptions are logged as they are caught, the message is not always a string
+            str(self.log) % self.args if self.args else str(self.log),
+            " ".join(f"{name}={value}" for name, value in self.fields.items())
+        ]
+
+        return " ".join(filter(None, tags))
+
+
+class LoggerWrapper():
+
+    def __init__(self, name: str):
+
+        self.logger: logging.Logger = logging.getLogger(name)
+        self.logger.setLevel(_get_configured_level(name) or logging.INFO)
+        if queue_handler not in self.logger.handlers:
+            self.logger.addHandler(queue_handler)
+        # parent modules have the same handler, propagating would write every record twice
+        self.logger.propagate = False
+
+    def _log(
+        self, level: int, log: str, args: tuple, sample: Optional[str], tag: Optional[str],
         interaction: Optional[discord.Interaction] = None, 
         guild: Optional[discord.Guild] = None, 
         channel: Optional[discord.abc.GuildChannel] = None, 
-        user: Optional[discord.Member] = None
-    ) -> str:
+        user: Optional[discord.Member] = None,
+        **fields
+    ) -> None:
 
-        guild_id = interaction.guild_id if interaction and interaction.guild else guild.id if guild else None
-        channel_id = interaction.channel_id if interaction and interaction.channel else channel.id if channel else None
-        user_id = interaction.user.id if interaction and interaction.user else user.id if user else None
+        if not self.logger.isEnabledFor(level):
+            return
 
-        tags = [
-            f"[GUILD {guild_id}]" if guild_id else "",
-            f"[CHANNEL {channel_id}]" if channel_id else "",
-            f"[USER {user_id}]" if user_id else ""
-        ]
+        guild_id = interaction.guild_id if interaction and interaction.guild_id else guild.id if guild else None
+
+        if sample:
+            # every guild has its own budget, a busy guild does not silence the others
+            allowed, suppressed = log_sampler.allow(sample, guild_id)
+            if not allowed:
+                return
+            if suppressed:
+                fields["suppressed"] = suppressed
+
+        channel_id = interaction.channel_id if interaction and interaction.channel_id else channel.id if channel else None
+        user_id = interaction.user.id if interaction and interaction.user else user.id if user else None
 
-        tag_string = " ".join(filter(None, tags))
-        return f"{tag_string} {log}".strip() 
+        self.logger.log(
+            level, LogMessage(log, args, fields, guild_id, channel_id, user_id, tag), extra={"guild_id": guild_id}
+        )
 
-    def info(self, log: str, **kwargs):
-        self.logger.info(self._add_tag(log, **kwargs))
+    # the message may use %-style args, keyword fields and a subsystem tag, all only formatted if the record is emitted
+    def info(self, log: str, *args, sample: Optional[str] = None, tag: Optional[str] = None, **kwargs):
+        self._log(logging.INFO, log, args, sample, tag, **kwargs)
     
-    def warning(self, log: str, **kwargs):
-        self.logger.warning(self._add_tag(log, **kwargs))
+    def warning(self, log: str, *args, sample: Optional[str] = None, tag: Optional[str] = None, **kwargs):
+        self._log(logging.WARNING, log, args, sample, tag, **kwargs)
 
-    def error(self, log: str, **kwargs):
-        self.logger.error(self._add_tag(log, **kwargs))
+    def error(self, log: str, *args, sample: Optional[str] = None, tag: Optional[str] = None, **kwargs):
+        self._log(logging.ERROR, log, args, sample, tag, **kwargs)
 
-    def debug(self, log: str, **kwargs):
-        self.logger.debug(self._add_tag(log, **kwargs))
+    def debug(self, log: str, *args, sample: Optional[str] = None, tag: Optional[str] = None, **kwargs):
+        self._log(logging.DEBUG, log, args, sample, tag, **kwargs)
 
 
 loggers: Dict[str, LoggerWrapper] = {}
 
+# module prefix -> level, read from LOG_LEVELS ("music.player=DEBUG,framework=WARNING") and changed at runtime
+log_levels: Dict[str, int] = {}
+
+
+def _load_log_levels() -> None:
+
+    for entry in filter(None, os.getenv("LOG_LEVELS", "").split(",")):
+        module, _, level = entry.partition("=")
+        if level.strip().upper() in LogLevel.__members__:
+            log_levels[module.strip()] = logging.getLevelName(level.strip().upper())
+
+
+def _matches(name: str, module: str) -> bool:
+    return name == module or name.startswith(f"{module}.")
+
+
+def _get_configured_level(name: str) -> Optional[int]:
+
+    # the most specific prefix wins
+    matches = [module for module in log_levels if _matches(name, module)]
+
+    return log_levels[max(matches, key=len)] if matches else None
+
+
+def set_log_level(module: str, level: LogLevel) -> int:
+
+    log_levels[module] = logging.getLevelName(level.value)
+
+    updated = 0
+
+    for name, wrapper in loggers.items():
+        if _matches(name, module):
+            wrapper.logger.setLevel(_get_configured_level(name))
+            updated += 1
+
+    return updated
+
 
 def get_logger(name: str) -> LoggerWrapper:
     if name not in loggers:
@@ -101,18 +334,43 @@ def get_logger(name: str) -> LoggerWrapper:
     return loggers[name]
 
 
-def get_guild_log(guild_id: int) -> str:
+_load_log_levels()
+
 
-    filtered_logs = []
-    guild_tag = f"[GUILD {guild_id}]"
+def _iter_guild_log_lines(guild_id: int, since: Optional[float]=None) -> Iterator[str]:
 
-    log_files = sorted(glob.glob(f"{log_file_name}*"), reverse=True)
+    path = get_guild_log_path(guild_id)
+    log_files = [f"{path}.{idx}" for idx in range(GUILD_LOG_BACKUP_COUNT, 0, -1)] + [path]
 
     for log_file_path in log_files:
+
+        # a file last written before the range only holds older records
+        try:
+            if since and os.path.getmtime(log_file_path) < since:
+                continue
+        except OSError:
+            continue
+
         with open(log_file_path, "r", encoding="utf-8") as log_file:
             for line in log_file:
-                if guild_tag in line:
-                    clean_line = re.sub(r" - [\w\.\-]+ - (INFO|WARNING|ERROR|DEBUG|CRITICAL) - ", " ", line, 1)
-                    filtered_logs.append(clean_line.strip())
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if since and record["time"] < since:
+                    continue
+                created = datetime.fromtimestamp(record["time"]).strftime('%Y-%m-%d %H:%M:%S')
+                yield f"{created} {record['level']} {record['message']}\n"
+
+
+def export_guild_log(guild_id: int, file_path: str, since: Optional[float]=None, compress: bool=False) -> int:
+
+    # blocking, meant to run in a worker thread, the lines are streamed to the file instead of being joined in memory
+    lines = 0
+
+    with (gzip.open(file_path, "wt", encoding="utf-8") if compress else open(file_path, "w", encoding="utf-8")) as file:
+        for line in _iter_guild_log_lines(guild_id, since):
+            file.write(line)
+            lines += 1
 
-    return "\n".join(filtered_logs) if filtered_logs else None
+    return lines
@@ -0,0 +1,123 @@
+import asyncio
+import heapq
+import itertools
+from typing import Callable, List, Optional, Tuple
+
+from framework.core.diagnostics import counters
+
+
+# rescheduled timers leave stale heap entries behind, the heap is rebuilt once they outnumber the live ones
+MIN_COMPACT_SIZE = 64
+
+
+class Timer:
+
+    __slots__ = ("deadline", "callback", "active")
+
+    def __init__(self, deadline: float, callback: Callable[[], None]):
+        self.deadline: float = deadline
+        self.callback: Callable[[], None] = callback
+        self.active: bool = True
+
+
+class TimerScheduler:
+
+    # every timer of the bot shares one heap and one loop callback armed for the earliest deadline,
+    # so idle timers do not wake the event loop
+    def __init__(self):
+        self.heap: List[Tuple[float, int, Timer]] = []
+        self.sequence = itertools.count()
+        self.active: int = 0
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.handle_deadline: Optional[float] = None
+
+    def _record_size(self) -> None:
+        counters.set("timers", "active", self.active)
+        counters.set("timers", "heap entries", len(self.heap))
+
+    def _push(self, timer: Timer) -> None:
+
+        heapq.heappush(self.heap, (timer.deadline, next(self.sequence), timer))
+
+        if len(self.heap) > max(MIN_COMPACT_SIZE, 2 * self.active):
+            self.heap = [entry for entry in self.heap if entry[2].active and entry[0] == entry[2].deadline]
+            heapq.heapify(self.heap)
+
+        self._arm()
+        self._record_size()
+
+    def _arm(self) -> None:
+
+        if not self.heap:
+            if self.handle:
+                self.handle.cancel()
+            self.handle = self.handle_deadline = None
+            return
+
+        deadline = self.heap[0][0]
+
+        if self.handle and self.handle_deadline == deadline:
+            return
+
+        if self.handle:
+            self.handle.cancel()
+
+        self.handle = asyncio.get_running_loop().call_at(deadline, self._fire)
+        self.handle_deadline = deadline
+
+    def _fire(self) -> None:
+
+        self.handle = self.handle_deadline = None
+        now = asyncio.get_running_loop().time()
+        expired: List[Timer] = []
+
+        while self.heap and self.heap[0][0] <= now:
+
+            deadline, _, timer = heapq.heappop(self.heap)
+
+            # entries left behind by cancelled or rescheduled timers
+            if not timer.active or deadline != timer.deadline:
+                continue
+
+            timer.active = False
+            self.active -= 1
+            expired.append(timer)
+
+        self._arm()
+        self._record_size()
+
+        for timer in expired:
+            counters.increment("timers", "fired")
+            timer.callback()
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> Timer:
+
+        timer = Timer(asyncio.get_running_loop().time() + delay, callback)
+        self.active += 1
+        self._push(timer)
+
+        return timer
+
+    def reschedule(self, timer: Timer, delay: float) -> None:
+
+        if not timer.active:
+            return
+
+        timer.deadline = asyncio.get_running_loop().time() + delay
+        self._push(timer)
+
+    def cancel(self, timer: Timer) -> None:
+
+        if not timer.active:
+            return
+
+        # the heap entry is dropped lazily when it reaches the top
+        timer.active = False
+        self.active -= 1
+        self._record_size()
+
+    def remaining(self, timer: Timer) -> float:
+        return max(0.0, timer.deadline - asyncio.get_running_loop().time()) if timer.active else 0.0
+
+
+timer_scheduler = TimerScheduler()
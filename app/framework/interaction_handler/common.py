@@ -9,10 +9,12 @@ from discord.ui import View
 from discord.mentions import AllowedMentions
 from discord.poll import Poll
 
+from framework.core.dispatcher import Priority, dispatch
+
 
 async def delay_msg_delete(message: discord.Message, delay: int):
     await asyncio.sleep(delay)
-    await message.delete()
+    await dispatch(Priority.CLEANUP, f"channel:{message.channel.id}", message.delete)
 
 
 async def responde(
@@ -37,7 +39,7 @@ async def responde(
     
     if not interaction.response.is_done():
         #if interaction is not responded already -> send the response to it
-        await interaction.response.send_message(
+        await dispatch(Priority.INTERACTION, f"interaction:{interaction.id}", lambda: interaction.response.send_message(
             content=content, 
             delete_after=delete_after, 
             ephemeral=ephemeral, 
@@ -51,11 +53,11 @@ async def responde(
             suppress_embeds=suppress_embeds,
             silent=silent,
             poll=poll
-            )
+            ))
         
     else:
         # otherwise send a followup
-        followup_msg = await interaction.followup.send(
+        followup_msg = await dispatch(Priority.INTERACTION, f"interaction:{interaction.id}", lambda: interaction.followup.send(
             content=content, 
             embed=embed,
             embeds=embeds,
@@ -69,7 +71,7 @@ async def responde(
             suppress_embeds=suppress_embeds,
             silent=silent,
             poll=poll
-            )
+            ))
         
         if delete_after:
             asyncio.create_task(delay_msg_delete(followup_msg, delete_after))
@@ -2,8 +2,9 @@ import discord
 
 from framework.core.exception import (
     AppException, GuildContextRequiredException, 
-    NoAdminPermissionException, VoiceConnectedRequiredException
+    NoAdminPermissionException, NoOperatorPermissionException, VoiceConnectedRequiredException
 )
+from framework.core.env_loader import BOT_OPERATOR_IDS
 from framework.core.logger import LoggerWrapper, get_logger
 from framework.interaction_handler.common import responde
 
@@ -102,6 +103,24 @@ def admin_action(func):
     return wrapper
 
 
+def operator_action(func):
+
+    # for commands acting on the whole bot, a server administrator only controls their own server
+    async def wrapper(*args, **kwargs):
+
+        interaction: discord.Interaction = next((arg for arg in args if isinstance(arg, discord.Interaction)), None) or kwargs.get("interaction")
+
+        if not interaction:
+            return await func(*args, **kwargs)
+
+        if interaction.user.id not in BOT_OPERATOR_IDS and not await interaction.client.is_owner(interaction.user):
+            raise NoOperatorPermissionException(interaction.user.id)
+
+        return await func(*args, **kwargs)
+    
+    return wrapper
+
+
 def update_notifier(silent: bool=False):
 
     def decorator(func):
@@ -1,11 +1,13 @@
 from abc import ABC, abstractmethod
 import asyncio
+import math
 from typing import Optional, Callable
 import inspect
 
 import discord
 
 from framework.core.logger import LoggerWrapper, get_logger
+from framework.core.timer import Timer, timer_scheduler
 from framework.interaction_handler.common import responde
 from framework.ui.notifier import Notifier, PageNotifier
 
@@ -16,27 +18,69 @@ logger: LoggerWrapper = get_logger(__name__)
 class TimeoutExecutor:
 
     def __init__(self, timeout: int=60, on_timeout: Optional[Callable] = None):
-        self.timeout: int = timeout
         self.timeout_value: int = timeout
         self.on_timeout: Optional[Callable] = on_timeout
-    
-    async def _wait_timeout(self) -> None:
+        self.timer: Optional[Timer] = None
+        self.expired: Optional[asyncio.Future] = None
+        self.timed_out: bool = False
+
+    @property
+    def timeout(self) -> int:
+
+        # seconds left before the executor times out
+        if self.timed_out:
+            return 0
+
+        if not self.timer:
+            return self.timeout_value
+
+        return math.ceil(timer_scheduler.remaining(self.timer))
+
+    def _expire(self) -> None:
+        if self.expired and not self.expired.done():
+            self.expired.set_result(None)
+
+    async def _wait_timeout(self) -> bool:
+
+        # on_timeout runs exactly once, in the first caller, which gets True. Every other caller only waits
+        # for the expiry (or returns at once if it already happened) and gets False, the handler is expired
+        # either way (timed_out is set) and must not be acted on anymore
+        if self.expired:
+            await asyncio.shield(self.expired)
+            return False
+
+        self.expired = asyncio.get_running_loop().create_future()
+
+        if self.timed_out:
+            self._expire()
+        else:
+            self.timer = timer_scheduler.schedule(self.timeout_value, self._expire)
+
+        await self.expired
+
+        self.timed_out = True
+        self.timer = None
 
-        while(self.timeout > 0):
-            await asyncio.sleep(1)
-            self.timeout -= 1
-        
         if self.on_timeout:
             if inspect.iscoroutinefunction(self.on_timeout):
                 await self.on_timeout()
             else:
                 self.on_timeout()
+
+        return True
     
     def _reset_timeout(self) -> None:
-        self.timeout = self.timeout_value
+        if self.timer and not self.timed_out:
+            timer_scheduler.reschedule(self.timer, self.timeout_value)
     
     def _stop_timeout(self) -> None:
-        self.timeout = 0
+
+        self.timed_out = True
+
+        if self.timer:
+            timer_scheduler.cancel(self.timer)
+
+        self._expire()
 
 
 class BaseInteractionHandler(ABC):
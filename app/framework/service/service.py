@@ -1,5 +1,6 @@
 import asyncio
-from typing import Dict
+import threading
+from typing import AsyncIterator, Dict
 from enum import Enum
 
 import requests
@@ -14,6 +15,11 @@ from framework.core.logger import get_logger, LoggerWrapper
 logger:LoggerWrapper = get_logger(__name__)
 
 
+STREAM_CHUNK_SIZE = 16 * 1024
+# chunks buffered between the download thread and the event loop before the download waits
+STREAM_QUEUE_SIZE = 16
+
+
 class ParamBuilder:
 
     def __init__(self):
@@ -137,4 +143,79 @@ class ServiceClient:
     async def send_request(self, request_type: RequestType, endpoint: Endpoint, params: Dict = None, body: Dict = None) -> requests.Response:
         headers = {"X-API-KEY": BOT_API_KEY}
         return await asyncio.to_thread(self._make_request, request_type, self._get_url(endpoint), headers, params, body)
-    
\ No newline at end of file
+    
+
+    def _stream_request(
+            self, loop: asyncio.AbstractEventLoop, chunks: asyncio.Queue, cancelled: threading.Event,
+            request_type: RequestType, url: str, headers: Dict, params: Dict = None, body: Dict = None
+            ) -> None:
+
+        def put(item) -> None:
+            asyncio.run_coroutine_threadsafe(chunks.put(item), loop).result()
+
+        response = None
+
+        try:
+
+            logger.debug(f"{request_type.value} {url} (stream) params={params}, body={body}")
+
+            with requests.request(
+                method=request_type.value, url=url, headers=headers, params=params, json=body, stream=True
+            ) as response:
+
+                response.raise_for_status()
+
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    if cancelled.is_set():
+                        return
+                    put(chunk)
+
+        except HTTPError as e:
+            if response is not None:
+                put(ServiceException(response))
+            else:
+                put(AppException(f"Could not make requests: {e}", "This service is not available, try again later."))
+
+        except (requests.exceptions.RequestException, InvalidChunkLength) as e:
+            put(AppException(f"Could not make requests: {e}", "This service is not available, try again later."))
+
+        finally:
+            if not cancelled.is_set():
+                put(None)
+
+    async def stream_request(
+            self, request_type: RequestType, endpoint: Endpoint, params: Dict = None, body: Dict = None
+            ) -> AsyncIterator[bytes]:
+
+        headers = {"X-API-KEY": BOT_API_KEY}
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        cancelled = threading.Event()
+
+        download = asyncio.create_task(asyncio.to_thread(
+            self._stream_request, asyncio.get_running_loop(), chunks, cancelled,
+            request_type, self._get_url(endpoint), headers, params, body
+        ))
+
+        try:
+
+            while True:
+
+                chunk = await chunks.get()
+
+                if chunk is None:
+                    break
+
+                if isinstance(chunk, Exception):
+                    raise chunk
+
+                yield chunk
+
+        finally:
+
+            cancelled.set()
+
+            # unblocks the download thread if it is waiting for room in the queue
+            while not chunks.empty():
+                chunks.get_nowait()
+
+            await download
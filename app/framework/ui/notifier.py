@@ -1,20 +1,98 @@
+import asyncio
+import hashlib
+import json
+import time
 from abc import ABC, abstractmethod
-from typing import List, Union
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Union
 
 import discord
 
+from framework.core.diagnostics import counters
+from framework.core.dispatcher import Priority, dispatch
+from framework.core.logger import get_logger, LoggerWrapper
 from framework.ui.view import AppView
 
 
+logger: LoggerWrapper = get_logger(__name__)
+
+
 ChannelType = Union[discord.abc.GuildChannel, discord.abc.PrivateChannel, discord.Thread]
 
 
+# updates requested within this window are rendered once
+RENDER_COALESCE_SEC = 0.3
+# discord allows about 5 message edits per 5 seconds in a channel before it starts rate limiting
+CHANNEL_EDIT_LIMIT = 5
+CHANNEL_EDIT_WINDOW_SEC = 5
+
+
+class ChannelEditBudget:
+
+    # sliding window of the recent message edits of every channel, shared by all notifiers
+    def __init__(self):
+        self.edits: Dict[int, Deque[float]] = {}
+
+    def _trim(self, channel_id: int, now: float) -> Deque[float]:
+
+        edits = self.edits.setdefault(channel_id, deque())
+
+        while edits and now - edits[0] >= CHANNEL_EDIT_WINDOW_SEC:
+            edits.popleft()
+
+        return edits
+
+    def get_wait(self, channel_id: int) -> float:
+
+        now = time.monotonic()
+        edits = self._trim(channel_id, now)
+
+        if len(edits) < CHANNEL_EDIT_LIMIT:
+            return 0
+
+        return edits[0] + CHANNEL_EDIT_WINDOW_SEC - now
+
+    def record(self, channel_id: int) -> None:
+        self._trim(channel_id, time.monotonic()).append(time.monotonic())
+
+
+channel_edit_budget = ChannelEditBudget()
+
+
+def _strip_custom_ids(value):
+
+    # custom ids are regenerated for every view, they must not count as a change
+    if isinstance(value, dict):
+        return {key: _strip_custom_ids(item) for key, item in value.items() if key != "custom_id"}
+
+    if isinstance(value, list):
+        return [_strip_custom_ids(item) for item in value]
+
+    return value
+
+
+def _hash_render(embed: discord.Embed, view: AppView) -> str:
+
+    data = {"embed": embed.to_dict(), "components": _strip_custom_ids(view.to_components())}
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
 class Notifier(ABC):
 
     def __init__(self, channel:ChannelType):
         self.channel: ChannelType = channel
         self.response: discord.Message = None
         self.error_messages: List[discord.Message] = []
+
+        self.render_task: Optional[asyncio.Task] = None
+        self.render_pending: bool = False
+        self.render_silent: bool = True
+        self.render_hash: Optional[str] = None
+        # incremented on clear so renders scheduled before it do not send the message again
+        self.render_generation: int = 0
+
+        self.view: Optional[AppView] = None
+        self.view_key: Optional[tuple] = None
     
     @abstractmethod
     async def _create_embed_heading(self) -> discord.Embed:
@@ -27,6 +105,25 @@ class Notifier(ABC):
     def _create_view(self) -> AppView:
         pass
 
+    def _get_view_key(self) -> Optional[tuple]:
+        # the view is rebuilt whenever this key changes, None rebuilds it on every display
+        return None
+
+    async def _get_view(self) -> AppView:
+
+        key = self._get_view_key()
+
+        if self.view and key is not None and key == self.view_key:
+            counters.increment("notifier", "views reused")
+            await self.view.refresh()
+            return self.view
+
+        self.view = self._create_view()
+        await self.view.init()
+        self.view_key = key
+
+        return self.view
+
     async def _display(self, silent: bool=False) -> None:
 
         if not self.channel:
@@ -37,29 +134,81 @@ class Notifier(ABC):
         if not embed:
             return
 
-        view = self._create_view()
-        await view.init()
+        view = await self._get_view()
+
+        render_hash = _hash_render(embed, view)
 
         if not self.response:
-            self.response = await self.channel.send(embed=embed, view=view, silent=silent)
+            self.response = await self._dispatch(lambda: self.channel.send(embed=embed, view=view, silent=silent))
+        elif render_hash == self.render_hash:
+            counters.increment("notifier", "edits skipped")
+            return
         else:
             # edit the message already sent
             try:
-                await self.response.edit(embed=embed, view=view)
+                channel_edit_budget.record(self.channel.id)
+                await self._dispatch(lambda: self.response.edit(embed=embed, view=view))
+                counters.increment("notifier", "edits sent")
             except discord.NotFound:
-                self.response = await self.channel.send(embed=embed, view=view, silent=silent)
+                self.response = await self._dispatch(lambda: self.channel.send(embed=embed, view=view, silent=silent))
+
+        self.render_hash = render_hash
+
+    async def _dispatch(self, func: Callable[[], Awaitable[Any]], priority: Priority=Priority.NOTIFIER) -> Any:
+        return await dispatch(priority, f"channel:{self.channel.id}", func)
+
+    async def _render(self, previous: Optional[asyncio.Task]) -> None:
+
+        generation = self.render_generation
+
+        # renders of the same notifier never overlap
+        if previous:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        await asyncio.sleep(RENDER_COALESCE_SEC)
+
+        if self.channel and self.response:
+            wait = channel_edit_budget.get_wait(self.channel.id)
+            if wait > 0:
+                counters.increment("notifier", "edits delayed")
+                await asyncio.sleep(wait)
+
+        # updates requested from here on need a new render
+        self.render_pending = False
+        silent, self.render_silent = self.render_silent, True
+
+        if generation != self.render_generation:
+            return
 
-    async def update(self, silent: bool=False) -> None:
         await self._display(silent)
+
+    async def update(self, silent: bool=False) -> None:
+
+        counters.increment("notifier", "updates requested")
+
+        # the message is only sent with a notification if one of the merged updates asked for it
+        self.render_silent = self.render_silent and silent
+
+        if self.render_pending:
+            counters.increment("notifier", "updates coalesced")
+        else:
+            self.render_pending = True
+            self.render_task = asyncio.create_task(self._render(self.render_task))
+
+        # a cancelled caller must not cancel the render shared with the other callers
+        await asyncio.shield(self.render_task)
     
     async def clear(self) -> None:
 
+        self.render_generation += 1
+
         if self.response:
-            await self.response.delete()
+            await self._dispatch(self.response.delete)
             self.response = None
+            self.render_hash = None
         
         for err_msg in self.error_messages:
-            await err_msg.delete()
+            await self._dispatch(err_msg.delete, Priority.CLEANUP)
     
     def _create_error_embed(self, error:str) -> discord.Embed:
 
@@ -78,7 +227,9 @@ class Notifier(ABC):
 
         embed = self._create_error_embed(error)
 
-        self.error_messages.append(await self.channel.send(embed=embed, delete_after=delete_after, silent=silent))
+        self.error_messages.append(
+            await self._dispatch(lambda: self.channel.send(embed=embed, delete_after=delete_after, silent=silent))
+        )
 
     async def change_channel(self, channel:ChannelType):
         await self.clear()
@@ -86,6 +237,71 @@ class Notifier(ABC):
         await self._display(silent=True)
         
 
+class PageDataSource(ABC):
+
+    # paginated access to the items of a PageNotifier, only the displayed page has to be materialized
+    @abstractmethod
+    async def get_count(self) -> int:
+        pass
+
+    @abstractmethod
+    async def get_page(self, start: int, end: int) -> List[Any]:
+        pass
+
+    async def prefetch(self, start: int, end: int) -> None:
+        # called in the background for the pages next to the displayed one
+        return
+
+    def invalidate(self) -> None:
+        return
+
+
+class SequenceSource(PageDataSource):
+
+    # items already held in memory, read live on every render
+    def __init__(self, get_items: Callable[[], Sequence[Any]]):
+        self.get_items: Callable[[], Sequence[Any]] = get_items
+
+    async def get_count(self) -> int:
+        return len(self.get_items())
+
+    async def get_page(self, start: int, end: int) -> List[Any]:
+        return list(self.get_items()[start:end])
+
+
+class CachedListSource(PageDataSource):
+
+    # for backends that can only return the whole list, it is loaded once and kept until invalidated
+    def __init__(self, load_items: Callable[[], Awaitable[List[Any]]], ttl_sec: Optional[float]=None):
+        self.load_items: Callable[[], Awaitable[List[Any]]] = load_items
+        self.ttl_sec: Optional[float] = ttl_sec
+        self.items: Optional[List[Any]] = None
+        self.loaded_at: float = 0
+        self.load_lock: asyncio.Lock = asyncio.Lock()
+
+    async def _get_items(self) -> List[Any]:
+
+        async with self.load_lock:
+
+            expired = self.ttl_sec is not None and time.monotonic() - self.loaded_at >= self.ttl_sec
+
+            if self.items is None or expired:
+                self.items = list(await self.load_items())
+                self.loaded_at = time.monotonic()
+                counters.increment("notifier", "page source loads")
+
+            return self.items
+
+    async def get_count(self) -> int:
+        return len(await self._get_items())
+
+    async def get_page(self, start: int, end: int) -> List[Any]:
+        return (await self._get_items())[start:end]
+
+    def invalidate(self) -> None:
+        self.items = None
+
+
 class PageNotifier(Notifier):
 
     def __init__(self, channel:ChannelType, display_page:bool=True, page_size:int=5):
@@ -93,26 +309,47 @@ class PageNotifier(Notifier):
         self.display_page: bool = display_page
         self.page_size: int = page_size
         self.page:int = 0
-        self.items = []
+        self.source: PageDataSource = self._create_source()
+        self.prefetch_task: Optional[asyncio.Task] = None
     
     @abstractmethod
-    async def _fetch_items(self):
+    def _create_source(self) -> PageDataSource:
         pass
 
     @abstractmethod
     def _add_item_to_page(self, embed:discord.Embed, item:object)->None:
         pass
+
+    async def _get_pages_count(self) -> int:
+        return -(-await self.source.get_count() // self.page_size)
+
+    async def _prefetch_neighbours(self) -> None:
+
+        start = self.page * self.page_size
+
+        try:
+            await self.source.prefetch(start + self.page_size, start + 2 * self.page_size)
+            if self.page > 0:
+                await self.source.prefetch(start - self.page_size, start)
+        except Exception as e:
+            logger.debug(f"Could not prefetch the pages next to page {self.page}: {e}")
     
     async def _add_page(self, embed:discord.Embed) -> None:
 
+        # the data may have shrunk since the page was selected
+        pages_count = await self._get_pages_count()
+        if self.page >= pages_count:
+            self.page = max(pages_count - 1, 0)
+
         start = self.page * self.page_size
         end = start + self.page_size
 
-        self.items = await self._fetch_items()
-        
-        for item in self.items[start:end]:
+        for item in await self.source.get_page(start, end):
             self._add_item_to_page(embed, item)
 
+        if not self.prefetch_task or self.prefetch_task.done():
+            self.prefetch_task = asyncio.create_task(self._prefetch_neighbours())
+
     async def _create_embed(self) -> discord.Embed:
 
         embed = await self._create_embed_heading()
@@ -130,34 +367,33 @@ class PageNotifier(Notifier):
     
     async def move_to_next_page(self) -> None:
 
-        await self._fetch_items()
-
-        if not self.items or not self.display_page:
+        if not self.display_page:
             return
 
-        pages_needed = len(self.items) // self.page_size
-        if (len(self.items) % self.page_size):
-            pages_needed += 1
+        pages_count = await self._get_pages_count()
+
+        if not pages_count:
+            return
 
-        if self.page + 1 < pages_needed:
+        if self.page + 1 < pages_count:
             self.page += 1
         else:
             self.page = 0
     
     async def move_to_prev_page(self) -> None:
 
-        await self._fetch_items()
+        if not self.display_page:
+            return
+
+        pages_count = await self._get_pages_count()
 
-        if not self.items or not self.display_page:
+        if not pages_count:
             return
         
         if self.page >= 1:
             self.page -= 1
         else:
-            pages_needed = len(self.items) // self.page_size
-            if (len(self.items) % self.page_size):
-                pages_needed += 1
-            self.page = pages_needed - 1
+            self.page = pages_count - 1
     
     async def update(self, silent: bool=False) -> None:
         await super().update(silent=silent)
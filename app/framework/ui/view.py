@@ -54,6 +54,10 @@ class AppView(View, ActionHandler):
     async def init(self):
         return
 
+    async def refresh(self):
+        # called when a cached view is displayed again, views with state dependent items update them here
+        return
+
     def _create_kwargs(self, interaction:discord.Interaction) -> Dict[str, object]:
         return {"interaction": interaction}
 
@@ -67,7 +71,7 @@ class ButtonView(AppView):
     def __init__(self, timeout=None):
         super().__init__(timeout=timeout)
 
-    def add_button(self, emoji: str, row: int, action: ActionType, custom_id: str=None) -> None:
+    def add_button(self, emoji: str, row: int, action: ActionType, custom_id: str=None) -> str:
 
         if not custom_id:
             custom_id = str(uuid.uuid4())
@@ -92,10 +96,22 @@ class ButtonView(AppView):
 
         self.action_map[custom_id] = action
 
+        return custom_id
+
+    def set_button(self, custom_id: str, emoji: str, action: ActionType) -> None:
+
+        # swaps a button in place, the emoji comes from an already validated config
+        button = next(item for item in self.children if isinstance(item, Button) and item.custom_id == custom_id)
+        button.emoji = emoji
+        self.action_map[custom_id] = action
+
 
 class SingleTextFieldModal(Modal, ActionHandler):
 
-    def __init__(self, title:str, label:str, action: ActionType, placeholder:str=None):
+    def __init__(
+        self, title:str, label:str, action: ActionType, placeholder:str=None, 
+        style: discord.TextStyle=discord.TextStyle.short
+    ):
 
         if len(title) > 45:
             title = title[:42].rstrip() + "..."
@@ -110,7 +126,7 @@ class SingleTextFieldModal(Modal, ActionHandler):
 
         self.text_input = TextInput(
             label=label,
-            style=discord.TextStyle.short,
+            style=style,
             placeholder= placeholder if placeholder else 'Type here...',
             required=True
         )
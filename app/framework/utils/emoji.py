@@ -1,20 +1,19 @@
 import asyncio
 import time
-from io import BytesIO
 import re
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 import uuid
 import os
-import requests
-from PIL import Image
-import numpy as np
 
 from discord.ext import commands
 import discord
 
+from framework.core.dispatcher import Priority, dispatch
 from framework.core.env_loader import DATA_PATH
 from framework.core.exception import AppException
-from framework.utils.file import read_json_file, write_json_file
+from framework.utils.file import read_json_file, write_json_file_async
 from framework.core.logger import get_logger, LoggerWrapper
 
 
@@ -24,12 +23,17 @@ logger: LoggerWrapper = get_logger(__name__)
 EMOJI_DATA_PATH = os.path.join(DATA_PATH, "emoji")
 
 API_TIMEOUT_SEC = 1
+# cache changes made within this window are written to disk together
+SAVE_DEBOUNCE_SEC = 2
 
 bot: commands.Bot = None
 lol_emojis: Dict[str, Dict[str, str]] = {}
 
 DEFAULT_EMOJI = "⚠️"
 
+CUSTOM_EMOJI_PATTERN = re.compile(r"<:(.*?):(\d+)>")
+UNICODE_EMOJI_CACHE_SIZE = 4096
+
 
 class EmojiException(AppException):
     
@@ -59,10 +63,16 @@ def setup(user_bot: commands.Bot):
     load_emojis()
 
 
-def validate_emoji(emoji:str) -> bool:
+@lru_cache(maxsize=UNICODE_EMOJI_CACHE_SIZE)
+def _is_unicode_emoji(emoji: str) -> bool:
 
     import emoji as emj
 
+    return emj.is_emoji(emj.emojize(emoji, language="alias"))
+
+
+def validate_emoji(emoji:str) -> bool:
+
     if not bot:
         raise EmojiException(
             "Bot not set in order to use emoji module.", 
@@ -72,7 +82,7 @@ def validate_emoji(emoji:str) -> bool:
     if not emoji:
         return False
 
-    if emj.is_emoji(emj.emojize(emoji, language="alias")):
+    if _is_unicode_emoji(emoji):
         return True
         
     if find_emoji_in_guild(emoji):
@@ -117,7 +127,7 @@ def get_lol_rank_emoji(rank: str) -> str:
 
 def find_emoji_in_guild(emoji_str: str, guild:discord.Guild=None) -> Optional[discord.Emoji]:
     
-    emoji_match = re.match(r"<:(.*?):(\d+)>", emoji_str)
+    emoji_match = CUSTOM_EMOJI_PATTERN.match(emoji_str)
 
     if not emoji_match:
         return None 
@@ -125,15 +135,16 @@ def find_emoji_in_guild(emoji_str: str, guild:discord.Guild=None) -> Optional[di
     emoji_name = emoji_match.group(1) 
     emoji_id = int(emoji_match.group(2))  
 
-    if guild:
-        return discord.utils.get(guild.emojis, guild=guild, name=emoji_name, id=emoji_id)
+    # the client keeps the emojis of every guild indexed by id and updates them on emoji, join and leave events
+    discord_emoji = bot.get_emoji(emoji_id)
 
-    for guild in bot.guilds:
-        discord_emoji = discord.utils.get(guild.emojis, name=emoji_name, id=emoji_id)
-        if discord_emoji:
-            return discord_emoji 
-    
-    return None
+    if not discord_emoji or discord_emoji.name != emoji_name:
+        return None
+
+    if guild and discord_emoji.guild_id != guild.id:
+        return None
+
+    return discord_emoji
 
 
 class ColorEmojiCache:
@@ -142,8 +153,11 @@ class ColorEmojiCache:
 
     def __init__(self):
         self.save_guild_ids: List[int] = []
-        self.created_emojis: Dict[str, Dict[str, Dict[str, str]]] = {}
+        # (emoji, primary color, secondary color) -> created emoji, least recently used first
+        self.created_emojis: OrderedDict[Tuple[str, str, str], str] = OrderedDict()
+        self.keys_by_emoji: Dict[str, Tuple[str, str, str]] = {}
         self.cache_lock: asyncio.Lock = asyncio.Lock()
+        self.save_task: Optional[asyncio.Task] = None
         self.failed_delete_calls: Dict[int, float] = {}
         self.failed_save_calls: Dict[int, float] = {}
         self.cooldown_time_sec: int = 300
@@ -154,21 +168,62 @@ class ColorEmojiCache:
         try:
             data = read_json_file(self.data_path)
             self.save_guild_ids = data.get("saveGuildIds", [])
-            self.created_emojis = data.get("createdEmojis", {})
+            created_emojis = data.get("createdEmojis", [])
+
+            if isinstance(created_emojis, dict):
+                # cache files written before the store was flattened nest emoji -> primary -> secondary color
+                created_emojis = [
+                    {"emoji": emoji, "primaryColor": prim_color, "secondaryColor": sec_color, "createdEmoji": created}
+                    for emoji, prim_colors in created_emojis.items()
+                    for prim_color, sec_colors in prim_colors.items()
+                    for sec_color, created in sec_colors.items()
+                ]
+
+            for entry in created_emojis:
+                self._put((entry["emoji"], entry["primaryColor"], entry["secondaryColor"]), entry["createdEmoji"])
         except Exception as e:
             logger.debug(f"[Custom Emoji Cache] Failed to load data: {e}")
-    
+
+    def _get_data(self) -> dict:
+        return {
+            "saveGuildIds": list(self.save_guild_ids),
+            "createdEmojis": [
+                {"emoji": emoji, "primaryColor": prim_color, "secondaryColor": sec_color, "createdEmoji": created}
+                for (emoji, prim_color, sec_color), created in self.created_emojis.items()
+            ]
+        }
+
     def _save_data(self):
-        
+
+        # changes made while a save is pending are written with it
+        if self.save_task and not self.save_task.done():
+            return
+
+        self.save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self):
+
+        await asyncio.sleep(SAVE_DEBOUNCE_SEC)
+
+        # later changes schedule their own save, writes to the same file are serialized
+        self.save_task = None
+
         try:
-            data = {
-                "saveGuildIds": self.save_guild_ids,
-                "createdEmojis": self.created_emojis
-            }
-            write_json_file(self.data_path, data)
+            await write_json_file_async(self.data_path, self._get_data())
         except Exception as e:
             logger.debug(f"[Custom Emoji Cache] Failed to save data: {e}")
 
+    def _put(self, key: Tuple[str, str, str], created_emoji: str):
+
+        replaced = self.created_emojis.get(key)
+
+        if replaced:
+            self.keys_by_emoji.pop(replaced, None)
+
+        self.created_emojis[key] = created_emoji
+        self.created_emojis.move_to_end(key)
+        self.keys_by_emoji[created_emoji] = key
+
     def _get_color_hex(self, color: Optional[Tuple[int, int, int]]):
         return f"#{color[0]:02X}{color[1]:02X}{color[2]:02X}" if color else "None"
 
@@ -182,15 +237,14 @@ class ColorEmojiCache:
         sec_color_hex = self._get_color_hex(secondary_color)
         prim_color_hex = self._get_color_hex(primary_color)
 
-        if emoji_str in self.created_emojis:
-            prim_colors = self.created_emojis[emoji_str]
-            if prim_color_hex in prim_colors:
-                sec_colors = prim_colors[prim_color_hex]
-                if sec_color_hex in sec_colors:
-                    color_emoji = sec_colors[sec_color_hex]
-                    if validate_emoji(color_emoji):
-                        return color_emoji
-                    self._remove_emoji_from_cache(color_emoji)
+        key = (emoji_str, prim_color_hex, sec_color_hex)
+        color_emoji = self.created_emojis.get(key)
+
+        if color_emoji:
+            if validate_emoji(color_emoji):
+                self.created_emojis.move_to_end(key)
+                return color_emoji
+            self._remove_emoji_from_cache(color_emoji)
 
         logger.info(f"[Custom Emoji Cache] {emoji_str}{prim_color_hex}{sec_color_hex} not found in cache.")
         return None
@@ -198,7 +252,8 @@ class ColorEmojiCache:
     async def _upload_emoji_to_guild(
         self, 
         guild: discord.Guild,
-        emoji_data: bytes
+        emoji_data: bytes,
+        priority: Priority
     ) -> Optional[discord.Guild]:
         
         name = str(uuid.uuid4()).replace("-", "_")[:10]
@@ -210,13 +265,15 @@ class ColorEmojiCache:
             return None
 
         try:
-            save_task = asyncio.create_task(guild.create_custom_emoji(name=name,image=emoji_data))
-            result = await asyncio.wait_for(save_task, API_TIMEOUT_SEC)
+            # the timeout only covers the discord call, not the time spent queued behind other traffic
+            result = await dispatch(
+                priority, f"guild:{guild.id}:emojis",
+                lambda: asyncio.wait_for(guild.create_custom_emoji(name=name,image=emoji_data), API_TIMEOUT_SEC)
+            )
             logger.info(f"[Custom Emoji Cache] Uploaded custom emoji {name} to guild (ID = {guild.id}).")
             return result
         except asyncio.TimeoutError:
             logger.debug("[Custom Emoji Cache] API Timeout reached.")
-            save_task.cancel()
             self.failed_save_calls[guild.id] = time.time()
         except Exception as e:
             logger.debug(f"[Custom Emoji Cache] Could not create new emoji: {e}")
@@ -224,88 +281,89 @@ class ColorEmojiCache:
 
     def _remove_emoji_from_cache(self, emoji_str: str):
 
-        for emoji in self.created_emojis:
-            for prim_color in self.created_emojis[emoji]:
-                for sec_color in self.created_emojis[emoji][prim_color]:
-                    colored_emoji = self.created_emojis[emoji][prim_color][sec_color]
-                    if colored_emoji == emoji_str:
-                        logger.debug(f"[Custom Emoji Cache] Removed custom emoji {colored_emoji} from cache.")
-                        del self.created_emojis[emoji][prim_color][sec_color]
-                        self._save_data()
-                        return
+        key = self.keys_by_emoji.pop(emoji_str, None)
+
+        if not key:
+            return
+
+        del self.created_emojis[key]
+        logger.debug(f"[Custom Emoji Cache] Removed custom emoji {emoji_str} from cache.")
+        self._save_data()
 
     async def _delete_emoji(self, emoji_str: str) -> bool:
 
-        for guild_id in self.save_guild_ids:
+        discord_emoji = find_emoji_in_guild(emoji_str)
 
-            guild: discord.Guild = discord.utils.get(bot.guilds, id=guild_id)
+        if not discord_emoji or discord_emoji.guild_id not in self.save_guild_ids:
+            logger.debug(f"[Custom Emoji Cache] Emoji {emoji_str} not found in the cache guilds.")
+            # it does not take a slot anymore, the entry is dead
+            self._remove_emoji_from_cache(emoji_str)
+            return False
 
-            if not guild:
-                logger.debug(f"[Custom Emoji Cache] Could not find Guild (ID = {guild_id}).")
-                continue
-            
-            last_failed = self.failed_delete_calls.get(guild_id)
+        guild_id = discord_emoji.guild_id
+        guild: discord.Guild = bot.get_guild(guild_id)
 
-            if last_failed is not None and (time.time() - last_failed < self.cooldown_time_sec):
-                logger.info(f"[Custom Emoji Cache] Skipping API call for Guild {guild_id} due to cooldown.")
-                continue
+        if not guild:
+            logger.debug(f"[Custom Emoji Cache] Could not find Guild (ID = {guild_id}).")
+            return False
 
-            discord_emoji = find_emoji_in_guild(emoji_str, guild)
+        last_failed = self.failed_delete_calls.get(guild_id)
 
-            if not discord_emoji:
-                logger.debug(f"[Custom Emoji Cache] Emoji {emoji_str} not found in Guild (ID = {guild_id}).")
-                continue
+        if last_failed is not None and (time.time() - last_failed < self.cooldown_time_sec):
+            logger.info(f"[Custom Emoji Cache] Skipping API call for Guild {guild_id} due to cooldown.")
+            return False
 
-            try:
-                delete_task = asyncio.create_task(guild.delete_emoji(discord_emoji))
-                await asyncio.wait_for(delete_task, API_TIMEOUT_SEC)
-                logger.info(f"[Custom Emoji Cache] Deleted emoji: {emoji_str} in Guild (ID = {guild_id}).")
-                self._remove_emoji_from_cache(emoji_str)
-                return True
-            except asyncio.TimeoutError:
-                logger.debug("[Custom Emoji Cache] API Timeout reached.")
-                delete_task.cancel()
-                self.failed_delete_calls[guild_id] = time.time()
-                return False
-            except Exception as e:
-                logger.debug(f"[Custom Emoji Cache] An error occurred trying to delete emoji ({discord_emoji}: {e}).")
-                return False
-        
-        return False
+        try:
+            await dispatch(
+                Priority.CLEANUP, f"guild:{guild.id}:emojis",
+                lambda: asyncio.wait_for(guild.delete_emoji(discord_emoji), API_TIMEOUT_SEC)
+            )
+            logger.info(f"[Custom Emoji Cache] Deleted emoji: {emoji_str} in Guild (ID = {guild_id}).")
+            self._remove_emoji_from_cache(emoji_str)
+            return True
+        except asyncio.TimeoutError:
+            logger.debug("[Custom Emoji Cache] API Timeout reached.")
+            self.failed_delete_calls[guild_id] = time.time()
+            return False
+        except Exception as e:
+            logger.debug(f"[Custom Emoji Cache] An error occurred trying to delete emoji ({discord_emoji}: {e}).")
+            return False
 
     async def _pop(self) -> bool:
 
         if not self.created_emojis:
             logger.debug("[Custom Emoji Cache] No created emojis found in local cache.")
             return False
-        
-        for emoji in self.created_emojis:
 
-            if not self.created_emojis[emoji]:
-                continue
+        # evicts the emoji that went unused for the longest time
+        for emoji_str in list(self.created_emojis.values()):
+            if await self._delete_emoji(emoji_str):
+                return True
 
-            for primary_color in self.created_emojis[emoji]:
+        return False
 
-                if not self.created_emojis[emoji][primary_color]:
-                    continue
+    def get_free_slots(self) -> int:
 
-                for secondary_color in self.created_emojis[emoji][primary_color]:
-                    emoji_str = self.created_emojis[emoji][primary_color][secondary_color]
-                    if await self._delete_emoji(emoji_str):
-                        return True
-                    
-        return False
+        free_slots = 0
+
+        for guild_id in self.save_guild_ids:
+            guild: discord.Guild = bot.get_guild(guild_id)
+            if guild:
+                free_slots += max(0, guild.emoji_limit - len(guild.emojis))
+
+        return free_slots
 
     async def _create_guild_emoji(
         self, 
-        emoji_img_data: bytes
+        emoji_img_data: bytes,
+        priority: Priority
     ) -> Optional[discord.Emoji]:  
         
         emoji_capacity_full = False
 
         for guild_id in self.save_guild_ids:
 
-            guild: discord.Guild = discord.utils.get(bot.guilds, id=guild_id)
+            guild: discord.Guild = bot.get_guild(guild_id)
 
             if not guild:
                 logger.debug(f"[Custom Emoji Cache] Could not find Guild (ID = {guild_id})")
@@ -315,7 +373,7 @@ class ColorEmojiCache:
                 emoji_capacity_full = True
             else:
                 emoji_capacity_full = False
-                created_emoji = await self._upload_emoji_to_guild(guild, emoji_img_data)
+                created_emoji = await self._upload_emoji_to_guild(guild, emoji_img_data, priority)
                 if created_emoji:
                     return created_emoji
 
@@ -327,14 +385,15 @@ class ColorEmojiCache:
         if not await self._pop():
             return None
         
-        return await self._create_guild_emoji(emoji_img_data)
+        return await self._create_guild_emoji(emoji_img_data, priority)
 
     async def create_emoji(
         self,
         initial_emoji_str :str,
         emoji_data: bytes,
         secondary_color: Optional[Tuple[int, int, int]] = None,
-        primary_color: Optional[Tuple[int, int, int]] = None
+        primary_color: Optional[Tuple[int, int, int]] = None,
+        priority: Priority = Priority.NOTIFIER
     ) -> Optional[str]:
         
         async with self.cache_lock:
@@ -342,21 +401,21 @@ class ColorEmojiCache:
             sec_color_hex = self._get_color_hex(secondary_color)
             prim_color_hex = self._get_color_hex(primary_color)
 
+            # a pre-warm or another render may have created it while this one waited for the lock
+            existing_emoji = self.created_emojis.get((initial_emoji_str, prim_color_hex, sec_color_hex))
+
+            if existing_emoji:
+                return existing_emoji
+
             logger.info(f"[Custom Emoji Cache] Creating emoji {initial_emoji_str}{prim_color_hex}{sec_color_hex}.")
 
-            created_emoji = await self._create_guild_emoji(emoji_data)
+            created_emoji = await self._create_guild_emoji(emoji_data, priority)
 
             if not created_emoji:
                 return None
 
-            if initial_emoji_str not in self.created_emojis:
-                self.created_emojis[initial_emoji_str] = {}
-
-            if prim_color_hex not in self.created_emojis[initial_emoji_str]:
-                self.created_emojis[initial_emoji_str][prim_color_hex] = {}
-
             created_emoji_str = f"<:{created_emoji.name}:{created_emoji.id}>"
-            self.created_emojis[initial_emoji_str][prim_color_hex][sec_color_hex] = created_emoji_str
+            self._put((initial_emoji_str, prim_color_hex, sec_color_hex), created_emoji_str)
             self._save_data()
 
             return created_emoji_str
@@ -367,14 +426,7 @@ class ColorEmojiManager:
     def __init__(self):
         self.cache: ColorEmojiCache = ColorEmojiCache()
     
-    def _binarize_image(self, image: Image.Image, threshold: int=128) -> np.ndarray:
-
-        gray_image = image.convert("L")
-        binary_np = np.array(gray_image)
-
-        return np.where(binary_np > threshold, 1, 0)
-
-    def _color_emoji(
+    async def _color_emoji(
         self, 
         discord_emoji: discord.Emoji,
         secondary_color: Optional[Tuple[int, int, int]]=None,
@@ -384,33 +436,22 @@ class ColorEmojiManager:
         if not primary_color and not secondary_color:
             return None
 
-        response = requests.get(discord_emoji.url)
-
-        if response.status_code != 200:
+        try:
+            emoji_data = await discord_emoji.read()
+        except Exception as e:
+            logger.debug(f"[Custom Emoji Cache] Could not download emoji {discord_emoji}: {e}")
             return None
-        
-        image = Image.open(BytesIO(response.content))
-        image = image.convert("RGBA")
 
-        secondary_r, secondary_g, secondary_b = secondary_color if secondary_color else (255, 255, 255)
-        primary_r, primary_g, primary_b = primary_color if primary_color else (0, 0, 0)
-
-        bin_image_data = self._binarize_image(image, 128)
-
-        new_data = [
-            (secondary_r, secondary_g, secondary_b) if bin_pixel else
-            (primary_r, primary_g, primary_b)
-            for bin_pixel in bin_image_data.flatten()
-        ]
-        
-        new_image = Image.new("RGB", image.size)
-        new_image.putdata(new_data)
+        # numpy and pillow are only imported once an emoji actually has to be colored
+        from framework.utils.image import recolor_image
 
-        img_byte_arr = BytesIO()
-        new_image.save(img_byte_arr, format="PNG")
-        img_byte_arr.seek(0)
-
-        return img_byte_arr.getvalue()
+        # decoding, recoloring and encoding the image would block the event loop
+        return await asyncio.to_thread(
+            recolor_image,
+            emoji_data,
+            secondary_color if secondary_color else (255, 255, 255),
+            primary_color if primary_color else (0, 0, 0)
+        )
 
     async def get_emoji(
         self,
@@ -434,7 +475,7 @@ class ColorEmojiManager:
         if cached_emoji:
             return cached_emoji
     
-        colored_emoji_data = self._color_emoji(guild_emoji, secondary_color, primary_color)
+        colored_emoji_data = await self._color_emoji(guild_emoji, secondary_color, primary_color)
 
         if not colored_emoji_data:
             return emoji_str
@@ -445,6 +486,58 @@ class ColorEmojiManager:
             return created_emoji
 
         return emoji_str
+
+    async def prewarm(
+        self,
+        combinations: List[Tuple[str, Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int]]]]
+    ) -> int:
+
+        pending: Dict[Tuple[str, str, str], Tuple[str, discord.Emoji, Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int]]]] = {}
+
+        for emoji_str, secondary_color, primary_color in combinations:
+
+            if not secondary_color and not primary_color:
+                continue
+
+            key = (emoji_str, self.cache._get_color_hex(primary_color), self.cache._get_color_hex(secondary_color))
+
+            if key in pending or key in self.cache.created_emojis:
+                continue
+
+            guild_emoji = find_emoji_in_guild(emoji_str)
+
+            if guild_emoji:
+                pending[key] = (emoji_str, guild_emoji, secondary_color, primary_color)
+
+        if not pending:
+            return 0
+
+        # evicting emojis other configs are using to pre-warm this one would only move the misses around
+        free_slots = self.cache.get_free_slots()
+
+        if len(pending) > free_slots:
+            logger.info(
+                f"[Custom Emoji Cache] Only {free_slots} free emoji slot(s) for {len(pending)} colored emoji(s), "
+                "the rest are created on first use."
+            )
+
+        jobs = list(pending.values())[:free_slots]
+
+        images = await asyncio.gather(*(
+            self._color_emoji(guild_emoji, secondary_color, primary_color)
+            for _, guild_emoji, secondary_color, primary_color in jobs
+        ))
+
+        created = 0
+
+        # uploads go one by one behind the interactive traffic, discord limits emoji creation per guild
+        for (emoji_str, _, secondary_color, primary_color), emoji_data in zip(jobs, images):
+            if emoji_data and await self.cache.create_emoji(
+                emoji_str, emoji_data, secondary_color, primary_color, Priority.CLEANUP
+            ):
+                created += 1
+
+        return created
     
 
 _color_emoji_manager = ColorEmojiManager()
@@ -456,4 +549,10 @@ async def get_colored_emoji(
     primary_color: Optional[Tuple[int, int, int]]=None
     ) -> str:
     return await _color_emoji_manager.get_emoji(emoji, secondary_color, primary_color)
-    
\ No newline at end of file
+    
+
+
+async def prewarm_colored_emojis(
+    combinations: List[Tuple[str, Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int]]]]
+    ) -> int:
+    return await _color_emoji_manager.prewarm(combinations)
@@ -1,12 +1,20 @@
+import asyncio
 import json
 import os
-from typing import Any
+import uuid
+from typing import Any, Dict, Tuple
 
 import discord
 
 from framework.core.exception import AppException
 from framework.core.logger import get_logger, LoggerWrapper
 
+try:
+    # faster codec, used when it is installed
+    import orjson
+except ImportError:
+    orjson = None
+
 
 logger: LoggerWrapper = get_logger(__name__)
 
@@ -14,51 +22,130 @@ logger: LoggerWrapper = get_logger(__name__)
 class InvalidJSONFileException(AppException):
 
     def __init__(self, exception: Exception):
-        super(f"Invalid json data: {exception}", "Invalid json data found!")
+        super().__init__(f"Invalid json data: {exception}", "Invalid json data found!")
 
 
 class FileSaveException(AppException):
 
     def __init__(self, file_path: str, exception: Exception):
-        super(f"Could not save file at: {file_path}: {exception}", "Could not save file!")
+        super().__init__(f"Could not save file at: {file_path}: {exception}", "Could not save file!")
 
 
-async def get_data_from_attachment(file: discord.Attachment):
+def _loads(data: bytes) -> Any:
+
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            raise InvalidJSONFileException(e)
 
     try:
+        return json.loads(data.decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise InvalidJSONFileException(e)
+
 
-        file_bytes = await file.read()
-        data = json.loads(file_bytes.decode("utf-8"))
-        return data
+def _dumps(data: Any) -> bytes:
+
+    # both paths write the same layout: 2 space indent (the only one orjson has) and utf-8 text unescaped
+    if orjson:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError as e:
+            raise InvalidJSONFileException(e)
 
-    except json.JSONDecodeError as e:
+    try:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    except (TypeError, ValueError) as e:
         raise InvalidJSONFileException(e)
 
 
+async def get_data_from_attachment(file: discord.Attachment):
+    return _loads(await file.read())
+
+
 def read_json_file(file_path: str) -> Any:
 
     if not os.path.exists(file_path):
         return None
 
+    with open(file_path, "rb") as file:
+        file_bytes = file.read()
+
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except json.JSONDecodeError as e:
+        return _loads(file_bytes)
+    except InvalidJSONFileException:
+        # the broken file is kept next to the original for inspection instead of being lost
         try:
-            os.remove(file_path) 
+            os.replace(file_path, f"{file_path}.corrupt")
+            logger.warning(f"Moved invalid json file {file_path} to {file_path}.corrupt.")
         except OSError:
             pass
-        raise InvalidJSONFileException(e)
+        raise
+
+
+def write_json_file(file_path: str, data: Any) -> None:
 
+    # the data is written to a temporary file that is moved over the target once it is on disk,
+    # so a crash mid-write leaves the previous file intact
+    file_bytes = _dumps(data)
+    directory = os.path.dirname(file_path)
 
-def write_json_file(file_path: str, data: dict) -> None:
+    try:
+        os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
 
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        try:
+            with open(tmp_path, "xb") as f:
+                f.write(file_bytes)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
 
-    try :
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
     except (OSError, IOError) as e:
         raise FileSaveException(file_path, e)
-    except TypeError as e:
-        raise InvalidJSONFileException(e)
\ No newline at end of file
+
+
+async def read_json_file_async(file_path: str) -> Any:
+    return await asyncio.to_thread(read_json_file, file_path)
+
+
+# data waiting to be written per path with the outcome shared by its callers,
+# a burst of saves to one file only writes the latest data
+_pending_writes: Dict[str, Tuple[Any, asyncio.Future]] = {}
+_write_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def write_json_file_async(file_path: str, data: Any) -> None:
+
+    pending = _pending_writes.get(file_path)
+    # the data of a caller replaced by newer data is saved by the newer write, so they share its outcome
+    future = pending[1] if pending else asyncio.get_running_loop().create_future()
+    _pending_writes[file_path] = (data, future)
+
+    lock = _write_locks.setdefault(file_path, asyncio.Lock())
+
+    async with lock:
+
+        # the first caller to get the lock writes the latest data for everyone waiting on it
+        if file_path in _pending_writes and _pending_writes[file_path][1] is future:
+
+            latest_data, _ = _pending_writes.pop(file_path)
+
+            try:
+                await asyncio.to_thread(write_json_file, file_path, latest_data)
+                future.set_result(None)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+
+    await future
@@ -0,0 +1,35 @@
+from io import BytesIO
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+
+BINARIZE_THRESHOLD = 128
+
+
+def recolor_image(
+    image_data: bytes,
+    light_color: Tuple[int, int, int],
+    dark_color: Tuple[int, int, int],
+    threshold: int=BINARIZE_THRESHOLD
+) -> bytes:
+
+    # paints the pixels brighter than the threshold with the light color and the rest with the dark one,
+    # the alpha channel of the source is kept so transparent emojis stay transparent
+    image = Image.open(BytesIO(image_data)).convert("RGBA")
+
+    pixels = np.asarray(image)
+    light = np.asarray(image.convert("L")) > threshold
+
+    palette = np.array([dark_color, light_color], dtype=np.uint8)
+
+    rgba = np.empty(pixels.shape, dtype=np.uint8)
+    rgba[..., :3] = palette[light.view(np.uint8)]
+    rgba[..., 3] = pixels[..., 3]
+
+    img_byte_arr = BytesIO()
+    # emojis are small, a light compression keeps them well under the upload limit for a fraction of the time
+    Image.fromarray(rgba, "RGBA").save(img_byte_arr, format="PNG", compress_level=1)
+
+    return img_byte_arr.getvalue()
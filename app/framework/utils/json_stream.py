@@ -0,0 +1,80 @@
+import codecs
+import json
+from typing import Any, List
+
+
+class JSONStreamException(ValueError):
+    pass
+
+
+class JSONArrayParser:
+
+    # incremental parser for a top level json array of objects, elements are returned as soon as
+    # they are complete so the consumer does not have to wait for the whole response body
+    def __init__(self):
+        self.decoder: json.JSONDecoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer: str = ""
+        self.started: bool = False
+        self.finished: bool = False
+
+    def _skip_whitespace(self, idx: int) -> int:
+
+        while idx < len(self.buffer) and self.buffer[idx] in " \t\r\n":
+            idx += 1
+
+        return idx
+
+    def feed(self, chunk: bytes) -> List[Any]:
+
+        self.buffer += self.text_decoder.decode(chunk)
+
+        items = []
+        idx = self._skip_whitespace(0)
+
+        if not self.started:
+
+            if idx >= len(self.buffer):
+                self.buffer = ""
+                return items
+
+            if self.buffer[idx] != "[":
+                raise JSONStreamException(f"Expected a json array, found '{self.buffer[idx]}'")
+
+            self.started = True
+            idx += 1
+
+        while not self.finished:
+
+            idx = self._skip_whitespace(idx)
+
+            if idx >= len(self.buffer):
+                break
+
+            if self.buffer[idx] == ",":
+                idx += 1
+                continue
+
+            if self.buffer[idx] == "]":
+                self.finished = True
+                idx += 1
+                break
+
+            try:
+                item, end = self.decoder.raw_decode(self.buffer, idx)
+            except json.JSONDecodeError:
+                # the element is not complete yet, wait for the next chunk
+                break
+
+            items.append(item)
+            idx = end
+
+        self.buffer = self.buffer[idx:]
+        return items
+
+    def close(self) -> None:
+
+        self.buffer += self.text_decoder.decode(b"", final=True)
+
+        if not self.finished or self.buffer.strip():
+            raise JSONStreamException("Incomplete json array in the response")
@@ -0,0 +1,187 @@
+import asyncio
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, List, Optional, Union
+
+import discord
+
+from framework.core.diagnostics import counters
+from framework.core.dispatcher import Priority, dispatch
+from framework.core.logger import get_logger, LoggerWrapper
+
+
+logger: LoggerWrapper = get_logger(__name__)
+
+
+PurgeableChannel = Union[discord.TextChannel, discord.Thread, discord.VoiceChannel]
+
+
+# discord only bulk deletes messages younger than 14 days, the margin covers the time the purge takes
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=30)
+BULK_DELETE_CHUNK = 100
+# older messages are deleted one by one, discord rate limits those per channel
+SINGLE_DELETE_INTERVAL_SEC = 1
+# channels purged at the same time, their calls still share the dispatcher budget
+MAX_CONCURRENT_CHANNELS = 4
+PROGRESS_INTERVAL_SEC = 5
+
+
+class PurgeProgress:
+
+    def __init__(self, channels_count: int, on_progress: Optional[Callable[["PurgeProgress"], Awaitable[None]]]=None):
+        self.channels_count: int = channels_count
+        self.channels_done: int = 0
+        self.deleted: int = 0
+        self.failed: int = 0
+        self.on_progress: Optional[Callable[[PurgeProgress], Awaitable[None]]] = on_progress
+        self.reported_at: float = time.monotonic()
+
+    def format(self) -> str:
+        return (
+            f"Deleted `{self.deleted}` messages so far "
+            f"({self.channels_done}/{self.channels_count} channels done, {self.failed} failed)."
+        )
+
+    async def report(self, force: bool=False) -> None:
+
+        if not self.on_progress:
+            return
+
+        if not force and time.monotonic() - self.reported_at < PROGRESS_INTERVAL_SEC:
+            return
+
+        self.reported_at = time.monotonic()
+
+        try:
+            await self.on_progress(self)
+        except Exception as e:
+            logger.debug(f"[PURGE] Could not report progress: {e}.")
+
+
+class ChannelPurge:
+
+    def __init__(self, channel: PurgeableChannel, condition: Callable[[discord.Message], bool], progress: PurgeProgress):
+        self.channel: PurgeableChannel = channel
+        self.condition: Callable[[discord.Message], bool] = condition
+        self.progress: PurgeProgress = progress
+        self.route: str = f"channel:{channel.id}"
+        # cleared when the bot is not allowed to bulk delete in the channel
+        self.bulk_allowed: bool = True
+        self.deleted: int = 0
+
+    def _tag_log(self, log: str) -> str:
+        return f"[PURGE {self.channel.id}] {log}"
+
+    async def _record(self, deleted: int, failed: int) -> None:
+
+        self.deleted += deleted
+        self.progress.deleted += deleted
+        self.progress.failed += failed
+
+        counters.increment("purge", "deleted", deleted)
+        if failed:
+            counters.increment("purge", "failed", failed)
+
+        await self.progress.report()
+
+    async def _delete_single(self, message: discord.Message) -> None:
+
+        try:
+            await dispatch(Priority.CLEANUP, self.route, message.delete)
+        except discord.NotFound:
+            # already gone, nothing left to do
+            return
+        except Exception as e:
+            logger.error(self._tag_log(f"Error deleting message (ID: {message.id}): {e}."))
+            await self._record(0, 1)
+            return
+
+        counters.increment("purge", "single deletes")
+        await self._record(1, 0)
+        await asyncio.sleep(SINGLE_DELETE_INTERVAL_SEC)
+
+    async def _delete_bulk(self, messages: List[discord.Message]) -> None:
+
+        if not messages:
+            return
+
+        if len(messages) == 1 or not self.bulk_allowed:
+            for message in messages:
+                await self._delete_single(message)
+            return
+
+        try:
+            await dispatch(Priority.CLEANUP, self.route, lambda: self.channel.delete_messages(messages))
+        except discord.Forbidden:
+            # bulk deletes need manage messages, the bot can still delete its own messages one by one
+            logger.warning(self._tag_log("Not allowed to bulk delete, deleting messages one by one."))
+            self.bulk_allowed = False
+            for message in messages:
+                await self._delete_single(message)
+            return
+        except Exception as e:
+            logger.error(self._tag_log(f"Error bulk deleting {len(messages)} message(s): {e}."))
+            await self._record(0, len(messages))
+            return
+
+        counters.increment("purge", "bulk deletes")
+        await self._record(len(messages), 0)
+
+    async def run(self) -> int:
+
+        cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+        chunk: List[discord.Message] = []
+
+        # history goes from newest to oldest, once a message is past the cutoff all the next ones are too
+        async for message in self.channel.history(limit=None):
+
+            if not self.condition(message):
+                continue
+
+            if message.created_at > cutoff:
+                chunk.append(message)
+                if len(chunk) >= BULK_DELETE_CHUNK:
+                    await self._delete_bulk(chunk)
+                    chunk = []
+            else:
+                await self._delete_bulk(chunk)
+                chunk = []
+                await self._delete_single(message)
+
+        await self._delete_bulk(chunk)
+
+        return self.deleted
+
+
+async def purge_channels(
+        channels: List[PurgeableChannel],
+        condition: Callable[[discord.Message], bool],
+        on_progress: Optional[Callable[[PurgeProgress], Awaitable[None]]]=None
+    ) -> PurgeProgress:
+
+    progress = PurgeProgress(len(channels), on_progress)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHANNELS)
+
+    async def purge_channel(channel: PurgeableChannel) -> None:
+
+        async with semaphore:
+
+            logger.info(f"[PURGE] Purging messages in channel: {channel.name} (ID: {channel.id}).")
+
+            try:
+                deleted = await ChannelPurge(channel, condition, progress).run()
+            except Exception as e:
+                # a channel the bot cannot read does not stop the others
+                logger.error(f"[PURGE] Error purging channel: {channel.name} (ID: {channel.id}): {e}.")
+                deleted = 0
+
+            progress.channels_done += 1
+
+            logger.info(f"[PURGE] Deleted {deleted} message(s) in channel: {channel.name} (ID: {channel.id}).")
+
+            await progress.report()
+
+    await asyncio.gather(*(purge_channel(channel) for channel in channels))
+    await progress.report(force=True)
+
+    return progress
@@ -1,6 +1,5 @@
 
 
-import asyncio
 from typing import Dict, Union
 
 import discord
@@ -9,6 +8,7 @@ from framework.core.config import upload_config
 from framework.interaction_handler.common import responde
 from framework.interaction_handler.decorator import admin_action, defer, guild_context, handle_exceptions
 from framework.utils.file import get_data_from_attachment
+from framework.utils.purge import purge_channels
 from framework.core.logger import LoggerWrapper, get_logger
 
 from games.lol.entity import GameType
@@ -30,9 +30,9 @@ async def _clear_channel(guild: discord.Guild, channel: Union[discord.abc.GuildC
 
     logger.info(f"Clearing messages.", channel=channel, guild=guild)
 
-    async for message in channel.history(limit=None):
-        await message.delete()
-        await asyncio.sleep(1)
+    progress = await purge_channels([channel], lambda message: True)
+
+    logger.info(f"Cleared {progress.deleted} message(s).", channel=channel, guild=guild)
 
 
 async def _create_leaderboards(guild: discord.Guild):
@@ -78,8 +78,7 @@ async def set_leaderboard_channel(interaction: discord.Interaction, channel: dis
 
     try:
         cfg = LeaderboardGuildConfig(interaction.guild)
-        cfg.config.channel_id = channel.id
-        cfg.save_config()
+        await cfg.update_config(channel_id=channel.id)
         logger.info(f"Channel Leaderboard has been set to channel {channel.name} (ID = {channel.id}).", interaction=interaction)
         await responde(interaction, f"League of Legends Leaderboard channel set to `{channel.name}`.")
     except Exception as e:
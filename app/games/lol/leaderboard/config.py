@@ -8,7 +8,7 @@ from games.core import GAME_CONFIG_PATH
 from games.lol.entity import GameType
 
 from framework.ui.view import AppIcon
-from framework.core.config import ButtonConfig, Config, GuildConfig
+from framework.core.config import ButtonConfig, Config, GuildConfig, register_guild_config
 from framework.core.exception import InvalidConfigException
 from framework.utils.file import read_json_file
 from framework.core.logger import LoggerWrapper, get_logger
@@ -228,3 +228,4 @@ def load_default_config_data():
 
 
 load_default_config_data()
+register_guild_config(LeaderboardGuildConfig)
@@ -5,7 +5,7 @@ import discord
 
 from framework.interaction_handler.decorator import defer, handle_exceptions, update_notifier
 from framework.interaction_handler.handler import PageInteractionHandler
-from framework.ui.notifier import ChannelType, PageNotifier
+from framework.ui.notifier import CachedListSource, ChannelType, PageDataSource, PageNotifier
 from framework.ui.view import ButtonView
 from framework.core.exception import AppException
 from framework.core.logger import get_logger, LoggerWrapper
@@ -73,6 +73,7 @@ class Leaderboard(PageInteractionHandler):
     async def update(self, interaction: discord.Interaction=None):
         
         self.config = LeaderboardGuildConfig(self.guild)
+        self.notifier.source.invalidate()
 
         logger.info(self._tag_log("Triggered League of Legends leaderboard 'update'"), interaction=interaction)
 
@@ -107,8 +108,12 @@ class LeaderboardNotifier(PageNotifier):
     def _create_view(self):
         return LeaderboardView(self.leaderboard)
 
-    async def _fetch_items(self) -> None:
-        return await self.leaderboard.get_players()
+    def _get_view_key(self) -> tuple:
+        return (self.leaderboard.config.config,)
+
+    def _create_source(self) -> PageDataSource:
+        # players are looked up member by member, so the list is only rebuilt when the leaderboard updates
+        return CachedListSource(lambda: self.leaderboard.get_players())
 
     def _add_item_to_page(self, embed: discord.Embed, item: Tuple[discord.Member, Player]) -> None:
 
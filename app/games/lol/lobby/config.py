@@ -5,7 +5,7 @@ from typing import List
 import discord
 
 from framework.ui.view import AppIcon
-from framework.core.config import ButtonConfig, GuildConfig
+from framework.core.config import ButtonConfig, GuildConfig, register_guild_config
 from framework.core.exception import InvalidConfigException
 from framework.utils.file import read_json_file
 from framework.core.logger import LoggerWrapper, get_logger
@@ -148,6 +148,9 @@ class LobbyConfig(ButtonConfig):
 
         super().__init__(data, LobbyIcon)
     
+    def get_button_configs(self) -> List[ButtonConfig]:
+        return [self, *self.team_configs]
+
     def _from_dict(self, data):
         
         super()._from_dict(data)
@@ -281,3 +284,4 @@ def load_default_config_data():
 
 
 load_default_config_data()
+register_guild_config(LobbyGuildConfig)
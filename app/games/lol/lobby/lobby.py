@@ -13,6 +13,7 @@ from framework.interaction_handler.decorator import (
 from framework.interaction_handler.handler import TInteractionHandler
 from framework.ui.notifier import ChannelType, Notifier
 from framework.ui.view import ButtonView, SingleTextFieldModal
+from framework.core.dispatcher import Priority, dispatch
 from framework.core.exception import AppException
 from framework.core.logger import LoggerWrapper, get_logger
 
@@ -351,7 +352,7 @@ class Lobby(TInteractionHandler):
         embed.set_footer(text=f"Match: {self.current_match.id}")
 
         try:
-            await user.send(embed=embed)
+            await dispatch(Priority.DM, f"user:{user.id}", lambda: user.send(embed=embed))
             logger.info(self._tag_log(f"Sent match stats to user (ID = {user.id})."), guild=self._voice_channel.guild)
         except discord.Forbidden as e:
             await self.notifier.send_error(f"Could not send result to `{user.name}` (check log for more info).")
@@ -467,7 +468,7 @@ class Lobby(TInteractionHandler):
         for player in team.players:
             user = discord.utils.get(self._voice_channel.guild.members, id=player.discord_id)
             try:
-                await user.send(embed=embed)
+                await dispatch(Priority.DM, f"user:{user.id}", lambda: user.send(embed=embed))
                 logger.info(self._tag_log(f"Sent champion pool to user (ID={user.id})."), guild=self._voice_channel.guild)
             except discord.Forbidden as e:
                 await self.notifier.send_error(f"Could not send champion pool to `{user.name}`")
@@ -615,6 +616,14 @@ class LobbyNotifier(Notifier):
     def _create_view(self) -> View:
         return LobbyView(self.lobby)
 
+    def _get_view_key(self) -> tuple:
+        return (
+            self.lobby.config.config,
+            self.lobby.flags.champ_pool_visibility,
+            self.lobby.current_match,
+            tuple(self.lobby.team_configs.values())
+        )
+
     def _create_team_embed(self, team: Team):
 
         avg_elo = team.get_avg_elo(self.lobby.game_type)
@@ -664,7 +673,7 @@ class LobbyNotifier(Notifier):
             # new match has started
             for _, message in self.team_messages.items():
                 try:
-                    await message.delete()
+                    await self._dispatch(message.delete, Priority.CLEANUP)
                 except discord.NotFound:
                     pass
             
@@ -673,9 +682,10 @@ class LobbyNotifier(Notifier):
         for team in current_match.teams:
             team_embed = self._create_team_embed(team)
             if team.id not in self.team_messages:
-                self.team_messages[team.id] = await self.channel.send(embed=team_embed)
+                self.team_messages[team.id] = await self._dispatch(lambda: self.channel.send(embed=team_embed))
             else:
-                await self.team_messages[team.id].edit(embed=team_embed)
+                message = self.team_messages[team.id]
+                await self._dispatch(lambda: message.edit(embed=team_embed))
     
     async def update(self, silent:bool=False):
         await self.display_teams_messages()
@@ -684,7 +694,7 @@ class LobbyNotifier(Notifier):
     async def clear(self):
         for team in self.team_messages:
             try:
-                await self.team_messages[team].delete()
+                await self._dispatch(self.team_messages[team].delete, Priority.CLEANUP)
             except discord.NotFound:
                 pass
         await super().clear()
@@ -1,6 +1,16 @@
+import time
+
+# taken before the imports so the time to ready includes them
+STARTED_AT = time.perf_counter()
+
+import asyncio
+
 import discord
 from discord.ext import commands
 
+from framework.core.command_sync import sync_command_tree
+from framework.core.config import prewarm_guild_button_emojis
+from framework.core.diagnostics import counters
 from framework.core.logger import get_logger, LoggerWrapper
 import framework.utils.emoji as emoji
 from framework.core.env_loader import DISCORD_TOKEN
@@ -18,14 +28,39 @@ intents.emojis = True
 bot = commands.Bot(command_prefix='!', intents=intents)
 emoji.setup(bot)
 
+COGS = ['music', 'admin', 'games']
+
+# on_ready fires again after every gateway reconnect, the startup only runs once
+started: bool = False
+
 
 @bot.event
 async def on_ready():
-    logger.info("Loading cogs")
-    for filename in ['music', 'admin', 'games']:
-        await bot.load_extension(f'cogs.{filename}')
-    synced = await bot.tree.sync()
-    logger.info(f"Commands synced {synced}")
+
+    global started
+
+    if started:
+        logger.info("Reconnected, cogs already loaded.")
+        return
+
+    started = True
+
+    try:
+        logger.info("Loading cogs")
+        for filename in COGS:
+            if f'cogs.{filename}' not in bot.extensions:
+                await bot.load_extension(f'cogs.{filename}')
+        asyncio.create_task(prewarm_guild_button_emojis(bot.guilds))
+        await sync_command_tree(bot)
+    except Exception:
+        # the next ready event tries again
+        started = False
+        raise
+
+    ready_ms = int((time.perf_counter() - STARTED_AT) * 1000)
+    counters.set("startup", "time to ready ms", ready_ms)
+    logger.info(f"Ready in {ready_ms} ms.")
+
     for guild in bot.guilds:
         logger.info("Bot started.", guild=guild)
  
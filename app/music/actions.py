@@ -1,4 +1,6 @@
 
+from typing import List
+
 import discord
 from discord.ext import commands
 
@@ -42,6 +44,12 @@ async def play_song(
     return await player_actions.play_song(interaction, bot, query, playlist_title, next, platform)
     
 
+async def play_many(
+    interaction: discord.Interaction, bot: commands.Bot, next: bool=False, platform: SongPlatform=None
+) -> None:
+    return await player_actions.play_many(interaction, bot, next, platform)
+
+
 async def skip_song(interaction: discord.Interaction) -> None:
     return await player_actions.skip_song(interaction)
 
@@ -94,6 +102,18 @@ async def restart_player(bot: commands.bot, interaction: discord.Interaction):
     return await player_actions.restart_player(bot, interaction)
 
 
+async def restore_players(bot: commands.Bot) -> None:
+    return await player_actions.restore_players(bot)
+
+
+async def autocomplete_song(interaction: discord.Interaction, current: str) -> List[discord.app_commands.Choice[str]]:
+    return await player_actions.autocomplete_song(interaction, current)
+
+
+async def build_title_indexes(bot: commands.Bot) -> None:
+    return await player_actions.build_title_indexes(bot)
+
+
 async def set_volume(interaction: discord.Interaction, volume: int):
     return await player_actions.set_volume(interaction, volume)
 
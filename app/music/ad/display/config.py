@@ -5,7 +5,7 @@ from typing import List
 import discord
 
 from framework.ui.view import AppIcon
-from framework.core.config import ButtonConfig, GuildConfig
+from framework.core.config import ButtonConfig, GuildConfig, register_guild_config
 from framework.core.exception import InvalidConfigException
 from framework.utils.file import read_json_file
 from framework.core.logger import LoggerWrapper, get_logger
@@ -98,3 +98,4 @@ def load_default_config_data():
 
 
 load_default_config_data()
+register_guild_config(AdDisplayGuildConfig)
@@ -10,7 +10,7 @@ from framework.interaction_handler.decorator import (
     update_notifier, wait_timeout
 )
 from framework.interaction_handler.handler import TPageInteractionHandler
-from framework.ui.notifier import ChannelType, PageNotifier
+from framework.ui.notifier import ChannelType, PageDataSource, PageNotifier, SequenceSource
 from framework.ui.view import ButtonView
 
 from music.ad.display.config import AdDisplayButton, AdDisplayGuildConfig
@@ -74,8 +74,11 @@ class AdLibraryNotifier(PageNotifier):
     def _create_view(self):
         return AdDisplayView(self.ad_display)
 
-    async def _fetch_items(self) -> None:
-        return self.ad_display.get_ads()
+    def _get_view_key(self) -> tuple:
+        return (self.ad_display.config.config,)
+
+    def _create_source(self) -> PageDataSource:
+        return SequenceSource(lambda: self.ad_display.get_ads())
 
     def _add_item_to_page(self, embed: discord.Embed, item: str) -> None:
         embed.add_field(name=item, value="", inline=False)
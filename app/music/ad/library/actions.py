@@ -69,7 +69,7 @@ async def add_ad(interaction: discord.Interaction, file: discord.Attachment, ad_
     await _save_ad_audio(interaction, dir_path, file)
     logger.info("Ad saved successfully", interaction=interaction)
 
-    load_ad_library(interaction.guild_id)
+    await load_ad_library(interaction.guild_id)
     
     await responde(interaction, f"Ad `{file.filename}` saved successfully!")
 
@@ -94,7 +94,7 @@ async def remove_ad(interaction: discord.Interaction, ad_name: str, ad_type: AdT
 
     os.remove(file_path)
 
-    load_ad_library(interaction.guild_id)
+    await load_ad_library(interaction.guild_id)
 
     logger.info(f"Ad `{ad_name}` removed", interaction=interaction)
     await responde(interaction, f"Ad `{ad_name}` removed")
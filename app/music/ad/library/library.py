@@ -1,6 +1,8 @@
+import asyncio
 import os
 import random
-from typing import Dict, List
+import subprocess
+from typing import Dict, List, Optional
 import discord
 
 from framework.core.logger import LoggerWrapper, get_logger
@@ -10,70 +12,113 @@ from music.ad.core import AdType, get_ad_dir_path
 logger: LoggerWrapper = get_logger(__name__)
 
 
+# used to estimate the duration of an ad when ffprobe is not able to read it
+FALLBACK_BITRATE_KBPS = 128
+# a broken file must not keep the ads from loading
+FFPROBE_TIMEOUT_SEC = 10
+
+
+class AdClip:
+
+    def __init__(self, name: str, audio: bytes, duration: float):
+        self.name: str = name
+        self.audio: bytes = audio
+        self.duration: float = duration
+
+
 class AdLibrary:
 
 
     def __init__(self, guild: discord.Guild):
 
-        self.ads: Dict[AdType, List[bytes]] = {
+        self.ads: Dict[AdType, List[AdClip]] = {
             AdType.OPENNING: [],
             AdType.CONTENT: [],
             AdType.CLOSING: []
         }
         self.guild = guild
-        self.load_ads()
 
     def _tag_log(self, log: str) -> str:
         return f"[AD LIBRARY] {log}"
 
-    def load_ads(self) -> None:
+    async def load_ads(self) -> None:
+
+        # reading the clips and probing their duration would block the event loop
+        self.ads = await asyncio.to_thread(self._load_ads)
+
+    def _load_ads(self) -> Dict[AdType, List[AdClip]]:
 
         logger.info(self._tag_log("Loading ads."), guild=self.guild)
 
-        self.ads[AdType.OPENNING] = self._load_songs_from_directory(get_ad_dir_path(AdType.OPENNING, self.guild.id))
-        self.ads[AdType.CONTENT] = self._load_songs_from_directory(get_ad_dir_path(AdType.CONTENT, self.guild.id))
-        self.ads[AdType.CLOSING] = self._load_songs_from_directory(get_ad_dir_path(AdType.CLOSING, self.guild.id))
-        
-        if not self.ads[AdType.OPENNING]:
+        ads: Dict[AdType, List[AdClip]] = {}
+
+        ads[AdType.OPENNING] = self._load_songs_from_directory(get_ad_dir_path(AdType.OPENNING, self.guild.id))
+        ads[AdType.CONTENT] = self._load_songs_from_directory(get_ad_dir_path(AdType.CONTENT, self.guild.id))
+        ads[AdType.CLOSING] = self._load_songs_from_directory(get_ad_dir_path(AdType.CLOSING, self.guild.id))
+
+        if not ads[AdType.OPENNING]:
             logger.warning(self._tag_log("Could not find openning ads, loading default."), guild=self.guild)
-            self.ads[AdType.OPENNING] = self._load_songs_from_directory(get_ad_dir_path(AdType.OPENNING))
+            ads[AdType.OPENNING] = self._load_songs_from_directory(get_ad_dir_path(AdType.OPENNING))
 
-        if not self.ads[AdType.CONTENT]:
+        if not ads[AdType.CONTENT]:
             logger.warning(self._tag_log("Could not find content ads, loading default."), guild=self.guild)
-            self.ads[AdType.CONTENT] = self._load_songs_from_directory(get_ad_dir_path(AdType.CONTENT))
+            ads[AdType.CONTENT] = self._load_songs_from_directory(get_ad_dir_path(AdType.CONTENT))
 
-        if not self.ads[AdType.CLOSING]:
+        if not ads[AdType.CLOSING]:
             logger.warning(self._tag_log("Could not find closing ads, loading default."), guild=self.guild)
-            self.ads[AdType.CLOSING] = self._load_songs_from_directory(get_ad_dir_path(AdType.CLOSING))
+            ads[AdType.CLOSING] = self._load_songs_from_directory(get_ad_dir_path(AdType.CLOSING))
+
+        return ads
+
+    def _get_duration(self, file_path: str, size: int) -> float:
+
+        try:
+            result = subprocess.run(
+                [
+                    'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                    '-of', 'default=noprint_wrappers=1:nokey=1', file_path
+                ],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=FFPROBE_TIMEOUT_SEC
+            )
+            if result.returncode == 0:
+                return float(result.stdout.decode('utf-8').strip())
+        except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+            logger.warning(self._tag_log(f"Could not read duration of ad {file_path}: {e}."), guild=self.guild)
 
-    def _load_songs_from_directory(self, directory: str) -> List[bytes]:
+        return size * 8 / (FALLBACK_BITRATE_KBPS * 1000)
 
-        file_contents = []
+    def _load_songs_from_directory(self, directory: str) -> List[AdClip]:
+
+        clips = []
 
         if os.path.exists(directory) and os.path.isdir(directory):
             for file in os.listdir(directory):
                 file_path = os.path.join(directory, file)
-   
+
                 if os.path.isfile(file_path) and file.lower().endswith('.mp3'):
                     try:
                         with open(file_path, 'rb') as f:
-                            file_contents.append(f.read())
+                            audio = f.read()
+                        clips.append(AdClip(file, audio, self._get_duration(file_path, len(audio))))
                     except IOError as e:
                         logger.warning(self._tag_log(f"Failed to load ad: {e}."))
 
-        return file_contents
+        return clips
 
-    def get_random_openning(self) -> bytes:
+    def get_random_openning(self) -> Optional[AdClip]:
         if not self.ads[AdType.OPENNING]:
             return None
         return random.choice(self.ads[AdType.OPENNING])
 
-    def get_random_content(self) -> bytes:
+    def get_random_content(self) -> Optional[AdClip]:
         if not self.ads[AdType.CONTENT]:
             return None
         return random.choice(self.ads[AdType.CONTENT])
-    
-    def get_random_closing(self) -> bytes:
+
+    def get_random_closing(self) -> Optional[AdClip]:
         if not self.ads[AdType.CLOSING]:
             return None
         return random.choice(self.ads[AdType.CLOSING])
+
+    def get_content(self) -> List[AdClip]:
+        return self.ads[AdType.CONTENT]
@@ -0,0 +1,87 @@
+import random
+from typing import List, Optional
+
+from music.ad.library.library import AdClip, AdLibrary
+
+
+class AdBreakPlan:
+
+    def __init__(self, openning: Optional[AdClip], closing: Optional[AdClip], expected_wait: float, cut_on_ready: bool=True):
+        self.openning: Optional[AdClip] = openning
+        self.closing: Optional[AdClip] = closing
+        self.expected_wait: float = expected_wait
+        self.cut_on_ready: bool = cut_on_ready
+        self.closing_done: bool = False
+
+    def is_closing(self, clip: AdClip) -> bool:
+        return clip is self.closing
+
+    def get_closing_duration(self) -> float:
+        return self.closing.duration if self.closing else 0
+
+
+class AdBreakScheduler:
+
+    def __init__(self, library: AdLibrary):
+        self.library: AdLibrary = library
+
+    def plan(self, expected_wait: float, cut_on_ready: bool) -> Optional[AdBreakPlan]:
+
+        if cut_on_ready and expected_wait <= 0:
+            # the audio is already available, an ad break would only delay the song
+            return None
+
+        openning = self.library.get_random_openning()
+        closing = self.library.get_random_closing()
+
+        if not openning and not closing and not self.library.get_content():
+            return None
+
+        return AdBreakPlan(openning, closing, expected_wait, cut_on_ready)
+
+    def pick_content(self, remaining: float) -> Optional[AdClip]:
+
+        if remaining <= 0:
+            return None
+
+        content: List[AdClip] = self.library.get_content()
+
+        if not content:
+            return None
+
+        fitting = [clip for clip in content if clip.duration <= remaining]
+
+        if fitting:
+            return random.choice(fitting)
+
+        # no clip fits, overshoot only if it is closer to the expected wait than stopping now
+        shortest = min(content, key=lambda clip: clip.duration)
+
+        if shortest.duration - remaining < remaining:
+            return shortest
+
+        return None
+
+    def next_clip(self, plan: AdBreakPlan, remaining: float, song_ready: bool) -> Optional[AdClip]:
+
+        # the clip to play after the openning one, None once the break is over
+        if not plan.closing_done:
+
+            if not song_ready:
+                # keep room for the closing ad at the end of the expected wait
+                content = self.pick_content(remaining - plan.get_closing_duration())
+                if content:
+                    return content
+
+            plan.closing_done = True
+
+            if plan.closing and (not song_ready or not plan.cut_on_ready):
+                return plan.closing
+
+        if song_ready:
+            return None
+
+        # the download outlasted the estimate, the break only ends once the song is ready
+        content: List[AdClip] = self.library.get_content()
+
+        return random.choice(content) if content else None
@@ -4,3 +4,5 @@ from framework.core.env_loader import DATA_PATH
 
 
 MUSIC_CONFIG_PATH = os.path.join(DATA_PATH, "config", "music")
+MUSIC_QUEUE_PATH = os.path.join(DATA_PATH, "music", "queue")
+MUSIC_INDEX_PATH = os.path.join(DATA_PATH, "music", "songs.db")
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from enum import StrEnum
-from typing import List
+from typing import List, Optional, Union
 from uuid import UUID
 
 
@@ -36,6 +36,22 @@ class ExternalId:
         else:
             raise ValueError("Either data or both platform and external_id must be provided")
 
+    def get_link(self) -> Optional[str]:
+
+        if self.platform == SongPlatform.YOUTUBE:
+            return f"https://www.youtube.com/watch?v={self.external_id}"
+        
+        if self.platform == SongPlatform.SPOTIFY:
+            return f"https://open.spotify.com/track/{self.external_id}"
+
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "platform": self.platform.value,
+            "externalId": self.external_id
+        }
+
 
 class SongEngagement:
 
@@ -84,15 +100,53 @@ class Song:
 
         self.engagement: SongEngagement = None
 
+    def to_dict(self) -> dict:
+        return {
+            "id": str(self.id),
+            "title": self.title,
+            "thumbnailUrl": self.thumbnail_url,
+            "audioFileAvailable": self.audio_file_available,
+            "externalId": self.external_id.to_dict()
+        }
+
     def get_link(self) -> str:
+        return self.external_id.get_link()
 
-        if self.external_id.platform == SongPlatform.YOUTUBE:
-            return f"https://www.youtube.com/watch?v={self.external_id.external_id}"
-        
-        if self.external_id.platform == SongPlatform.SPOTIFY:
-            return f"https://open.spotify.com/track/{self.external_id.external_id}"
 
-        return None
+class SongRef:
+
+    # lightweight reference to a song, the full metadata is only parsed when the song is needed
+    def __init__(self, data):
+
+        if "id" not in data:
+            raise KeyError("id not found in the data for SongRef")
+        self.id: UUID = UUID(data["id"])
+
+        if "title" not in data:
+            raise KeyError("title not found in the data for SongRef")
+        self.title: str = data["title"]
+
+        self.data: dict = data
+
+    @staticmethod
+    def from_song(song: Song) -> "SongRef":
+        return SongRef(song.to_dict())
+
+    def hydrate(self) -> Song:
+        return Song(self.data)
+
+    # the payload of a reference can be partial (journal entries, playlist pages), the display reads what is there
+
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return self.data.get("thumbnailUrl")
+
+    def get_link(self) -> Optional[str]:
+
+        try:
+            return ExternalId(self.data["externalId"]).get_link()
+        except (KeyError, TypeError, ValueError):
+            return None
 
 
 class PlaylistSong:
@@ -110,11 +164,44 @@ class PlaylistSong:
 
 class QueueSong:
 
-    def __init__(self, song: Song, requester_id: int, position: int):
-        self.song: Song = song
+    def __init__(self, song: Union[Song, SongRef], requester_id: int, position: int):
+
+        if isinstance(song, SongRef):
+            self.ref: SongRef = song
+            self._song: Song = None
+        else:
+            self.ref: SongRef = SongRef.from_song(song)
+            self._song: Song = song
+
         self.requester_id: int = requester_id
         self.position: int = position
 
+    @property
+    def song(self) -> Optional[Song]:
+        # set once the queue hydrated the song, the display falls back to the reference until then
+        return self._song
+
+    @song.setter
+    def song(self, song: Song) -> None:
+        self._song = song
+
+    def is_hydrated(self) -> bool:
+        return self._song is not None
+
+    @property
+    def title(self) -> str:
+        return self._song.title if self._song else self.ref.title
+
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return self._song.thumbnail_url if self._song else self.ref.thumbnail_url
+
+    def get_link(self) -> Optional[str]:
+        return self._song.get_link() if self._song else self.ref.get_link()
+
+    def get_song_data(self) -> dict:
+        return self._song.to_dict() if self._song else self.ref.data
+
 
 class Playlist:
 
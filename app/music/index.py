@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+from uuid import UUID
+
+from framework.core.logger import get_logger, LoggerWrapper
+from music.core import MUSIC_INDEX_PATH
+from music.entity import ExternalId, Song, SongPlatform
+
+
+logger: LoggerWrapper = get_logger(__name__)
+
+
+T = TypeVar("T")
+
+
+# resolved songs rarely change, title searches are refreshed more often as results can shift
+SONG_TTL_SEC = 7 * 24 * 60 * 60
+TITLE_TTL_SEC = 24 * 60 * 60
+
+
+def normalize_title(title: str) -> str:
+    return re.sub(r"\s+", " ", title).strip().casefold()
+
+
+class SongIndex:
+
+    # every query runs on one worker thread, which owns the connection, so a cold disk never blocks the
+    # event loop and the writes are applied in the order they were made
+    def __init__(self, path: str=MUSIC_INDEX_PATH):
+        self.path: str = path
+        self.connection: Optional[sqlite3.Connection] = None
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="song-index")
+
+    async def _read(self, func: Callable[..., T], *args) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def _write(self, func: Callable[..., None], *args) -> None:
+        # nobody waits for a write, a failed one is logged by the worker
+        self.executor.submit(func, *args)
+
+    def _tag_log(self, log: str) -> str:
+        return f"[SONG INDEX] {log}"
+
+    def _connect(self) -> sqlite3.Connection:
+
+        if self.connection:
+            return self.connection
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS songs (
+                id TEXT PRIMARY KEY,
+                platform TEXT NOT NULL,
+                external_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        connection.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS songs_external_id ON songs (platform, external_id)"
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS titles (
+                query TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                song_id TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (query, platform)
+            )
+            """
+        )
+        connection.commit()
+
+        self.connection = connection
+        return connection
+
+    def _get_song(self, where: str, params: tuple) -> Optional[Song]:
+
+        try:
+            row = self._connect().execute(
+                f"SELECT data FROM songs WHERE {where} AND updated_at >= ?", 
+                params + (time.time() - SONG_TTL_SEC,)
+            ).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(self._tag_log(f"Lookup failed: {e}."))
+            return None
+
+        if not row:
+            return None
+
+        try:
+            return Song(json.loads(row[0]))
+        except (KeyError, ValueError) as e:
+            logger.warning(self._tag_log(f"Invalid song record: {e}."))
+            return None
+
+    def _get_by_id(self, song_id: UUID) -> Optional[Song]:
+        return self._get_song("id = ?", (str(song_id),))
+
+    def _get_by_external_id(self, external_id: ExternalId) -> Optional[Song]:
+        return self._get_song(
+            "platform = ? AND external_id = ?", 
+            (external_id.platform.value, external_id.external_id)
+        )
+
+    def _get_by_title(self, title: str, platform: SongPlatform=None) -> Optional[Song]:
+
+        try:
+            row = self._connect().execute(
+                "SELECT song_id FROM titles WHERE query = ? AND platform = ? AND updated_at >= ?",
+                (normalize_title(title), platform.value if platform else "", time.time() - TITLE_TTL_SEC)
+            ).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(self._tag_log(f"Lookup failed: {e}."))
+            return None
+
+        return self._get_by_id(UUID(row[0])) if row else None
+
+    def _put(self, song: Song) -> None:
+
+        try:
+            connection = self._connect()
+            with connection:
+                # an external id can be re-linked to another song id by the backend
+                connection.execute(
+                    "DELETE FROM songs WHERE platform = ? AND external_id = ? AND id != ?",
+                    (song.external_id.platform.value, song.external_id.external_id, str(song.id))
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO songs (id, platform, external_id, data, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        str(song.id), song.external_id.platform.value, song.external_id.external_id,
+                        json.dumps(song.to_dict()), time.time()
+                    )
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(self._tag_log(f"Could not store song (ID = {song.id}): {e}."))
+
+    def _put_title(self, title: str, platform: SongPlatform, song: Song) -> None:
+
+        self._put(song)
+
+        try:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO titles (query, platform, song_id, updated_at) VALUES (?, ?, ?, ?)",
+                    (normalize_title(title), platform.value if platform else "", str(song.id), time.time())
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(self._tag_log(f"Could not store title query '{title}': {e}."))
+
+    async def get_by_id(self, song_id: UUID) -> Optional[Song]:
+        return await self._read(self._get_by_id, song_id)
+
+    async def get_by_external_id(self, external_id: ExternalId) -> Optional[Song]:
+        return await self._read(self._get_by_external_id, external_id)
+
+    async def get_by_title(self, title: str, platform: SongPlatform=None) -> Optional[Song]:
+        return await self._read(self._get_by_title, title, platform)
+
+    def put(self, song: Song) -> None:
+        self._write(self._put, song)
+
+    def put_title(self, title: str, platform: SongPlatform, song: Song) -> None:
+        self._write(self._put_title, title, platform, song)
+
+
+song_index = SongIndex()
@@ -1,4 +1,5 @@
-from typing import Dict, List, Tuple
+import asyncio
+from typing import Dict, List
 
 import discord
 from discord.ext import commands
@@ -11,11 +12,15 @@ from framework.interaction_handler.decorator import (
 from framework.core.exception import AppException
 from framework.core.logger import get_logger, LoggerWrapper
 from framework.ui.notifier import ChannelType
+from framework.ui.view import SingleTextFieldModal
 
 from framework.utils.file import get_data_from_attachment
-from music.entity import QueueSong, SongPlatform
+from music.entity import SongPlatform
 from music.player.config import MusicPlayerConfig
+from music.player.journal import QueueJournal, QueueState, get_saved_guild_ids
 from music.player.player import MusicPlayer, MusicPlayerGuildConfig
+from music.service import song_searcher
+import music.title_index as title_index
 
 
 logger: LoggerWrapper = get_logger(__name__)
@@ -52,7 +57,7 @@ def player_connected(func):
     return wrapper
 
 
-async def get_or_create_player(bot: commands.Bot, interaction: discord.Interaction, q_state: Tuple[int, List[QueueSong]]=None) -> MusicPlayer:
+async def get_or_create_player(bot: commands.Bot, interaction: discord.Interaction, q_state: QueueState=None) -> MusicPlayer:
 
     channel = interaction.user.voice.channel
 
@@ -81,8 +86,9 @@ async def cleanup_player(interaction: discord.Interaction, player: MusicPlayer):
     if player.voice_client.is_connected():
         await player.voice_client.disconnect()
 
-    if interaction.guild_id in music_players:
-        del music_players[interaction.guild_id]
+    # a restarted player must not remove its replacement
+    if music_players.get(player.guild.id) is player:
+        del music_players[player.guild.id]
 
 
 async def handle_player_lifecycle(interaction: discord.Interaction, player: MusicPlayer):
@@ -111,10 +117,11 @@ async def play_song(
     query: str=None, 
     playlist_title: str=None, 
     next: bool=False, 
-    platform: SongPlatform=None
+    platform: SongPlatform=None,
+    queries: List[str]=None
     ) -> None:
     
-    if not query and not playlist_title:
+    if not query and not playlist_title and not queries:
         return
 
     player = await get_or_create_player(bot, interaction)
@@ -132,10 +139,37 @@ async def play_song(
             next=next,
             platform=platform
         )
+    elif queries:
+        await player.add_queries(
+            interaction=interaction,
+            queries=queries,
+            next=next,
+            platform=platform
+        )
 
     await handle_player_lifecycle(interaction, player)
 
 
+@handle_exceptions()
+@guild_context
+@voice_connected
+async def play_many(interaction: discord.Interaction, bot: commands.Bot, next: bool=False, platform: SongPlatform=None) -> None:
+
+    @handle_exceptions()
+    async def play_queries(interaction: discord.Interaction, value: str) -> None:
+        queries = song_searcher.split_queries(value)
+        await play_song(interaction, bot, next=next, platform=platform, queries=queries)
+
+    await interaction.response.send_modal(
+        SingleTextFieldModal(
+            title="Play songs",
+            label="Links or titles, one per line",
+            action=play_queries,
+            style=discord.TextStyle.paragraph
+        )
+    )
+
+
 @handle_exceptions()
 @guild_context
 @player_connected
@@ -272,6 +306,87 @@ async def restart_player(bot: commands.bot, interaction: discord.Interaction):
     await handle_player_lifecycle(interaction, player)
 
 
+def _is_restore_superseded(guild: discord.Guild) -> bool:
+
+    # a player started by a user while the saved queue was being restored wins, its own journal
+    # replaces the saved files, so they are left to it instead of being discarded here
+    if guild.id not in music_players:
+        return False
+
+    logger.info("A music player was started before the saved queue was restored, skipping restore.", guild=guild)
+    return True
+
+
+@handle_exceptions(silent=True)
+async def _restore_player(bot: commands.Bot, guild: discord.Guild) -> None:
+
+    journal = QueueJournal(guild.id)
+    q_state = await asyncio.to_thread(journal.restore)
+
+    if _is_restore_superseded(guild):
+        return
+
+    if not q_state or not len(q_state.songs):
+        journal.discard()
+        return
+
+    channel = guild.get_channel(q_state.channel_id) if q_state.channel_id else None
+
+    if not isinstance(channel, discord.VoiceChannel) or not [m for m in channel.members if not m.bot]:
+        logger.info("Saved music queue has no listeners left, discarding it.", guild=guild)
+        journal.discard()
+        return
+
+    # a voice client without a player belongs to a player being created right now
+    if guild.voice_client:
+        logger.info("Bot already connected to a voice channel, skipping restore.", guild=guild)
+        return
+
+    voice_client = await channel.connect()
+
+    if _is_restore_superseded(guild):
+        return
+
+    player = MusicPlayer(bot, voice_client, q_state)
+    music_players[guild.id] = player
+
+    logger.info(f"Restored music queue with {len(q_state.songs)} song(s).", guild=guild)
+
+    await player.q.prewarm()
+
+    try:
+        # nobody asked for the restored player, its notices go to the player channel only
+        await player.play(interaction=None)
+    finally:
+        await cleanup_player(None, player)
+
+
+async def restore_players(bot: commands.Bot) -> None:
+
+    for guild_id in get_saved_guild_ids():
+
+        guild = bot.get_guild(guild_id)
+
+        if not guild or guild.id in music_players:
+            continue
+
+        asyncio.create_task(_restore_player(bot, guild))
+
+
+async def autocomplete_song(interaction: discord.Interaction, current: str) -> List[discord.app_commands.Choice[str]]:
+
+    # runs on every keystroke, so it only reads the in memory title index
+    if not interaction.guild_id:
+        return []
+
+    return [discord.app_commands.Choice(name=name, value=link) for name, link in title_index.suggest(interaction.guild_id, current)]
+
+
+async def build_title_indexes(bot: commands.Bot) -> None:
+
+    asyncio.create_task(title_index.build_title_indexes([guild.id for guild in bot.guilds]))
+
+
 @handle_exceptions()
 @guild_context
 @defer()
@@ -282,10 +397,10 @@ async def set_volume(interaction: discord.Interaction, volume: int):
     try:
 
         config = MusicPlayerGuildConfig(guild.id)
-        config.set_volume(volume)
+        await config.set_volume(volume)
 
         if guild.id in music_players:
-            await music_players[guild.id].reload_config()
+            await music_players[guild.id].reload_config(config)
 
         await responde(interaction, f"Volume set to {volume}.")
         logger.info(f"Volume set to {volume}", interaction=interaction)
@@ -304,7 +419,7 @@ async def set_ads_activity(interaction: discord.Interaction, value: bool):
     try:
 
         config = MusicPlayerGuildConfig(interaction.guild)
-        config.set_ads_activity(value)
+        await config.set_ads_activity(value)
 
         if guild.id in music_players:
             await music_players[guild.id].reload_config(config)
@@ -316,10 +431,10 @@ async def set_ads_activity(interaction: discord.Interaction, value: bool):
         raise e
 
 
-def load_ad_library(guild_id: int):
+async def load_ad_library(guild_id: int):
 
     if guild_id in music_players:
-        music_players[guild_id].load_ad_library()
+        await music_players[guild_id].load_ad_library()
 
 
 @handle_exceptions()
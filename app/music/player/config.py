@@ -4,7 +4,7 @@ import os
 from typing import List
 import discord
 
-from framework.core.config import ButtonConfig, GuildConfig
+from framework.core.config import ButtonConfig, GuildConfig, register_guild_config
 from framework.ui.view import AppIcon
 from framework.core.exception import InvalidConfigException
 from framework.utils.file import read_json_file
@@ -41,6 +41,7 @@ class MusicPlayerButton(AppIcon):
 default_player_config_data = {
     "volume": 100,
     "ads": False,
+    "adsCutOnReady": True,
     "color": [0, 0, 0], 
     "buttons": {
         MusicPlayerButton.PLAY_PREV: "<:prev:1303350526485991424>",
@@ -74,6 +75,7 @@ class MusicPlayerConfig(ButtonConfig):
     def __init__(self, data):
         self.volume: int = None
         self.ads: bool = None
+        self.ads_cut_on_ready: bool = None
         self.color: List[int] = None
         super().__init__(data, MusicPlayerButton)
     
@@ -113,6 +115,16 @@ class MusicPlayerConfig(ButtonConfig):
 
         self.ads = bool(ads)
 
+        ads_cut_on_ready = data.get("adsCutOnReady", True)
+
+        if not isinstance(ads_cut_on_ready, bool):
+            raise InvalidConfigException(
+                "Invalid 'adsCutOnReady' value in MusicPlayerConfig. It must be a boolean (true/false).",
+                "Invalid configuration: 'adsCutOnReady' must be either True or False."
+            )
+
+        self.ads_cut_on_ready = ads_cut_on_ready
+
         if "color" not in data:
             raise InvalidConfigException(
                 "`color` not found in the data for MusicPlayerConfig.",
@@ -125,6 +137,7 @@ class MusicPlayerConfig(ButtonConfig):
         data["volume"] = self.volume
         data["color"] = self.color
         data["ads"] = self.ads
+        data["adsCutOnReady"] = self.ads_cut_on_ready
         return data
 
 
@@ -144,23 +157,24 @@ class MusicPlayerGuildConfig(GuildConfig):
     def get_volume(self) -> int:
         return self.config.volume
     
-    def set_volume(self, value: int) -> None:
+    async def set_volume(self, value: int) -> None:
 
         if value > 100 or value < 0:
             raise InvalidConfigException(
                 f"Invalid volume value: {value}. Must be between 0 and 100.",
                 "Volume must be a number between 0 and 100."
             )
-        self.config.volume = value
-        self.save_config()
+        await self.update_config(volume=value)
 
-    def set_ads_activity(self, status: bool) -> None:
-        self.config.ads = status
-        self.save_config()
+    async def set_ads_activity(self, status: bool) -> None:
+        await self.update_config(ads=status)
 
     def get_ads(self) -> bool:
         return self.config.ads
 
+    def get_ads_cut_on_ready(self) -> bool:
+        return self.config.ads_cut_on_ready
+
     def get_color(self) -> discord.Color:
         return discord.Color.from_rgb(*self.config.color)
 
@@ -185,4 +199,5 @@ def load_default_config_data():
         logger.info("No default data for music player config found.")
 
 
-load_default_config_data()
\ No newline at end of file
+load_default_config_data()
+register_guild_config(lambda guild: MusicPlayerGuildConfig(guild.id))
@@ -0,0 +1,111 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+from framework.core.logger import get_logger, LoggerWrapper
+from music.entity import SongEngagement, SongReactionType
+from music.service import music_service
+
+
+logger: LoggerWrapper = get_logger(__name__)
+
+
+# engagement of other guilds and bots only reaches the player through this periodic refresh
+ENGAGEMENT_REFRESH_SEC = 60
+
+
+class EngagementCache:
+
+    # snapshot of the current song engagement, renders read it without waiting for the backend
+    def __init__(self, guild_id: int, on_update: Callable[[], Awaitable[None]]):
+
+        self.guild_id: int = guild_id
+        self.on_update: Callable[[], Awaitable[None]] = on_update
+
+        self.song_id: Optional[UUID] = None
+        self.engagement: Optional[SongEngagement] = None
+
+        self.fetch_task: Optional[asyncio.Task] = None
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.closed: bool = False
+
+    def _tag_log(self, log: str) -> str:
+        return f"[ENGAGEMENT {self.guild_id}] {log}"
+
+    def get(self, song_id: UUID) -> Optional[SongEngagement]:
+
+        if song_id != self.song_id:
+            self.set_song(song_id)
+
+        return self.engagement
+
+    def set_song(self, song_id: UUID) -> None:
+
+        if song_id == self.song_id or self.closed:
+            return
+
+        self.song_id = song_id
+        self.engagement = None
+        self._fetch()
+
+        if not self.refresh_task:
+            self.refresh_task = asyncio.create_task(self._refresh_loop())
+
+    def _fetch(self) -> None:
+
+        if self.fetch_task and not self.fetch_task.done():
+            self.fetch_task.cancel()
+
+        self.fetch_task = asyncio.create_task(self._load(self.song_id))
+
+    async def _load(self, song_id: UUID) -> None:
+
+        try:
+            engagement = await music_service.get_song_engagement(song_id, self.guild_id)
+        except Exception as e:
+            logger.warning(self._tag_log(f"Could not refresh engagement of song (ID = {song_id}): {e}."))
+            return
+
+        # the song may have changed while the request was in flight
+        if song_id != self.song_id:
+            return
+
+        self.engagement = engagement
+        await self.on_update()
+
+    async def _refresh_loop(self) -> None:
+
+        while True:
+            await asyncio.sleep(ENGAGEMENT_REFRESH_SEC)
+            if self.song_id:
+                await self._load(self.song_id)
+
+    def record_stream(self, song_id: UUID, listeners: int) -> None:
+
+        if song_id != self.song_id or not self.engagement:
+            return
+
+        self.engagement.streams += 1
+        self.engagement.listeners += listeners
+
+    def record_reaction(self, song_id: UUID, reaction_type: SongReactionType) -> None:
+
+        # a user changing an earlier reaction is only corrected by the next refresh
+        if song_id != self.song_id or not self.engagement:
+            return
+
+        if reaction_type == SongReactionType.LIKE:
+            self.engagement.likes += 1
+        else:
+            self.engagement.dislikes += 1
+
+    def close(self) -> None:
+
+        self.closed = True
+
+        for task in [self.fetch_task, self.refresh_task]:
+            if task and not task.done():
+                task.cancel()
+
+        self.fetch_task = None
+        self.refresh_task = None
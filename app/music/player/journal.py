@@ -0,0 +1,298 @@
+import asyncio
+import json
+import os
+from typing import Any, List, Optional, TextIO, Tuple
+from uuid import UUID
+
+from framework.core.logger import get_logger, LoggerWrapper
+from music.core import MUSIC_QUEUE_PATH
+from music.entity import QueueSong, SongRef
+from music.player.queue import QueueSongList
+
+
+logger: LoggerWrapper = get_logger(__name__)
+
+
+# number of journal records after which the queue is compacted into a new snapshot
+SNAPSHOT_INTERVAL = 500
+
+
+class QueueState:
+
+    def __init__(
+        self,
+        songs: QueueSongList=None,
+        crt_idx: int=0,
+        next_idx: int=None,
+        loop_song: bool=False,
+        loop_queue: bool=False,
+        channel_id: int=None
+    ):
+        self.songs: QueueSongList = songs if songs is not None else QueueSongList()
+        self.crt_idx: int = crt_idx
+        self.next_idx: int = next_idx if next_idx is not None else crt_idx
+        self.loop_song: bool = loop_song
+        self.loop_queue: bool = loop_queue
+        self.channel_id: int = channel_id
+
+    def to_dict(self) -> dict:
+        return {
+            "crtIdx": self.crt_idx,
+            "nextIdx": self.next_idx,
+            "loopSong": self.loop_song,
+            "loopQueue": self.loop_queue,
+            "channelId": self.channel_id,
+            "songs": [
+                {"song": q_song.get_song_data(), "requesterId": q_song.requester_id} for q_song in self.songs
+            ]
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "QueueState":
+
+        songs = [QueueSong(SongRef(entry["song"]), entry["requesterId"], None) for entry in data["songs"]]
+
+        return QueueState(
+            QueueSongList(songs),
+            data["crtIdx"],
+            data["nextIdx"],
+            data["loopSong"],
+            data["loopQueue"],
+            data["channelId"]
+        )
+
+    def remove_song(self, song_id: UUID) -> None:
+
+        for idx in reversed(self.songs.remove_song(song_id)):
+            if idx <= self.crt_idx:
+                self.crt_idx -= 1
+            if idx <= self.next_idx:
+                self.next_idx -= 1
+
+    def apply(self, record: dict) -> None:
+
+        op = record["op"]
+
+        if op == "add":
+            songs = [QueueSong(SongRef(data), record["requesterId"], None) for data in record["songs"]]
+            self.songs.insert(record["idx"], songs)
+        elif op == "remove":
+            self.remove_song(UUID(record["songId"]))
+        elif op == "shuffle":
+            self.songs.shuffle(record["pivot"], record["seed"])
+        elif op == "move":
+            self.crt_idx = record["crtIdx"]
+            self.next_idx = record["nextIdx"]
+        elif op == "flags":
+            self.loop_song = record["loopSong"]
+            self.loop_queue = record["loopQueue"]
+        elif op == "channel":
+            self.channel_id = record["channelId"]
+        else:
+            raise KeyError(f"unknown queue journal operation {op}")
+
+
+class QueueJournal:
+
+    def __init__(self, guild_id: int):
+
+        self.guild_id: int = guild_id
+        self.dir_path: str = os.path.join(MUSIC_QUEUE_PATH, str(guild_id))
+        self.snapshot_path: str = os.path.join(self.dir_path, "snapshot.json")
+        self.journal_path: str = os.path.join(self.dir_path, "journal.jsonl")
+
+        self.file: Optional[TextIO] = None
+        self.records: int = 0
+        # records are only appended on top of a snapshot written by this journal,
+        # until then the files of a queue that was not restored yet are left untouched
+        self.started: bool = False
+
+        # file operations applied in order by a worker thread, so the event loop never waits on the disk
+        self.pending: List[Tuple[str, Any]] = []
+        self.writer: Optional[asyncio.Task] = None
+
+    def _tag_log(self, log: str) -> str:
+        return f"[QUEUE JOURNAL {self.guild_id}] {log}"
+
+    def _submit(self, op: str, payload: Any=None) -> None:
+
+        self.pending.append((op, payload))
+
+        if not self.writer or self.writer.done():
+            self.writer = asyncio.create_task(self._write_pending())
+
+    async def _write_pending(self) -> None:
+
+        while self.pending:
+            ops, self.pending = self.pending, []
+            await asyncio.to_thread(self._apply, ops)
+
+    def _apply(self, ops: List[Tuple[str, Any]]) -> None:
+
+        # consecutive records are written with a single flush
+        lines: List[str] = []
+
+        for op, payload in ops:
+
+            if op == "append":
+                lines.append(payload)
+                continue
+
+            self._write_lines(lines)
+            lines = []
+
+            if op == "snapshot":
+                self._write_snapshot(payload)
+            elif op == "discard":
+                self._remove_files()
+            elif op == "close":
+                self._close_file()
+
+        self._write_lines(lines)
+
+    def _write_lines(self, lines: List[str]) -> None:
+
+        if not lines:
+            return
+
+        try:
+
+            if not self.file:
+                os.makedirs(self.dir_path, exist_ok=True)
+                self.file = open(self.journal_path, "a", encoding="utf-8")
+
+            self.file.write("".join(lines))
+            self.file.flush()
+
+        except OSError as e:
+            logger.warning(self._tag_log(f"Could not append to the queue journal: {e}."))
+
+    def _write_snapshot(self, data: dict) -> None:
+
+        tmp_path = f"{self.snapshot_path}.tmp"
+
+        try:
+
+            os.makedirs(self.dir_path, exist_ok=True)
+
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(tmp_path, self.snapshot_path)
+
+            # the journal is only truncated once the snapshot covering it is on disk
+            self._close_file()
+            open(self.journal_path, "w", encoding="utf-8").close()
+
+        except OSError as e:
+            logger.warning(self._tag_log(f"Could not save queue snapshot: {e}."))
+
+    def _remove_files(self) -> None:
+
+        self._close_file()
+
+        for path in [self.snapshot_path, self.journal_path]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(self._tag_log(f"Could not remove {path}: {e}."))
+
+    def _close_file(self) -> None:
+
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def _append(self, record: dict) -> None:
+
+        if not self.started:
+            return
+
+        self._submit("append", json.dumps(record, separators=(",", ":")) + "\n")
+        self.records += 1
+
+    def record_add(self, idx: int, requester_id: int, q_songs: List[QueueSong]) -> None:
+        self._append({
+            "op": "add",
+            "idx": idx,
+            "requesterId": requester_id,
+            "songs": [q_song.get_song_data() for q_song in q_songs]
+        })
+
+    def record_remove(self, song_id: UUID) -> None:
+        self._append({"op": "remove", "songId": str(song_id)})
+
+    def record_shuffle(self, pivot: int, seed: int) -> None:
+        self._append({"op": "shuffle", "pivot": pivot, "seed": seed})
+
+    def record_move(self, crt_idx: int, next_idx: int) -> None:
+        self._append({"op": "move", "crtIdx": crt_idx, "nextIdx": next_idx})
+
+    def record_flags(self, loop_song: bool, loop_queue: bool) -> None:
+        self._append({"op": "flags", "loopSong": loop_song, "loopQueue": loop_queue})
+
+    def record_channel(self, channel_id: int) -> None:
+        self._append({"op": "channel", "channelId": channel_id})
+
+    def needs_snapshot(self) -> bool:
+        return self.records >= SNAPSHOT_INTERVAL
+
+    def snapshot(self, state: QueueState) -> None:
+
+        # the state is captured now, later mutations of the queue are covered by the next records
+        self._submit("snapshot", state.to_dict())
+        self.started = True
+        self.records = 0
+
+    def restore(self) -> Optional[QueueState]:
+
+        if not os.path.exists(self.snapshot_path):
+            return None
+
+        try:
+
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                state = QueueState.from_dict(json.load(f))
+
+            if not os.path.exists(self.journal_path):
+                return state
+
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # a crash in the middle of a write leaves a torn last record
+                        logger.warning(self._tag_log("Ignoring incomplete queue journal record."))
+                        break
+                    state.apply(record)
+
+            return state
+
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(self._tag_log(f"Could not restore queue: {e}."))
+            return None
+
+    async def close(self) -> None:
+
+        self._submit("close")
+
+        if self.writer:
+            await self.writer
+
+    def discard(self) -> None:
+        self.started = False
+        self.records = 0
+        self._submit("discard")
+
+
+def get_saved_guild_ids() -> List[int]:
+
+    if not os.path.isdir(MUSIC_QUEUE_PATH):
+        return []
+
+    return [int(name) for name in os.listdir(MUSIC_QUEUE_PATH) if name.isdigit()]
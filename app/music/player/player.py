@@ -4,7 +4,8 @@ import asyncio
 from collections import OrderedDict
 from datetime import datetime
 import random
-from typing import Callable, Dict, List, Tuple
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple, Union
 from uuid import UUID
 import tempfile
 
@@ -13,21 +14,38 @@ from discord.ext import commands
 
 from framework.interaction_handler.decorator import defer, handle_exceptions, update_notifier
 from framework.interaction_handler.handler import PageInteractionHandler
-from framework.ui.notifier import PageNotifier
+from framework.ui.notifier import PageDataSource, PageNotifier
 from framework.ui.view import ButtonView
 from framework.core.logger import get_logger, LoggerWrapper
 
-from music.ad.library.library import AdLibrary
+from music.ad.library.library import AdClip, AdLibrary
+from music.ad.scheduler import AdBreakPlan, AdBreakScheduler
 from music.player.config import MusicPlayerButton, MusicPlayerGuildConfig
-from music.entity import DownloadStatus, QueueSong, Song, SongPlatform, SongReactionType
-from music.service import music_service, song_searcher
+from music.player.engagement import EngagementCache
+from music.player.journal import QueueJournal, QueueState
+from music.player.queue import QueueSongList
+from music.entity import DownloadStatus, QueueSong, Song, SongPlatform, SongReactionType, SongRef
+from music.service import get_failed_queries_message, music_service, song_searcher
+import music.title_index as title_index
 
 
 logger: LoggerWrapper = get_logger(__name__)
 
 
+# initial guess of the time needed to download a song, refined with every finished download
+DEFAULT_DOWNLOAD_SEC = 10.0
+DOWNLOAD_ESTIMATE_WEIGHT = 0.3
+AD_POLL_SEC = 0.2
+# number of songs, starting with the current one, downloaded ahead when a queue is restored
+PREWARM_SONGS = 3
+# number of songs, starting with the current one, whose metadata is parsed ahead of playback
+HYDRATE_PAGE_SIZE = 10
+
+
 class SongAudioCache:
 
+    LOG_TAG = "AUDIO CACHE"
+
     def __init__(self, guild: discord.Guild, max_size: int=100):
 
         self.max_size: int = max_size
@@ -41,20 +59,43 @@ class SongAudioCache:
         self.download_semaphore: asyncio.Semaphore = asyncio.Semaphore(0)
         self.download_events: Dict[UUID, asyncio.Event] = {}
 
+        self.avg_download_sec: float = DEFAULT_DOWNLOAD_SEC
+        self.crt_download: Optional[Tuple[UUID, float]] = None
+
         self.stopping: bool = False
         self.guild: discord.Guild = guild
 
         asyncio.create_task(self._download())
     
-    def _tag_log(self, log: str) -> str:
-
-        return f"[AUDIO CACHE] {log}"
-
     async def stop(self):
         self.stopping = True
         async with self.download_q_lock:
             self.download_q.clear()
-        logger.info(self._tag_log("Audio cache stopped, download queue cleared."), guild=self.guild)
+        logger.info("Audio cache stopped, download queue cleared.", tag=self.LOG_TAG, guild=self.guild)
+
+    def _record_download_time(self, duration: float) -> None:
+        self.avg_download_sec += DOWNLOAD_ESTIMATE_WEIGHT * (duration - self.avg_download_sec)
+
+    def estimate_remaining(self, song_id: UUID) -> float:
+
+        if song_id in self.cache:
+            return 0.0
+
+        if self.crt_download:
+
+            download_song_id, started_at = self.crt_download
+            # an overdue download is assumed to need a fraction of the average time more
+            crt_remaining = max(
+                self.avg_download_sec - (time.monotonic() - started_at),
+                self.avg_download_sec * DOWNLOAD_ESTIMATE_WEIGHT
+            )
+
+            if download_song_id == song_id:
+                return crt_remaining
+
+            return crt_remaining + self.avg_download_sec
+
+        return self.avg_download_sec
 
     async def _remove_oldest(self):
 
@@ -68,7 +109,7 @@ class SongAudioCache:
 
             download = await music_service.download_audio_by_id(song_id=song_id)
 
-            logger.info(self._tag_log(f"Created download (ID = {download.id}) song (ID = {song_id})."), guild=self.guild)
+            logger.info("Created download.", tag=self.LOG_TAG, guild=self.guild, download_id=download.id, song_id=song_id)
 
             while download.status == DownloadStatus.DOWNLOADING:
 
@@ -79,15 +120,15 @@ class SongAudioCache:
                 await asyncio.sleep(1)
             
             if download.status == DownloadStatus.DONE:
-                logger.info(self._tag_log(f"Download (ID = {download.id}) succedded."), guild=self.guild)
+                logger.info("Download succeeded.", tag=self.LOG_TAG, guild=self.guild, download_id=download.id)
                 return True
             
             if download.status == DownloadStatus.FAILED:
-                logger.info(self._tag_log(f"Download (ID = {download.id}) failed."), guild=self.guild)
+                logger.info("Download failed.", tag=self.LOG_TAG, guild=self.guild, download_id=download.id)
                 return False
             
         except Exception as e:
-            logger.info(self._tag_log(f"Failed to download song (ID = {song_id}): {e}."))
+            logger.info("Failed to download song: %s.", e, tag=self.LOG_TAG, guild=self.guild, song_id=song_id)
             return False
 
     async def _download(self):
@@ -104,42 +145,46 @@ class SongAudioCache:
             if song_id in self.cache:
                 continue
 
+            self.crt_download = (song_id, time.monotonic())
+
             status = await self._download_song(song_id)
 
             if self.size > self.max_size:
                 await self._remove_oldest()
-                logger.warning(self._tag_log("Audio cache full, removed oldest song audio."), guild=self.guild)
+                logger.warning("Audio cache full, removed oldest song audio.", tag=self.LOG_TAG, guild=self.guild)
 
             async with self.cache_lock:
                 if status:
                     self.cache[song_id] = await music_service.get_audio_by_id(song_id)
-                    logger.info(self._tag_log(f"Added song (ID = {song_id}) audio to cache."), guild=self.guild)
+                    self._record_download_time(time.monotonic() - self.crt_download[1])
+                    logger.info("Added song audio to cache.", tag=self.LOG_TAG, guild=self.guild, song_id=song_id)
                 else:
                     self.cache[song_id] = None
                     
                 self.size += 1
+                self.crt_download = None
 
             if song_id in self.download_events:
-                logger.info(self._tag_log(f"Notiftying awaiting task that the download is completed."), guild=self.guild)
+                logger.debug("Notifying awaiting task that the download is completed.", tag=self.LOG_TAG, guild=self.guild, song_id=song_id)
                 self.download_events[song_id].set()
                 self.download_events.pop(song_id)
     
-    async def add_song(self, song: Song):
+    async def add_song(self, song: Union[Song, SongRef]):
         
         if song.id in self.cache or song.id in self.download_q:
             return
 
         async with self.download_q_lock:
             self.download_q.append(song.id)
-            logger.info(self._tag_log(f"Added song (ID = {song.id}) to the download queue."), guild=self.guild)
+            logger.info("Added song to the download queue.", tag=self.LOG_TAG, guild=self.guild, sample="audio cache enqueue", song_id=song.id)
 
         self.download_semaphore.release()
         self.download_events[song.id] = asyncio.Event()
     
-    async def get_audio(self, song: Song) -> bytes:
+    async def get_audio(self, song: Union[Song, SongRef]) -> bytes:
  
         if song.id in self.cache:
-            logger.info(self._tag_log(f"Song (ID = {song.id}) found in cache."), guild=self.guild)
+            logger.info("Song found in cache.", tag=self.LOG_TAG, guild=self.guild, sample="audio cache hit", song_id=song.id)
             return self.cache[song.id]
         
         async with self.download_q_lock:
@@ -148,16 +193,16 @@ class SongAudioCache:
                 self.download_q.remove(song.id)
             
             self.download_q.insert(0, song.id)
-            logger.info(self._tag_log(f"Moved song (ID = {song.id}) at the front of the download queue."), guild=self.guild)
+            logger.info("Moved song at the front of the download queue.", tag=self.LOG_TAG, guild=self.guild, song_id=song.id)
 
         self.download_semaphore.release()
             
         self.download_events[song.id] = asyncio.Event()
         
-        logger.info(self._tag_log(f"Waiting for download of song (ID = {song.id})."), guild=self.guild)
+        logger.debug("Waiting for download of song.", tag=self.LOG_TAG, guild=self.guild, song_id=song.id)
         await self.download_events[song.id].wait()
 
-        logger.info(self._tag_log(f"Retrieved audio of song (ID = {song.id})."))
+        logger.debug("Retrieved audio of song.", tag=self.LOG_TAG, guild=self.guild, song_id=song.id)
         return self.cache[song.id]
 
 
@@ -176,54 +221,134 @@ class SongQueueFlags:
 
 class SongQueue:
 
-    def __init__(self, guild: discord.Guild, state: Tuple[int, List[QueueSong]]=None): 
+    LOG_TAG = "QUEUE"
+
+    def __init__(self, guild: discord.Guild, state: QueueState=None): 
 
         self.guild: discord.Guild = guild
 
-        self.songs: List[QueueSong] = []
+        self.songs: QueueSongList = QueueSongList()
         self.crt_idx: int = 0
+        self.flags: SongQueueFlags = SongQueueFlags()
+        self.channel_id: int = None
 
         if state:
-            self.songs = state[1]
-            self.crt_idx = state[0]
+            self.songs = state.songs
+            self.crt_idx = state.crt_idx
             if self.crt_idx > len(self.songs):
                 self.crt_idx = 0
+            self.flags.loop_song = state.loop_song
+            self.flags.loop_queue = state.loop_queue
+            self.channel_id = state.channel_id
             
-        self.next_idx:int = self.crt_idx
+        # a pending play_prev leaves the next index behind the current one, down to -1
+        self.next_idx:int = max(-1, min(state.next_idx, len(self.songs))) if state else self.crt_idx
         self.audio_cache = SongAudioCache(self.guild)
-        self.flags: SongQueueFlags = SongQueueFlags()
 
-    def _tag_log(self, log: str) -> str:
-        return f"[QUEUE] {log}"
+        # an empty queue is only saved with its first songs, so it does not replace a queue waiting to be restored
+        self.journal: QueueJournal = QueueJournal(self.guild.id)
+        if self.songs:
+            self.journal.snapshot(self.get_state())
 
     async def stop(self):
+        await self.journal.close()
         await self.audio_cache.stop()
 
-    async def add_songs(self, songs: List[Song], requester_id: int, next:bool = False) -> None:
+    def get_state(self) -> QueueState:
+        return QueueState(
+            self.songs, self.crt_idx, self.next_idx, 
+            self.flags.loop_song, self.flags.loop_queue, self.channel_id
+        )
+
+    def _compact_journal(self) -> None:
+        if self.journal.needs_snapshot():
+            self.journal.snapshot(self.get_state())
+
+    def discard_journal(self) -> None:
+        self.journal.discard()
+
+    def set_channel(self, channel_id: int) -> None:
+
+        if channel_id == self.channel_id:
+            return
+
+        self.channel_id = channel_id
+        self.journal.record_channel(channel_id)
+
+    async def prewarm(self, count: int=PREWARM_SONGS) -> None:
+
+        # queues the audio of the current and upcoming songs before playback asks for it
+        for q_song in self.songs[max(self.crt_idx, 0):max(self.crt_idx, 0) + count]:
+            await self.audio_cache.add_song(q_song.ref)
+
+        logger.debug("Pre-warmed audio cache.", tag=self.LOG_TAG, guild=self.guild, index=self.crt_idx)
+
+    async def add_songs(
+        self, songs: List[Union[Song, SongRef]], requester_id: int, next:bool = False, after: QueueSong=None
+    ) -> List[QueueSong]:
         
         q_songs = [QueueSong(song, requester_id, None) for song in songs]
 
+        if not q_songs:
+            return q_songs
+
         for song in songs:
             await self.audio_cache.add_song(song)
 
-        if next:
-            self.songs[self.next_idx+1:self.next_idx+1] = q_songs
+        after_idx = self.songs.index_of(after) if after else None
+
+        if after_idx is not None:
+            idx = after_idx + 1
+        elif next:
+            idx = max(0, min(self.next_idx + 1, len(self.songs)))
         else:
-            self.songs.extend(q_songs)
-        
-        logger.info(self._tag_log(f"Added {len(q_songs)} song(s) to the queue."), guild=self.guild)
+            idx = len(self.songs)
 
-        self._update_positions()
+        self.songs.insert(idx, q_songs)
 
-    def _update_positions(self):
+        if self.journal.started:
+            self.journal.record_add(idx, requester_id, q_songs)
+            self._compact_journal()
+        else:
+            self.journal.snapshot(self.get_state())
         
-        for idx, song in enumerate(self.songs):
-            song.position = idx + 1
+        logger.info("Added %d song(s) to the queue.", len(q_songs), tag=self.LOG_TAG, guild=self.guild)
+
+        return q_songs
+
+    async def hydrate(self, start: int, end: int) -> None:
+
+        for q_song in self.songs[max(start, 0):max(end, 0)]:
+
+            if q_song.is_hydrated():
+                continue
+
+            try:
+                q_song.song = q_song.ref.hydrate()
+                continue
+            except (KeyError, ValueError):
+                # the reference does not carry the full metadata of the song
+                pass
+
+            try:
+                q_song.song = await music_service.get_song_by_id(q_song.ref.id)
+            except Exception as e:
+                # the song is displayed from its reference and hydrated again on the next render
+                logger.debug("Could not hydrate song: %s.", e, tag=self.LOG_TAG, guild=self.guild, song_id=q_song.ref.id)
+
+    def estimate_current_song_wait(self) -> float:
+
+        crt_q_song = self.get_current_song()
+
+        if not crt_q_song:
+            return 0.0
+
+        return self.audio_cache.estimate_remaining(crt_q_song.ref.id)
 
     async def get_current_song_audio(self) -> bytes:
 
         crt_q_song = self.songs[self.crt_idx]
-        return await self.audio_cache.get_audio(crt_q_song.song)
+        return await self.audio_cache.get_audio(crt_q_song.ref)
 
     def get_current_song(self) -> QueueSong:
 
@@ -246,8 +371,9 @@ class SongQueue:
                 self.next_idx = len(self.songs) - 1
                 
             self.crt_idx = self.next_idx
+            self._record_move()
             
-            logger.info(self._tag_log(f"Moved queue index to {self.crt_idx}."), guild=self.guild)
+            logger.info("Moved queue index.", tag=self.LOG_TAG, guild=self.guild, index=self.crt_idx)
             return 
 
         if self.next_idx == self.crt_idx:
@@ -259,38 +385,40 @@ class SongQueue:
                 self.next_idx = 0
 
         self.crt_idx = self.next_idx
+        self._record_move()
 
-        logger.info(self._tag_log(f"Moved queue index to {self.crt_idx}."), guild=self.guild)
+        logger.info("Moved queue index.", tag=self.LOG_TAG, guild=self.guild, index=self.crt_idx)
     
     def move_prev(self) -> None:
 
         if not self.flags.loop_song:
             self.next_idx -= 1
-            logger.info(self._tag_log(f"Moved next queue index to {self.next_idx}."), guild=self.guild)
+            self._record_move()
+            logger.debug("Moved next queue index.", tag=self.LOG_TAG, guild=self.guild, index=self.next_idx)
     
-    def shuffle(self) -> None:
-
-        before = self.songs[:self.crt_idx]
-        after = self.songs[self.crt_idx + 1:]
+    def _record_move(self) -> None:
+        self.journal.record_move(self.crt_idx, self.next_idx)
+        self._compact_journal()
 
-        random.shuffle(before)
-        random.shuffle(after)
+    def toggle_loop_song(self) -> None:
+        self.flags.toggle_loop_song()
+        self.journal.record_flags(self.flags.loop_song, self.flags.loop_queue)
 
-        self.songs = before + [self.songs[self.crt_idx]] + after
-        self._update_positions()
+    def toggle_loop_queue(self) -> None:
+        self.flags.toggle_loop_queue()
+        self.journal.record_flags(self.flags.loop_song, self.flags.loop_queue)
 
-    
-    def remove_song(self, q_song: QueueSong) -> None:
+    def shuffle(self) -> None:
 
-        if not self.songs:
-            return
+        seed = random.getrandbits(64)
+        self.songs.shuffle(self.crt_idx, seed)
 
-        removed_idx = []
+        self.journal.record_shuffle(self.crt_idx, seed)
+        self._compact_journal()
 
-        for idx, song in enumerate(self.songs):
+    def remove_song(self, q_song: QueueSong) -> None:
 
-            if song.song.id == q_song.song.id:
-                removed_idx.append(idx)
+        removed_idx = self.songs.remove_song(q_song.ref.id)
         
         if not removed_idx:
             return
@@ -300,11 +428,11 @@ class SongQueue:
                 self.crt_idx -= 1
             if idx <= self.next_idx:
                 self.next_idx -= 1
-            self.songs.pop(idx)
 
-        self._update_positions()
+        self.journal.record_remove(q_song.ref.id)
+        self._compact_journal()
 
-        logger.info(self._tag_log(f"Removed song (ID={q_song.song.id}) from queue."), guild=self.guild)
+        logger.info("Removed song from queue.", tag=self.LOG_TAG, guild=self.guild, song_id=q_song.ref.id)
     
     def __len__(self):
         return len(self.songs)
@@ -355,7 +483,7 @@ class MusicPlayerFlags:
 
 class MusicPlayer(PageInteractionHandler):
 
-    def __init__(self, bot: commands.Bot, voice_client: discord.VoiceClient, q_state: Tuple[int, List[QueueSong]]=None):
+    def __init__(self, bot: commands.Bot, voice_client: discord.VoiceClient, q_state: QueueState=None):
 
         self.voice_client: discord.VoiceClient = voice_client
         self.guild: discord.Guild = voice_client.guild
@@ -363,11 +491,21 @@ class MusicPlayer(PageInteractionHandler):
         self.config: MusicPlayerGuildConfig = MusicPlayerGuildConfig(self.guild.id)
 
         self.q: SongQueue = SongQueue(voice_client.channel.guild, q_state)
+        self.q.set_channel(voice_client.channel.id)
         self.ad_library: AdLibrary = AdLibrary(voice_client.guild)
+        self.ad_scheduler: AdBreakScheduler = AdBreakScheduler(self.ad_library)
+        self.ad_extra_wait_sec: float = 0.0
 
         self.flags: MusicPlayerFlags = MusicPlayerFlags()
         self.play_lock: asyncio.Lock = asyncio.Lock()
 
+        # background tasks appending the remaining pages of playlists and albums
+        self.load_tasks: Set[asyncio.Task] = set()
+        self.active_loads: int = 0
+        self.loaded_songs: int = 0
+
+        self.engagement: EngagementCache = EngagementCache(self.guild.id, self._on_engagement_update)
+
         super().__init__(MusicPlayerNotifier(self))
 
     def _tag_log(self, log) -> str:
@@ -376,11 +514,16 @@ class MusicPlayer(PageInteractionHandler):
     def started(self):
         return self.flags.started
     
-    def load_ad_library(self):
-        self.ad_library.load_ads()
+    async def load_ad_library(self):
+        await self.ad_library.load_ads()
 
-    def get_q_state(self) -> Tuple[int, List[QueueSong]]:
-        return (self.q.crt_idx, self.q.songs)        
+    def get_q_state(self) -> QueueState:
+        return self.q.get_state()
+
+    @handle_exceptions(silent=True)
+    async def _on_engagement_update(self) -> None:
+        if not self.flags.stopping:
+            await self.notifier.update(silent=True)
 
     @update_notifier(silent=True)
     async def reload_config(self, config: MusicPlayerGuildConfig):
@@ -390,6 +533,7 @@ class MusicPlayer(PageInteractionHandler):
     @handle_exceptions()
     async def change_channel(self, channel: discord.VoiceChannel):
         await super().change_channel(channel)
+        self.q.set_channel(channel.id)
         logger.info(self._tag_log(f"Moved to channel {channel.name} (ID = {channel.id})."), guild=self.guild)
 
     @update_notifier(silent=True)
@@ -408,12 +552,76 @@ class MusicPlayer(PageInteractionHandler):
     @defer()
     async def add_query(self, interaction: discord.Interaction, query: str, next: bool=False, platform: SongPlatform=None):
         
-        songs = await song_searcher.get_songs_query(query, platform)
-        
-        await self.q.add_songs(songs, interaction.user.id, next)
+        pages = song_searcher.stream_songs_query(query, platform)
+
+        # the first page is queued right away so playback can start while the rest is resolved
+        songs = await anext(pages, [])
+        q_songs = await self.q.add_songs(songs, interaction.user.id, next)
+
+        task = asyncio.create_task(
+            self._load_remaining_pages(interaction, pages, next, q_songs[-1] if next and q_songs else None)
+        )
+        self.load_tasks.add(task)
+        task.add_done_callback(self.load_tasks.discard)
 
         await self._responde(interaction, f"Added {len(songs)} song(s) to the queue!")
 
+    @update_notifier(silent=True)
+    @handle_exceptions()
+    @defer()
+    async def add_queries(
+        self, interaction: discord.Interaction, queries: List[str], next: bool=False, platform: SongPlatform=None
+    ):
+
+        results = await song_searcher.get_songs_queries(queries, platform)
+
+        for result in results:
+            if result.error:
+                logger.warning(
+                    self._tag_log(f"Could not resolve query '{result.query}': {result.error}"), interaction=interaction
+                )
+
+        songs = [song for result in results for song in result.songs]
+        await self.q.add_songs(songs, interaction.user.id, next)
+
+        message = f"Added {len(songs)} song(s) to the queue!"
+        failed_message = get_failed_queries_message(results)
+
+        await self._responde(interaction, f"{message}\n{failed_message}" if failed_message else message)
+
+    @handle_exceptions()
+    async def _load_remaining_pages(
+        self, interaction: discord.Interaction, pages: AsyncIterator[List[SongRef]], next: bool, after: QueueSong
+    ) -> None:
+
+        loaded = 0
+        self.active_loads += 1
+
+        try:
+
+            async for songs in pages:
+
+                if self.flags.stopping:
+                    break
+
+                q_songs = await self.q.add_songs(songs, interaction.user.id, next, after)
+                after = q_songs[-1] if next and q_songs else after
+
+                loaded += len(q_songs)
+                self.loaded_songs += len(q_songs)
+                await self.notifier.update(silent=True)
+
+        finally:
+            await pages.aclose()
+            self.active_loads -= 1
+            if not self.active_loads:
+                self.loaded_songs = 0
+
+        if loaded:
+            logger.info(self._tag_log(f"Loaded {loaded} more song(s) in the background."), guild=self.guild)
+            await self._responde(interaction, f"Finished loading {loaded} more song(s) to the queue!")
+            await self.notifier.update(silent=True)
+
     @handle_exceptions()
     async def _add_crt_song_engagement(self) -> None:
 
@@ -424,9 +632,13 @@ class MusicPlayer(PageInteractionHandler):
             q_song.requester_id, datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
         )
 
+        title_index.add_songs(self.guild.id, [q_song.song], played=True)
+
         user_ids_in_voice_channel = [
             member.id for member in self.voice_client.channel.members if not member.bot
         ]
+        self.engagement.record_stream(q_song.song.id, len(user_ids_in_voice_channel))
+
         if not user_ids_in_voice_channel:
             return
 
@@ -447,7 +659,9 @@ class MusicPlayer(PageInteractionHandler):
 
         return False
     
-    async def _play_audio(self, audio_data: bytes, stopping_condition: Callable[[], bool] = None):
+    async def _play_audio(
+        self, audio_data: bytes, stopping_condition: Callable[[], bool] = None, poll_interval: float = 1
+    ):
 
         if not audio_data:
             return
@@ -472,32 +686,37 @@ class MusicPlayer(PageInteractionHandler):
                 if self.flags.stopping or (stopping_condition and stopping_condition()):
                     self.voice_client.stop()
                     return
-                await asyncio.sleep(1)
+                await asyncio.sleep(poll_interval)
 
-    async def _play_ad_audio(self, audio_data: bytes, force: bool=False) -> None:
+    async def _play_ad_audio(self, clip: Optional[AdClip], force: bool=False) -> None:
 
-        if not audio_data:
+        if not clip or self._check_ad_end(force=force):
             return
 
-        await self._play_audio(audio_data, lambda: self._check_ad_end(force=force))
+        await self._play_audio(clip.audio, lambda: self._check_ad_end(force=force), AD_POLL_SEC)
 
-    async def _play_ad(self) -> None:
+    async def _play_ad(self, plan: AdBreakPlan) -> None:
 
         await self.notifier.update(silent=True)
 
         async with self.play_lock:
             
-            logger.info(self._tag_log("Starting ad break."), guild=self.guild)
+            logger.info(
+                self._tag_log(f"Starting ad break, expected wait {plan.expected_wait:.1f}s."), 
+                guild=self.guild
+            )
 
-            openning = self.ad_library.get_random_openning()
-            await self._play_ad_audio(openning)
+            await self._play_ad_audio(plan.openning)
 
-            while not self._check_ad_end():
-                content = self.ad_library.get_random_content()
-                await self._play_ad_audio(content)
-            
-            closing = self.ad_library.get_random_closing()
-            await self._play_ad_audio(closing, force=True)
+            while not self.flags.stopping:
+
+                clip = self.ad_scheduler.next_clip(plan, self.q.estimate_current_song_wait(), self._check_ad_end())
+
+                if not clip:
+                    break
+
+                # without cut on ready the closing ad is always played to its end
+                await self._play_ad_audio(clip, force=plan.is_closing(clip) and not plan.cut_on_ready)
         
         logger.info(self._tag_log("Ad break ended."), guild=self.guild)
 
@@ -511,7 +730,8 @@ class MusicPlayer(PageInteractionHandler):
 
     async def _play_next(self) -> None:
 
-        if not self.voice_client or not self.voice_client.channel:
+        # a dropped connection (e.g. shutdown) must not advance the saved queue position
+        if not self.voice_client or not self.voice_client.channel or not self.voice_client.is_connected():
             return
         
         curr_channel = self.voice_client.channel
@@ -527,24 +747,42 @@ class MusicPlayer(PageInteractionHandler):
         if self.flags.stopping:
             return
 
+        await self.q.hydrate(self.q.crt_idx, self.q.crt_idx + HYDRATE_PAGE_SIZE)
+
         q_song = self.q.get_current_song()
 
         if not q_song:
             logger.info(self._tag_log("No upcoming song found."), guild=self.guild)
+            self.q.discard_journal()
             await self.close()
             return
 
+        if not q_song.is_hydrated():
+            logger.warning(self._tag_log(f"Could not load song (ID = {q_song.ref.id})."), guild=self.guild)
+            self.q.remove_song(q_song)
+            await self.notifier.send_error(f"Could not load song: `{q_song.title}`. It will be removed from the queue!")
+            return await self._play_next()
+
         logger.info(self._tag_log(f"Starting to play song '{q_song.song.title}' (ID = {q_song.song.id})."), guild=self.guild)
 
         song = q_song.song
 
-        self.flags.ad_break = True
+        ad_task = None
 
         if self.config.get_ads():
-            asyncio.create_task(self._play_ad())
+            cut_on_ready = self.config.get_ads_cut_on_ready()
+            ad_plan = self.ad_scheduler.plan(self.q.estimate_current_song_wait(), cut_on_ready)
+            if ad_plan:
+                self.flags.ad_break = True
+                ad_task = asyncio.create_task(self._play_ad(ad_plan))
         
         audio_file = await self.q.get_current_song_audio()
+        audio_ready_at = time.monotonic()
         self.flags.ad_break = False
+
+        if ad_task:
+            await ad_task
+            self._report_ad_wait(audio_ready_at)
         
         if not audio_file:
             logger.warning(self._tag_log(f"Invalid audio file for song (ID = {song.id})."), guild=self.guild)
@@ -559,6 +797,16 @@ class MusicPlayer(PageInteractionHandler):
 
         return await self._play_next()
 
+    def _report_ad_wait(self, audio_ready_at: float) -> None:
+
+        extra_wait = time.monotonic() - audio_ready_at
+        self.ad_extra_wait_sec += extra_wait
+
+        logger.info(
+            self._tag_log(f"Ad break added {extra_wait:.1f}s of extra wait ({self.ad_extra_wait_sec:.1f}s in total)."), 
+            guild=self.guild
+        )
+
     @handle_exceptions()
     @defer()
     async def play(self, interaction: discord.Interaction):
@@ -572,6 +820,7 @@ class MusicPlayer(PageInteractionHandler):
         logger.info(self._tag_log("Music player started."), guild=self.guild)
 
         try:
+            await self.load_ad_library()
             await self._play()
         except Exception as e:
            await self.close()
@@ -590,6 +839,12 @@ class MusicPlayer(PageInteractionHandler):
         logger.info(self._tag_log("Closing music player."), guild=self.guild)
 
         self.flags.stopping = True
+
+        for task in list(self.load_tasks):
+            task.cancel()
+
+        self.engagement.close()
+
         await self.q.stop()
         await self.notifier.clear()
         if self.voice_client.is_connected():
@@ -657,6 +912,7 @@ class MusicPlayer(PageInteractionHandler):
         logger.info(self._tag_log("Triggered 'stop'."), interaction=interaction)
 
         await self._responde(interaction, "Stopping... *sad music bot noises*")
+        self.q.discard_journal()
         await self.close()
 
     @defer()
@@ -682,7 +938,7 @@ class MusicPlayer(PageInteractionHandler):
 
         logger.info(self._tag_log("Triggered 'toggle_loop_queue'."), interaction=interaction)
 
-        self.q.flags.toggle_loop_queue()
+        self.q.toggle_loop_queue()
 
         response =  f"Queue loop turned {'on' if self.q.flags.loop_queue else 'off'}."
 
@@ -695,7 +951,7 @@ class MusicPlayer(PageInteractionHandler):
          
         logger.info(self._tag_log("Triggered 'toggle_loop_queue'."), interaction=interaction)
 
-        self.q.flags.toggle_loop_song()
+        self.q.toggle_loop_song()
 
         response =  f"Song loop turned {'on' if self.q.flags.loop_song else 'off'}."
 
@@ -714,11 +970,11 @@ class MusicPlayer(PageInteractionHandler):
     @handle_exceptions()
     async def _send_crt_song_reaction(self, user_id: int, guild_id: int, reaction_type: SongReactionType):
         
-        song = self.q.get_current_song().song
-        await music_service.add_reaction(song.id, guild_id, user_id, reaction_type)
-        song.engagement = await music_service.get_song_engagement(song.id, guild_id)
+        song_id = self.q.get_current_song().ref.id
+        await music_service.add_reaction(song_id, guild_id, user_id, reaction_type)
+        self.engagement.record_reaction(song_id, reaction_type)
 
-        logger.info(f"Added reaction '{reaction_type}' to song (ID = {song.id}) by user (ID = {user_id}).", guild=self.guild)
+        logger.info(f"Added reaction '{reaction_type}' to song (ID = {song_id}) by user (ID = {user_id}).", guild=self.guild)
 
     @update_notifier(silent=True)
     @defer()
@@ -763,7 +1019,7 @@ class MusicPlayer(PageInteractionHandler):
         logger.info(self._tag_log("Triggered 'volume_up'."), interaction=interaction)
 
         new_volume = max(0, min(self.config.get_volume() + 10, 100))
-        self.config.set_volume(new_volume)
+        await self.config.set_volume(new_volume)
 
         self._refresh_client_volume()
 
@@ -776,7 +1032,7 @@ class MusicPlayer(PageInteractionHandler):
         logger.info(self._tag_log("Triggered 'volume_down'."), interaction=interaction)
 
         new_volume = max(0, min(self.config.get_volume() - 10, 100))
-        self.config.set_volume(new_volume)
+        await self.config.set_volume(new_volume)
 
         self._refresh_client_volume()
 
@@ -792,11 +1048,29 @@ class MusicPlayer(PageInteractionHandler):
         await restart_player(self.bot, interaction)
 
 
+class QueuePageSource(PageDataSource):
+
+    def __init__(self, music_player: MusicPlayer):
+        self.music_player: MusicPlayer = music_player
+
+    async def get_count(self) -> int:
+        return len(self.music_player.q)
+
+    async def get_page(self, start: int, end: int) -> List[QueueSong]:
+        await self.music_player.q.hydrate(start, end)
+        return self.music_player.q.songs[start:end]
+
+    async def prefetch(self, start: int, end: int) -> None:
+        # the next page flip then renders without waiting for song metadata
+        await self.music_player.q.hydrate(start, end)
+
+
 class MusicPlayerNotifier(PageNotifier):
 
     def __init__(self, music_player: MusicPlayer):
-        super().__init__(channel=music_player.voice_client.channel, display_page=False, page_size=3)
+        # the page source created by PageNotifier reads the queue of the player
         self.music_player = music_player
+        super().__init__(channel=music_player.voice_client.channel, display_page=False, page_size=3)
     
     async def _create_embed_heading(self) -> discord.Embed:
 
@@ -805,27 +1079,31 @@ class MusicPlayerNotifier(PageNotifier):
         if not crt_q_song:
             return None
 
-        crt_song = crt_q_song.song
-
         embed = discord.Embed(
-            title = crt_song.title,
-            url = crt_song.get_link(),
+            title = crt_q_song.title,
+            url = crt_q_song.get_link(),
             color = self.music_player.config.get_color()
         )
 
-        crt_song.engagement = await music_service.get_song_engagement(crt_song.id, self.channel.guild.id)
+        # the engagement is loaded in the background and pushes a new render once it arrives
+        engagement = self.music_player.engagement.get(crt_q_song.ref.id)
+
+        if crt_q_song.song:
+            crt_q_song.song.engagement = engagement
         
-        embed.set_thumbnail(url = crt_song.thumbnail_url)
-        embed.add_field(name="Likes", value=crt_song.engagement.likes, inline=True)
-        embed.add_field(name="Dislikes", value=crt_song.engagement.dislikes, inline=True)
-        embed.add_field(name="Streams", value=crt_song.engagement.streams, inline=True)
-        embed.add_field(name="Views", value=crt_song.engagement.listeners, inline=True)
+        embed.set_thumbnail(url = crt_q_song.thumbnail_url)
+        embed.add_field(name="Likes", value=engagement.likes if engagement else "...", inline=True)
+        embed.add_field(name="Dislikes", value=engagement.dislikes if engagement else "...", inline=True)
+        embed.add_field(name="Streams", value=engagement.streams if engagement else "...", inline=True)
+        embed.add_field(name="Views", value=engagement.listeners if engagement else "...", inline=True)
         embed.add_field(name="Position", value=f"#{crt_q_song.position}/{len(self.music_player.q)}", inline=True)
         embed.add_field(name="User", value=f"<@{crt_q_song.requester_id}>", inline=True)
 
         tags = ""
         tags += f"`volume {int(self.music_player.config.get_volume())}%`\n"
         tags += f"`ads {'enabled' if self.music_player.config.get_ads() else 'disabled'}`\n"
+        if self.music_player.active_loads:
+            tags += f"`loading songs ({self.music_player.loaded_songs} added)`\n"
         if self.music_player.flags.ad_break:
             tags += f"`ad break`\n"
         if self.music_player.flags.is_paused:
@@ -842,24 +1120,28 @@ class MusicPlayerNotifier(PageNotifier):
     def _create_view(self):
         return MusicPlayerView(self.music_player)
 
-    async def _fetch_items(self) -> None:
-        return self.music_player.q.songs
+    def _get_view_key(self) -> tuple:
+        return (self.music_player.config.config,)
+
+    def _create_source(self) -> PageDataSource:
+        return QueuePageSource(self.music_player)
 
     def _add_item_to_page(self, embed: discord.Embed, item: QueueSong) -> None:
 
         crt_q_song = self.music_player.q.get_current_song()
-        song = item.song
+        link = item.get_link()
+        title = f"[{item.title}]({link})" if link else item.title
 
         if item == crt_q_song:
             embed.add_field(
                 name=f"#{item.position}",
-                value=f"** :notes: [{song.title}]({song.get_link()}) :notes: **",
+                value=f"** :notes: {title} :notes: **",
                 inline=False
             )
         else:
             embed.add_field(
                 name=f"#{item.position}",
-                value=f"[{song.title}]({song.get_link()})",
+                value=title,
                 inline=False
                 )
 
@@ -869,6 +1151,10 @@ class MusicPlayerView(ButtonView):
     def __init__(self, music_player: MusicPlayer):
         super().__init__()
         self.mp: MusicPlayer = music_player
+        # custom ids of the buttons that change with the state of the player
+        self.pause_button_id: str = None
+        self.loop_q_button_id: str = None
+        self.loop_song_button_id: str = None
     
     async def init(self):
         await self.add_q_controls()
@@ -877,16 +1163,49 @@ class MusicPlayerView(ButtonView):
         await self.add_q_navigation()
         await self.add_player_controls()
 
+    async def _get_pause_button(self) -> Tuple[str, Callable]:
+
+        config = self.mp.config.config
+
+        if self.mp.flags.is_paused:
+            return await config.get_button_emoji(MusicPlayerButton.RESUME), self.mp.resume
+
+        return await config.get_button_emoji(MusicPlayerButton.PAUSE), self.mp.pause
+
+    async def _get_loop_q_emoji(self) -> str:
+
+        config = self.mp.config.config
+
+        if self.mp.q.flags.loop_queue:
+            return await config.get_button_emoji(MusicPlayerButton.LOOP_Q_ON)
+
+        return await config.get_button_emoji(MusicPlayerButton.LOOP_Q_OFF)
+
+    async def _get_loop_song_emoji(self) -> str:
+
+        config = self.mp.config.config
+
+        if self.mp.q.flags.loop_song:
+            return await config.get_button_emoji(MusicPlayerButton.LOOP_SONG_ON)
+
+        return await config.get_button_emoji(MusicPlayerButton.LOOP_SONG_OFF)
+
+    async def refresh(self):
+
+        emoji, action = await self._get_pause_button()
+        self.set_button(self.pause_button_id, emoji, action)
+
+        self.set_button(self.loop_q_button_id, await self._get_loop_q_emoji(), self.mp.toggle_loop_queue)
+        self.set_button(self.loop_song_button_id, await self._get_loop_song_emoji(), self.mp.toggle_loop_song)
+
     async def add_q_controls(self):
         
         config = self.mp.config.config
 
         self.add_button(await config.get_button_emoji(MusicPlayerButton.PLAY_PREV), 0, self.mp.play_prev)
         
-        if self.mp.flags.is_paused:
-            self.add_button(await config.get_button_emoji(MusicPlayerButton.RESUME), 0, self.mp.resume)
-        else:
-            self.add_button(await config.get_button_emoji(MusicPlayerButton.PAUSE), 0, self.mp.pause)
+        emoji, action = await self._get_pause_button()
+        self.pause_button_id = self.add_button(emoji, 0, action)
         
         self.add_button(await config.get_button_emoji(MusicPlayerButton.PLAY_NEXT), 0, self.mp.skip)
     
@@ -894,19 +1213,11 @@ class MusicPlayerView(ButtonView):
 
         config = self.mp.config.config
 
-        if self.mp.q.flags.loop_queue:
-            loop_q_btn = await config.get_button_emoji(MusicPlayerButton.LOOP_Q_ON)
-        else:
-            loop_q_btn = await config.get_button_emoji(MusicPlayerButton.LOOP_Q_OFF)
-        self.add_button(loop_q_btn, 1, self.mp.toggle_loop_queue)
+        self.loop_q_button_id = self.add_button(await self._get_loop_q_emoji(), 1, self.mp.toggle_loop_queue)
 
         self.add_button(await config.get_button_emoji(MusicPlayerButton.SHUFFLE), 1, self.mp.shuffle)    
 
-        if self.mp.q.flags.loop_song:
-            loop_song_btn = await config.get_button_emoji(MusicPlayerButton.LOOP_SONG_ON)
-        else:
-            loop_song_btn = await config.get_button_emoji(MusicPlayerButton.LOOP_SONG_OFF)
-        self.add_button(loop_song_btn, 1, self.mp.toggle_loop_song)
+        self.loop_song_button_id = self.add_button(await self._get_loop_song_emoji(), 1, self.mp.toggle_loop_song)
 
     async def add_stop_reaction(self):
 
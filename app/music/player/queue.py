@@ -0,0 +1,393 @@
+import random
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from music.entity import QueueSong
+
+
+_priority_rng = random.Random()
+
+# consecutive shuffles are stacked lazily, the queue is rebuilt once there are too many of them
+MAX_SHUFFLE_LAYERS = 32
+FEISTEL_ROUNDS = 4
+
+
+class _Node:
+
+    __slots__ = ("q_song", "priority", "size", "left", "right", "parent")
+
+    def __init__(self, q_song: QueueSong):
+        self.q_song: QueueSong = q_song
+        self.priority: float = _priority_rng.random()
+        self.size: int = 1
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+        self.parent: Optional[_Node] = None
+
+
+def _size(node: Optional[_Node]) -> int:
+    return node.size if node else 0
+
+
+def _update(node: _Node) -> None:
+
+    node.size = 1 + _size(node.left) + _size(node.right)
+
+    if node.left:
+        node.left.parent = node
+    if node.right:
+        node.right.parent = node
+
+
+def _split(node: Optional[_Node], count: int) -> Tuple[Optional[_Node], Optional[_Node]]:
+
+    # first `count` nodes go to the left tree
+    if not node:
+        return None, None
+
+    node.parent = None
+
+    if _size(node.left) >= count:
+        left, node.left = _split(node.left, count)
+        _update(node)
+        return left, node
+
+    node.right, right = _split(node.right, count - _size(node.left) - 1)
+    _update(node)
+    return node, right
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+
+    if not left:
+        return right
+    if not right:
+        return left
+
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _build(nodes: List[_Node]) -> Optional[_Node]:
+
+    # cartesian tree construction, linear in the number of nodes
+    stack: List[_Node] = []
+
+    for node in nodes:
+        last = None
+        while stack and stack[-1].priority < node.priority:
+            last = stack.pop()
+        node.left = last
+        if stack:
+            stack[-1].right = node
+        stack.append(node)
+
+    if not stack:
+        return None
+
+    root = stack[0]
+    root.parent = None
+
+    # sizes and parents have to be computed bottom up
+    order: List[_Node] = []
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        order.append(node)
+        if node.left:
+            pending.append(node.left)
+        if node.right:
+            pending.append(node.right)
+
+    for node in reversed(order):
+        _update(node)
+
+    return root
+
+
+class _ShuffleRegion:
+
+    # lazy permutation of `length` positions starting at `start`, built as a seeded feistel
+    # network so any position is resolved in constant time without drawing the ones before it
+    def __init__(self, start: int, length: int, rng: random.Random):
+        self.start: int = start
+        self.length: int = length
+        bits = (length - 1).bit_length()
+        # unbalanced halves keep the permuted range below twice the length of the region
+        self.left_bits: int = bits // 2
+        self.right_bits: int = bits - self.left_bits
+        self.keys: List[int] = [rng.getrandbits(64) for _ in range(FEISTEL_ROUNDS)]
+
+    def contains(self, idx: int) -> bool:
+        return self.start <= idx < self.start + self.length
+
+    def _permute(self, value: int) -> int:
+
+        left_bits, right_bits = self.left_bits, self.right_bits
+        left, right = value >> right_bits, value & ((1 << right_bits) - 1)
+
+        for key in self.keys:
+            left, right = right, left ^ (hash((right, key)) & ((1 << left_bits) - 1))
+            left_bits, right_bits = right_bits, left_bits
+
+        return (left << right_bits) | right
+
+    def resolve(self, idx: int) -> int:
+
+        value = self._permute(idx - self.start)
+
+        # the network permutes a power of two range, walk the cycle until it lands inside the region
+        while value >= self.length:
+            value = self._permute(value)
+
+        return self.start + value
+
+    def resolve_all(self) -> List[int]:
+
+        # same mapping as resolve, computed for the whole network at once
+        left_bits, right_bits = self.left_bits, self.right_bits
+        values = range(1 << (left_bits + right_bits))
+        left = [value >> right_bits for value in values]
+        right = [value & ((1 << right_bits) - 1) for value in values]
+
+        for key in self.keys:
+            mask = (1 << left_bits) - 1
+            left, right = right, [l ^ (hash((r, key)) & mask) for l, r in zip(left, right)]
+            left_bits, right_bits = right_bits, left_bits
+
+        table = [(l << right_bits) | r for l, r in zip(left, right)]
+        resolved = []
+
+        for offset in range(self.length):
+            value = table[offset]
+            while value >= self.length:
+                value = table[value]
+            resolved.append(self.start + value)
+
+        return resolved
+
+
+class QueueSongList:
+
+    def __init__(self, q_songs: List[QueueSong]=None):
+
+        self.root: Optional[_Node] = None
+        self.nodes: Dict[UUID, List[_Node]] = {}
+        self.shuffles: List[List[_ShuffleRegion]] = []
+
+        if q_songs:
+            self.root = _build(self._create_nodes(q_songs))
+
+    def _create_nodes(self, q_songs: List[QueueSong]) -> List[_Node]:
+
+        nodes = [_Node(q_song) for q_song in q_songs]
+
+        for node in nodes:
+            self.nodes.setdefault(node.q_song.ref.id, []).append(node)
+
+        return nodes
+
+    def __len__(self) -> int:
+        return _size(self.root)
+
+    def _get_node(self, idx: int) -> _Node:
+
+        node = self.root
+
+        while node:
+            left_size = _size(node.left)
+            if idx < left_size:
+                node = node.left
+            elif idx == left_size:
+                return node
+            else:
+                idx -= left_size + 1
+                node = node.right
+
+        raise IndexError("queue index out of range")
+
+    def _get_rank(self, node: _Node) -> int:
+
+        rank = _size(node.left)
+
+        while node.parent:
+            if node is node.parent.right:
+                rank += _size(node.parent.left) + 1
+            node = node.parent
+
+        return rank
+
+    def _resolve(self, idx: int) -> int:
+
+        for regions in reversed(self.shuffles):
+            for region in regions:
+                if region.contains(idx):
+                    idx = region.resolve(idx)
+                    break
+
+        return idx
+
+    def _get(self, idx: int) -> QueueSong:
+
+        q_song = self._get_node(self._resolve(idx)).q_song
+        q_song.position = idx + 1
+        return q_song
+
+    def __getitem__(self, key):
+
+        if isinstance(key, slice):
+            return [self._get(idx) for idx in range(*key.indices(len(self)))]
+
+        if key < 0:
+            key += len(self)
+
+        if key < 0 or key >= len(self):
+            raise IndexError("queue index out of range")
+
+        return self._get(key)
+
+    def _iter_nodes(self) -> Iterator[_Node]:
+
+        stack: List[_Node] = []
+        node = self.root
+
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
+
+    def __iter__(self) -> Iterator[QueueSong]:
+
+        if self.shuffles:
+            for idx in range(len(self)):
+                yield self._get(idx)
+            return
+
+        for idx, node in enumerate(self._iter_nodes()):
+            node.q_song.position = idx + 1
+            yield node.q_song
+
+    def to_list(self) -> List[QueueSong]:
+        return list(self)
+
+    def _materialize(self) -> None:
+
+        # applies the pending shuffles, needed before the structure of the queue changes
+        if not self.shuffles:
+            return
+
+        nodes = list(self._iter_nodes())
+        q_songs = [node.q_song for node in nodes]
+
+        for regions in self.shuffles:
+            for region in regions:
+                q_songs[region.start:region.start + region.length] = [
+                    q_songs[idx] for idx in region.resolve_all()
+                ]
+
+        # the shape of the tree does not change, only the songs move between nodes
+        self.nodes = {}
+        for node, q_song in zip(nodes, q_songs):
+            node.q_song = q_song
+            self.nodes.setdefault(q_song.ref.id, []).append(node)
+
+        self.shuffles = []
+
+    def insert(self, idx: int, q_songs: List[QueueSong]) -> None:
+
+        if not q_songs:
+            return
+
+        idx = max(0, min(idx, len(self)))
+
+        # songs appended after the shuffled part of the queue do not affect the pending shuffles
+        if any(region.start + region.length > idx for regions in self.shuffles for region in regions):
+            self._materialize()
+
+        left, right = _split(self.root, idx)
+        self.root = _merge(_merge(left, _build(self._create_nodes(q_songs))), right)
+        self.root.parent = None
+
+    def extend(self, q_songs: List[QueueSong]) -> None:
+        self.insert(len(self), q_songs)
+
+    def contains(self, song_id: UUID) -> bool:
+        return song_id in self.nodes
+
+    def index_of(self, q_song: QueueSong) -> Optional[int]:
+
+        if q_song.ref.id not in self.nodes:
+            return None
+
+        # the pending shuffles move songs between nodes, so they are applied before the lookup
+        self._materialize()
+
+        node = next((node for node in self.nodes[q_song.ref.id] if node.q_song is q_song), None)
+        return self._get_rank(node) if node else None
+
+    def _remove_node(self, node: _Node) -> None:
+
+        child = _merge(node.left, node.right)
+        parent = node.parent
+
+        if child:
+            child.parent = parent
+
+        if not parent:
+            self.root = child
+        elif parent.left is node:
+            parent.left = child
+        else:
+            parent.right = child
+
+        while parent:
+            parent.size -= 1
+            parent = parent.parent
+
+        node.left = node.right = node.parent = None
+
+    def remove_song(self, song_id: UUID) -> List[int]:
+
+        # returns the indexes the song occupied before removal, in ascending order
+        if song_id not in self.nodes:
+            return []
+
+        self._materialize()
+        nodes = self.nodes.pop(song_id)
+
+        removed = sorted((self._get_rank(node), node) for node in nodes)
+
+        for _, node in reversed(removed):
+            self._remove_node(node)
+
+        return [idx for idx, _ in removed]
+
+    def shuffle(self, pivot: int, seed: int) -> None:
+
+        # shuffles the songs before and after the pivot, leaving the pivot in place
+        size = len(self)
+        rng = random.Random(seed)
+
+        if pivot < 0 or pivot >= size:
+            bounds = [(0, size)]
+        else:
+            bounds = [(pivot + 1, size - pivot - 1), (0, pivot)]
+
+        regions = [_ShuffleRegion(start, length, rng) for start, length in bounds if length > 1]
+
+        # the layers are always composed, even when the new one covers the previous one, so the order only
+        # depends on the shuffles applied and a restored snapshot followed by its journal gives the same queue
+        if len(self.shuffles) >= MAX_SHUFFLE_LAYERS:
+            self._materialize()
+
+        if regions:
+            self.shuffles.append(regions)
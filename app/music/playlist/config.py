@@ -4,7 +4,7 @@ from typing import List
 import discord
 
 from framework.ui.view import AppIcon
-from framework.core.config import CONFIG_PATH, ButtonConfig, GuildConfig
+from framework.core.config import CONFIG_PATH, ButtonConfig, GuildConfig, register_guild_config
 from framework.core.exception import InvalidConfigException
 from framework.utils.file import read_json_file
 from framework.core.logger import get_logger, LoggerWrapper
@@ -104,6 +104,7 @@ def load_playlist_manager_default_config_data():
 
 
 load_playlist_manager_default_config_data()
+register_guild_config(lambda guild: PlaylistManagerGuildConfig(guild.id))
 
 
 class PlaylistGuildManagerIcon(AppIcon):
@@ -195,3 +196,4 @@ def load_playlist_guild_manager_default_config_data():
 
 
 load_playlist_guild_manager_default_config_data()
+register_guild_config(lambda guild: PlaylistGuildManagerGuildConfig(guild.id))
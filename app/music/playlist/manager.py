@@ -8,7 +8,7 @@ from framework.interaction_handler.decorator import (
     stop_timeout, update_notifier, wait_timeout
 )
 from framework.interaction_handler.handler import TPageInteractionHandler
-from framework.ui.notifier import ChannelType, PageNotifier
+from framework.ui.notifier import CachedListSource, ChannelType, PageDataSource, PageNotifier, SequenceSource
 from framework.ui.view import ButtonView, SingleTextFieldModal
 from framework.core.logger import get_logger, LoggerWrapper
 
@@ -17,12 +17,17 @@ from music.playlist.config import (
     PlaylistGuildManagerGuildConfig, PlaylistGuildManagerIcon, 
     PlaylistManagerGuildConfig, PlaylistManagerIcon
 )
-from music.service import music_service, song_searcher
+from music.service import get_failed_queries_message, music_service, song_searcher
+import music.title_index as title_index
 
 
 logger: LoggerWrapper = get_logger(__name__)
 
 
+# playlists created from other panels show up after this long at the latest
+PLAYLISTS_CACHE_TTL_SEC = 60
+
+
 class PlaylistManager(TPageInteractionHandler):
 
     def __init__(self, channel: ChannelType):
@@ -96,17 +101,23 @@ class PlaylistManager(TPageInteractionHandler):
 
         logger.info(self._tag_log(f"Triggered 'add_to_playlist' with value={value}."), interaction=interaction)
 
-        songs = await song_searcher.get_songs_query(value)
+        results = await song_searcher.get_songs_queries(song_searcher.split_queries(value))
 
+        songs = [song for result in results for song in result.songs]
         song_ids = [song.id for song in songs]
         
-        self.playlist = await music_service.add_songs_to_playlist_by_id(
-                                playlist_id=self.playlist.id, 
-                                requester_discord_id=interaction.user.id, 
-                                song_ids=song_ids
-                            )
-        
-        await self._responde(interaction, f"Added {len(songs)} song(s) to `{self.playlist.title}`.")
+        if song_ids:
+            self.playlist = await music_service.add_songs_to_playlist_by_id(
+                                    playlist_id=self.playlist.id, 
+                                    requester_discord_id=interaction.user.id, 
+                                    song_ids=song_ids
+                                )
+            title_index.add_songs(interaction.guild_id, [p_song.song for p_song in self.playlist.songs])
+
+        message = f"Added {len(songs)} song(s) to `{self.playlist.title}`."
+        failed_message = get_failed_queries_message(results)
+
+        await self._responde(interaction, f"{message}\n{failed_message}" if failed_message else message)
         logger.info(self._tag_log(f"Added {len(songs)} song(s) (IDS = {song_ids}) to playlist."))
 
     @reset_timeout
@@ -163,9 +174,16 @@ class PlaylistManagerNotifier(PageNotifier):
 
     def _create_view(self):
         return PlaylistManagerView(self.playlist_manager)
+
+    def _get_view_key(self) -> tuple:
+        # the modals of the view show the title of the playlist
+        playlist = self.playlist_manager.playlist
+        return (self.playlist_manager.config.config, playlist.title if playlist else None)
     
-    async def _fetch_items(self):
-        return self.playlist_manager.playlist.songs
+    def _create_source(self) -> PageDataSource:
+        return SequenceSource(
+            lambda: self.playlist_manager.playlist.songs if self.playlist_manager.playlist else []
+        )
     
     def _add_item_to_page(self, embed: discord.Embed, item: PlaylistSong):
         
@@ -223,9 +241,10 @@ class AddSongModal(SingleTextFieldModal):
         p_title = playlist_manager.playlist.title
 
         super().__init__(
-            title=f'Add song to playlist "{p_title}"', 
-            label="Query", 
-            action=playlist_manager.add_to_playlist
+            title=f'Add songs to playlist "{p_title}"', 
+            label="Links or titles, one per line", 
+            action=playlist_manager.add_to_playlist,
+            style=discord.TextStyle.paragraph
         )
 
 
@@ -281,6 +300,7 @@ class PlaylistGuildManager(TPageInteractionHandler):
                     owner_discord_id=interaction.user.id,
                     guild_discord_id=interaction.guild_id
             )
+        self.notifier.source.invalidate()
                
         await self._responde(interaction, f"Created playlist `{value}`.")
         logger.info(f"Created playlist `{value}`.", interaction=interaction)
@@ -299,6 +319,7 @@ class PlaylistGuildManager(TPageInteractionHandler):
                         )
         
         await music_service.delete_playlist(playlist.id, interaction.user.id)
+        self.notifier.source.invalidate()
         
         await self._responde(interaction, f"Playlist `{playlist.title}` deleted")
         logger.info(f"Playlist {value} deleted.", interaction=interaction)
@@ -352,8 +373,11 @@ class PlaylistGuildMngNotifier(PageNotifier):
     def _create_view(self):
         return PlaylistGuildManagerView(self.manager)
 
-    async def _fetch_items(self):
-        return await self.manager.get_playlists()
+    def _get_view_key(self) -> tuple:
+        return (self.manager.config.config,)
+
+    def _create_source(self) -> PageDataSource:
+        return CachedListSource(lambda: self.manager.get_playlists(), ttl_sec=PLAYLISTS_CACHE_TTL_SEC)
     
     def _add_item_to_page(self, embed: discord.Embed, item: Playlist) -> None:
         embed.add_field(name=f"Title", value=f"`{item.title}`", inline=True)
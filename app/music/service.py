@@ -1,15 +1,18 @@
+import asyncio
 from datetime import datetime
-from typing import List
+from typing import AsyncIterator, List, Optional, Union
 from uuid import UUID
 from requests import Response
 from urllib.parse import urlparse, parse_qs
 
 from framework.service.service import Endpoint, ServiceClient, RequestType
 from framework.core.exception import AppException
+from framework.utils.json_stream import JSONArrayParser
+from music.index import SongIndex, song_index
 
 from music.entity import (
     AddListenersResponse, AddReactionResponse, Playlist, 
-    Song, SongDownload, SongEngagement, SongPlatform, 
+    Song, SongDownload, SongEngagement, SongPlatform, SongRef, 
     ExternalId, SongReaction, SongReactionType, SongSearch, 
     SongSearchType, Stream
     )
@@ -76,6 +79,24 @@ class MusicServiceClient(ServiceClient):
         )
         return await self.send_request(RequestType.GET, MusicServiceEndpoints.METADATA_ALBUM, params=params)
 
+    def stream_songs_by_playlist(self, youtube_playlist_id: str=None, spotify_playlist_id: str=None) -> AsyncIterator[bytes]:
+        params = (
+            self._param_builder()
+                .add_param("youtubePlaylistId", youtube_playlist_id)
+                .add_param("spotifyPlaylistId", spotify_playlist_id)
+                .build()
+        )
+        return self.stream_request(RequestType.GET, MusicServiceEndpoints.METADATA_PLAYLIST, params=params)
+
+    def stream_songs_by_album(self, youtube_album_id: str=None, spotify_album_id: str=None) -> AsyncIterator[bytes]:
+        params = (
+            self._param_builder()
+                .add_param("youtubeAlbumId", youtube_album_id)
+                .add_param("spotifyAlbumId", spotify_album_id)
+                .build()
+        )
+        return self.stream_request(RequestType.GET, MusicServiceEndpoints.METADATA_ALBUM, params=params)
+
     async def get_audio_by_id(self, song_id: UUID=None, youtube_id: str=None, spotify_id: str=None) -> Response:
         params = (
             self._param_builder()
@@ -274,7 +295,7 @@ class MusicService:
 
         return Song(response.json())
 
-    async def get_songs_by_playlist(self, playlist_id: str, platform: SongPlatform) -> List[Song]:
+    async def get_songs_by_playlist(self, playlist_id: str, platform: SongPlatform) -> List[SongRef]:
         
         if platform == SongPlatform.YOUTUBE:
             response = await music_service_client.get_songs_by_playlist(youtube_playlist_id=playlist_id)
@@ -283,9 +304,9 @@ class MusicService:
         else:
             raise ValueError(f"Unsupported platform: {platform}")
         
-        return [Song(data) for data in response.json()]
+        return [SongRef(data) for data in response.json()]
  
-    async def get_songs_by_album(self, album_id: str, platform: SongPlatform) -> List[Song]:
+    async def get_songs_by_album(self, album_id: str, platform: SongPlatform) -> List[SongRef]:
         
         if platform == SongPlatform.YOUTUBE:
             response = await music_service_client.get_songs_by_album(youtube_album_id=album_id)
@@ -294,8 +315,32 @@ class MusicService:
         else:
             raise ValueError(f"Unsupported platform: {platform}")
         
-        return [Song(data) for data in response.json()]
+        return [SongRef(data) for data in response.json()]
          
+    async def stream_songs_by_collection(self, search_type: SongSearchType, ext_id: ExternalId) -> AsyncIterator[SongRef]:
+
+        if ext_id.platform not in [SongPlatform.YOUTUBE, SongPlatform.SPOTIFY]:
+            raise ValueError(f"Unsupported platform: {ext_id.platform}")
+
+        id = ext_id.external_id
+        youtube_id = id if ext_id.platform == SongPlatform.YOUTUBE else None
+        spotify_id = id if ext_id.platform == SongPlatform.SPOTIFY else None
+
+        if search_type == SongSearchType.PLAYLIST:
+            chunks = music_service_client.stream_songs_by_playlist(youtube_id, spotify_id)
+        elif search_type == SongSearchType.ALBUM:
+            chunks = music_service_client.stream_songs_by_album(youtube_id, spotify_id)
+        else:
+            raise ValueError(f"Unsupported collection search type: {search_type}")
+
+        parser = JSONArrayParser()
+
+        async for chunk in chunks:
+            for data in parser.feed(chunk):
+                yield SongRef(data)
+
+        parser.close()
+
     async def get_audio_by_id(self, song_id:UUID=None, external_id:ExternalId=None) -> bytes:
 
         if song_id:
@@ -427,12 +472,43 @@ class MusicService:
 music_service = MusicService()
 
 
+# number of songs handed to the queue at once while a playlist or album is being resolved
+STREAM_PAGE_SIZE = 50
+# queries of a batch resolved at the same time, bounded so a large batch does not flood the backend
+MAX_CONCURRENT_QUERIES = 4
+MAX_BATCH_QUERIES = 25
+MAX_QUERY_DISPLAY_LENGTH = 50
+
+
 class SongSearcherException(AppException):
 
     def __init__(self, dev_message:str, usr_message: str):
         super().__init__(dev_message, usr_message)
 
 
+class QueryResult:
+
+    def __init__(self, query: str, songs: List[Union[Song, SongRef]], error: Optional[Exception]=None):
+        self.query: str = query
+        self.songs: List[Union[Song, SongRef]] = songs
+        self.error: Optional[Exception] = error
+
+    def get_error_message(self) -> str:
+
+        if isinstance(self.error, AppException):
+            return self.error.usr_message
+
+        return "Could not find the song."
+
+
+def get_failed_queries_message(results: List[QueryResult]) -> str:
+    # long queries are shortened so a whole batch of failures still fits in one discord message
+    return "\n".join(
+        f"Could not add `{result.query[:MAX_QUERY_DISPLAY_LENGTH]}`: {result.get_error_message()}"
+        for result in results if result.error
+    )
+
+
 class SongSearcher:
     
     YOUTUBE_NET_LOC = [
@@ -441,6 +517,9 @@ class SongSearcher:
     ]
     SPOTIFY_NET_LOC = ["open.spotify.com"]
 
+    def __init__(self, index: SongIndex=song_index):
+        self.index: SongIndex = index
+
     def _extract_search(self, query: str) -> SongSearch:
         
         parsed_url = urlparse(query)
@@ -486,15 +565,35 @@ class SongSearcher:
             "Sorry, the link you provided doesn't seem to match any supported platforms. Please check the URL."
         )
 
-    async def get_songs_query(self, query: str, platform: SongPlatform=None) -> List[Song]:
+    async def _get_song_by_title(self, title: str, platform: SongPlatform=None) -> Song:
+
+        song = await self.index.get_by_title(title, platform)
+
+        if not song:
+            song = await music_service.get_song_by_title(title, platform)
+            self.index.put_title(title, platform, song)
+
+        return song
+
+    async def _get_song_by_external_id(self, external_id: ExternalId) -> Song:
+
+        song = await self.index.get_by_external_id(external_id)
+
+        if not song:
+            song = await music_service.get_song_by_id(external_id=external_id)
+            self.index.put(song)
+
+        return song
+
+    async def get_songs_query(self, query: str, platform: SongPlatform=None) -> List[Union[Song, SongRef]]:
 
         song_search = self._extract_search(query)
 
         if song_search.search_type == SongSearchType.TITLE:
-            return [await music_service.get_song_by_title(query, platform)]
+            return [await self._get_song_by_title(query, platform)]
         
         if song_search.search_type == SongSearchType.SONG:
-            return [await music_service.get_song_by_id(external_id=song_search.ext_id)]
+            return [await self._get_song_by_external_id(song_search.ext_id)]
         
         if song_search.search_type == SongSearchType.PLAYLIST:
             ext_id = song_search.ext_id
@@ -504,6 +603,67 @@ class SongSearcher:
             ext_id = song_search.ext_id
             return await music_service.get_songs_by_album(ext_id.external_id, ext_id.platform)
 
+    @staticmethod
+    def _split_line(line: str) -> List[str]:
+
+        # titles can contain commas ("Hello, Goodbye"), a line is only split when every part of it is a link
+        parts = [part.strip() for part in line.split(",")]
+
+        if len(parts) > 1 and all(part.startswith(("http://", "https://")) for part in parts if part):
+            return parts
+
+        return [line.strip()]
+
+    @staticmethod
+    def split_queries(value: str) -> List[str]:
+
+        queries = [query for line in value.splitlines() for query in SongSearcher._split_line(line)]
+        queries = [query for query in queries if query]
+
+        if len(queries) > MAX_BATCH_QUERIES:
+            raise SongSearcherException(
+                f"Too many queries in batch: {len(queries)}",
+                f"You can add at most {MAX_BATCH_QUERIES} songs or links at once."
+            )
+
+        return queries
+
+    async def get_songs_queries(self, queries: List[str], platform: SongPlatform=None) -> List[QueryResult]:
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+
+        async def resolve(query: str) -> QueryResult:
+            async with semaphore:
+                try:
+                    return QueryResult(query, await self.get_songs_query(query, platform))
+                except Exception as e:
+                    # a failed query must not cancel the rest of the batch
+                    return QueryResult(query, [], e)
+
+        # gather keeps the results in the order of the queries
+        return await asyncio.gather(*(resolve(query) for query in queries))
+
+    async def stream_songs_query(
+        self, query: str, platform: SongPlatform=None, page_size: int=STREAM_PAGE_SIZE
+    ) -> AsyncIterator[List[Union[Song, SongRef]]]:
+
+        song_search = self._extract_search(query)
+
+        if song_search.search_type not in [SongSearchType.PLAYLIST, SongSearchType.ALBUM]:
+            yield await self.get_songs_query(query, platform)
+            return
+
+        page = []
+
+        async for song in music_service.stream_songs_by_collection(song_search.search_type, song_search.ext_id):
+            page.append(song)
+            if len(page) >= page_size:
+                yield page
+                page = []
+
+        if page:
+            yield page
+
     async def get_songs_playlist(self, title: str, guild_id: str) -> List[Song]:
 
         songs = []
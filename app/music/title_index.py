@@ -0,0 +1,169 @@
+import asyncio
+import heapq
+import re
+from typing import Dict, List, Set, Tuple
+from uuid import UUID
+
+from framework.core.logger import get_logger, LoggerWrapper
+from music.entity import Song
+from music.service import music_service
+
+
+logger: LoggerWrapper = get_logger(__name__)
+
+
+MAX_SUGGESTIONS = 25
+# discord rejects autocomplete choice names and values longer than this
+MAX_CHOICE_LENGTH = 100
+# guilds whose playlists are fetched at the same time when the indexes are built at startup
+MAX_CONCURRENT_BUILDS = 4
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[idx:idx + 3] for idx in range(len(padded) - 2)}
+
+
+class TitleEntry:
+
+    def __init__(self, song_id: UUID, title: str, link: str):
+        self.song_id: UUID = song_id
+        self.title: str = title
+        self.link: str = link
+        self.normalized: str = _normalize(title)
+        self.plays: int = 0
+
+
+class TitleIndex:
+
+    def __init__(self):
+        self.entries: Dict[UUID, TitleEntry] = {}
+        self.trigrams: Dict[str, Set[UUID]] = {}
+        # word prefixes of up to two characters, used for queries too short for trigrams
+        self.prefixes: Dict[str, Set[UUID]] = {}
+
+    def add(self, song: Song, played: bool=False) -> None:
+
+        link = song.get_link()
+
+        if not link or not song.title:
+            return
+
+        entry = self.entries.get(song.id)
+
+        if not entry:
+
+            entry = TitleEntry(song.id, song.title, link)
+            self.entries[song.id] = entry
+
+            for trigram in _trigrams(entry.normalized):
+                self.trigrams.setdefault(trigram, set()).add(song.id)
+
+            for word in entry.normalized.split(" "):
+                for length in range(1, min(len(word), 2) + 1):
+                    self.prefixes.setdefault(word[:length], set()).add(song.id)
+
+        if played:
+            entry.plays += 1
+
+    def _score(self, entry: TitleEntry, query: str, matched: float) -> Tuple[float, int]:
+
+        score = matched
+
+        if entry.normalized.startswith(query):
+            score += 1
+        elif query in entry.normalized:
+            score += 0.5
+
+        return score, entry.plays
+
+    def search(self, query: str, limit: int=MAX_SUGGESTIONS) -> List[TitleEntry]:
+
+        query = _normalize(query)
+
+        if not query:
+            return heapq.nlargest(limit, self.entries.values(), key=lambda entry: entry.plays)
+
+        # fraction of the query trigrams found in each candidate title
+        matched: Dict[UUID, float] = {}
+
+        if len(query) < 3:
+            matched = {song_id: 0 for song_id in self.prefixes.get(query, ())}
+        else:
+            query_trigrams = _trigrams(query)
+            counts: Dict[UUID, int] = {}
+            for trigram in query_trigrams:
+                for song_id in self.trigrams.get(trigram, ()):
+                    counts[song_id] = counts.get(song_id, 0) + 1
+            # a title sharing a third of the query trigrams is still a reasonable typo match
+            threshold = max(1, len(query_trigrams) // 3)
+            matched = {
+                song_id: count / len(query_trigrams) for song_id, count in counts.items() if count >= threshold
+            }
+
+        return heapq.nlargest(
+            limit,
+            (self.entries[song_id] for song_id in matched),
+            key=lambda entry: self._score(entry, query, matched[entry.song_id])
+        )
+
+
+title_indexes: Dict[int, TitleIndex] = {}
+
+
+def get_title_index(guild_id: int) -> TitleIndex:
+
+    if guild_id not in title_indexes:
+        title_indexes[guild_id] = TitleIndex()
+
+    return title_indexes[guild_id]
+
+
+def add_songs(guild_id: int, songs: List[Song], played: bool=False) -> None:
+
+    index = get_title_index(guild_id)
+
+    for song in songs:
+        index.add(song, played)
+
+
+async def build_title_index(guild_id: int) -> None:
+
+    try:
+        playlists = await music_service.get_guild_playlists(guild_id)
+    except Exception as e:
+        logger.warning(f"[TITLE INDEX] Could not load playlists of guild (ID = {guild_id}): {e}.")
+        return
+
+    for playlist in playlists:
+        add_songs(guild_id, [p_song.song for p_song in playlist.songs])
+        # building a large index must not starve the event loop
+        await asyncio.sleep(0)
+
+    logger.info(
+        f"[TITLE INDEX] Indexed {len(get_title_index(guild_id).entries)} song(s) for guild (ID = {guild_id})."
+    )
+
+
+async def build_title_indexes(guild_ids: List[int]) -> None:
+
+    # a bot in many guilds would otherwise send a burst of playlist requests to the backend on ready
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_BUILDS)
+
+    async def build(guild_id: int) -> None:
+        async with semaphore:
+            await build_title_index(guild_id)
+
+    await asyncio.gather(*(build(guild_id) for guild_id in guild_ids))
+
+
+def suggest(guild_id: int, query: str) -> List[Tuple[str, str]]:
+    return [
+        (entry.title[:MAX_CHOICE_LENGTH], entry.link)
+        for entry in get_title_index(guild_id).search(query)
+        if len(entry.link) <= MAX_CHOICE_LENGTH
+    ]
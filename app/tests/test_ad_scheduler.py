@@ -0,0 +1,90 @@
+from typing import List, Optional
+
+from music.ad.library.library import AdClip
+from music.ad.scheduler import AdBreakScheduler
+
+
+class FakeLibrary:
+
+    def __init__(self, openning: Optional[AdClip], closing: Optional[AdClip], content: List[AdClip]):
+        self.openning = openning
+        self.closing = closing
+        self.content = content
+
+    def get_random_openning(self) -> Optional[AdClip]:
+        return self.openning
+
+    def get_random_closing(self) -> Optional[AdClip]:
+        return self.closing
+
+    def get_content(self) -> List[AdClip]:
+        return self.content
+
+
+def run_break(scheduler: AdBreakScheduler, expected_wait: float, ready_at: float, cut_on_ready: bool=True):
+
+    # plays the break on a simulated clock, clips other than a forced closing are cut once the song is ready
+    plan = scheduler.plan(expected_wait, cut_on_ready)
+    now = 0.0
+    played = []
+
+    clips = [plan.openning] if plan.openning else []
+
+    while True:
+
+        for clip in clips:
+            played.append(clip.name)
+            forced = plan.is_closing(clip) and not cut_on_ready
+            now = now + clip.duration if forced or now + clip.duration < ready_at else max(now, ready_at)
+
+        clip = scheduler.next_clip(plan, max(0.0, expected_wait - now), now >= ready_at)
+
+        if not clip:
+            return played, now
+
+        clips = [clip]
+
+
+def test_break_lasts_until_the_song_is_ready_when_the_closing_is_longer_than_the_wait():
+
+    closing = AdClip("closing", b"", 30)
+    scheduler = AdBreakScheduler(FakeLibrary(None, closing, [AdClip("content", b"", 5)]))
+
+    played, ended_at = run_break(scheduler, expected_wait=10, ready_at=45)
+
+    assert closing.duration > 10
+    assert "closing" in played
+    assert ended_at >= 45
+
+
+def test_closing_is_played_before_a_late_song():
+
+    scheduler = AdBreakScheduler(
+        FakeLibrary(AdClip("openning", b"", 2), AdClip("closing", b"", 3), [AdClip("content", b"", 4)])
+    )
+
+    played, ended_at = run_break(scheduler, expected_wait=12, ready_at=30)
+
+    assert played[0] == "openning"
+    assert played.index("closing") > 0
+    assert ended_at >= 30
+
+
+def test_ready_song_skips_the_closing_when_cut_on_ready():
+
+    scheduler = AdBreakScheduler(FakeLibrary(None, AdClip("closing", b"", 3), [AdClip("content", b"", 4)]))
+
+    # the download finished right after the break was planned
+    played, _ = run_break(scheduler, expected_wait=5, ready_at=0)
+
+    assert "closing" not in played
+
+
+def test_closing_is_always_played_without_cut_on_ready():
+
+    scheduler = AdBreakScheduler(FakeLibrary(None, AdClip("closing", b"", 3), [AdClip("content", b"", 4)]))
+
+    played, ended_at = run_break(scheduler, expected_wait=5, ready_at=1, cut_on_ready=False)
+
+    assert played[-1] == "closing"
+    assert ended_at >= 1
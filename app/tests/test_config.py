@@ -0,0 +1,62 @@
+import asyncio
+import os
+
+import pytest
+
+import framework.core.config as config_module
+from framework.core.config import CONFIG_PATH, Config, GuildConfig, config_registry
+from framework.utils.file import FileSaveException
+
+
+class VolumeConfig(Config):
+
+    @staticmethod
+    def get_default_data() -> dict:
+        return {"volume": 50}
+
+    def _from_dict(self, data: dict) -> None:
+        self.volume = data["volume"]
+
+    def to_dict(self) -> dict:
+        return {"volume": self.volume}
+
+
+class VolumeGuildConfig(GuildConfig):
+
+    def __init__(self, guild_id: int):
+        super().__init__(guild_id, VolumeConfig)
+
+    def _get_config_path(self) -> str:
+        return os.path.join(CONFIG_PATH, "tests", str(self.guild_id), "volume.json")
+
+    @staticmethod
+    def get_default_path() -> str:
+        return os.path.join(CONFIG_PATH, "tests", "default", "volume.json")
+
+    def _convert_data(self, data: dict) -> VolumeConfig:
+        return VolumeConfig(data)
+
+
+def test_update_config_is_shared_once_written():
+
+    asyncio.run(VolumeGuildConfig(1).update_config(volume=80))
+
+    assert VolumeGuildConfig(1).config.volume == 80
+
+
+def test_failed_update_config_leaves_the_shared_config_unchanged(monkeypatch):
+
+    reader = VolumeGuildConfig(2)
+
+    async def fail(path, data):
+        raise FileSaveException(path, OSError("disk full"))
+
+    monkeypatch.setattr(config_module, "write_json_file_async", fail)
+
+    writer = VolumeGuildConfig(2)
+    with pytest.raises(FileSaveException):
+        asyncio.run(writer.update_config(volume=80))
+
+    assert writer.config.volume == 50
+    assert reader.config.volume == 50
+    assert config_registry.get(VolumeGuildConfig(2)).volume == 50
@@ -0,0 +1,43 @@
+from uuid import uuid4
+
+from music.entity import QueueSong, Song, SongRef
+
+
+def create_song_data(**overrides) -> dict:
+    data = {
+        "id": str(uuid4()),
+        "title": "Hello, Goodbye",
+        "thumbnailUrl": "https://example.com/thumb.png",
+        "audioFileAvailable": True,
+        "externalId": {"platform": "YOUTUBE", "externalId": "abc"}
+    }
+    data.update(overrides)
+    return data
+
+
+def test_partial_reference_is_displayed_without_hydrating():
+
+    q_song = QueueSong(SongRef({"id": str(uuid4()), "title": "partial"}), 1, None)
+
+    assert q_song.song is None
+    assert q_song.title == "partial"
+    assert q_song.get_link() is None
+    assert q_song.thumbnail_url is None
+
+
+def test_full_reference_is_displayed_from_its_payload():
+
+    q_song = QueueSong(SongRef(create_song_data()), 1, None)
+
+    assert not q_song.is_hydrated()
+    assert q_song.get_link() == "https://www.youtube.com/watch?v=abc"
+    assert q_song.thumbnail_url == "https://example.com/thumb.png"
+
+
+def test_hydrated_song_is_displayed_from_the_song():
+
+    q_song = QueueSong(Song(create_song_data(title="full")), 1, None)
+
+    assert q_song.is_hydrated()
+    assert q_song.title == "full"
+    assert q_song.get_link() == "https://www.youtube.com/watch?v=abc"
@@ -0,0 +1,15 @@
+import pytest
+
+import framework.utils.file as file
+
+
+@pytest.mark.skipif(file.orjson is None, reason="orjson is not installed")
+def test_json_fallback_writes_the_same_bytes_as_orjson(monkeypatch):
+
+    data = {"guild": 1, "title": "Café ♪", "songs": [{"id": "a", "volume": 0.5, "tags": []}], "empty": {}}
+
+    fast = file._dumps(data)
+    monkeypatch.setattr(file, "orjson", None)
+    fallback = file._dumps(data)
+
+    assert fast == fallback
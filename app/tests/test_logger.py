@@ -0,0 +1,50 @@
+import json
+import os
+import time
+from types import SimpleNamespace
+
+from framework.core.logger import get_guild_log_path, get_logger
+
+
+def read_guild_log(guild_id: int, timeout: float=2.0) -> list:
+
+    # the records are written by the listener thread
+    deadline = time.monotonic() + timeout
+    path = get_guild_log_path(guild_id)
+
+    while time.monotonic() < deadline:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                lines = [json.loads(line) for line in file]
+            if lines:
+                return lines
+        time.sleep(0.02)
+
+    return []
+
+
+def test_exception_is_logged_through_the_listener():
+
+    logger = get_logger("tests.logger.exception")
+    guild = SimpleNamespace(id=9001)
+
+    logger.error(ValueError("broken command"), guild=guild)
+
+    entries = read_guild_log(guild.id)
+
+    assert entries
+    assert "broken command" in entries[-1]["message"]
+
+
+def test_exception_with_args_and_tag():
+
+    logger = get_logger("tests.logger.args")
+    guild = SimpleNamespace(id=9002)
+
+    logger.warning(KeyError("song %s"), 7, tag="QUEUE", guild=guild, index=3)
+
+    entries = read_guild_log(guild.id)
+
+    assert entries
+    assert "[QUEUE]" in entries[-1]["message"]
+    assert "index=3" in entries[-1]["message"]
@@ -0,0 +1,70 @@
+import asyncio
+import itertools
+from uuid import uuid4
+
+from music.entity import QueueSong, SongRef
+from music.player.journal import QueueJournal, QueueState
+from music.player.queue import QueueSongList
+
+
+guild_ids = itertools.count(1)
+
+
+def create_songs(count: int):
+    return [QueueSong(SongRef({"id": str(uuid4()), "title": f"song {idx}"}), 1, None) for idx in range(count)]
+
+
+def song_ids(songs: QueueSongList):
+    return [q_song.ref.id for q_song in songs]
+
+
+def test_shuffle_after_snapshot_is_restored_in_the_same_order():
+
+    async def run():
+
+        guild_id = next(guild_ids)
+        songs = QueueSongList(create_songs(40))
+        journal = QueueJournal(guild_id)
+
+        songs.shuffle(3, 11)
+        journal.snapshot(QueueState(songs, 3))
+
+        # a second shuffle on the same pivot covers every region of the first one
+        songs.shuffle(3, 12)
+        journal.record_shuffle(3, 12)
+        await journal.close()
+
+        restored = QueueJournal(guild_id).restore()
+
+        assert song_ids(restored.songs) == song_ids(songs)
+
+    asyncio.run(run())
+
+
+def test_journal_replay_matches_live_queue():
+
+    async def run():
+
+        guild_id = next(guild_ids)
+        songs = QueueSongList(create_songs(10))
+        journal = QueueJournal(guild_id)
+        journal.snapshot(QueueState(songs, 0))
+
+        added = create_songs(5)
+        songs.insert(4, added)
+        journal.record_add(4, 1, added)
+
+        for pivot, seed in [(0, 1), (0, 2), (-1, 3), (7, 4)]:
+            songs.shuffle(pivot, seed)
+            journal.record_shuffle(pivot, seed)
+
+        removed = songs[2].ref.id
+        songs.remove_song(removed)
+        journal.record_remove(removed)
+        await journal.close()
+
+        restored = QueueJournal(guild_id).restore()
+
+        assert song_ids(restored.songs) == song_ids(songs)
+
+    asyncio.run(run())
@@ -0,0 +1,35 @@
+import asyncio
+import os
+import tempfile
+from uuid import uuid4
+
+from music.entity import ExternalId, Song, SongPlatform
+from music.index import SongIndex
+
+
+def create_song(external_id: str) -> Song:
+    return Song({
+        "id": str(uuid4()),
+        "title": "Hello, Goodbye",
+        "thumbnailUrl": "https://example.com/thumb.png",
+        "audioFileAvailable": True,
+        "externalId": {"platform": "YOUTUBE", "externalId": external_id}
+    })
+
+
+def test_writes_are_visible_to_later_reads():
+
+    async def run():
+
+        index = SongIndex(os.path.join(tempfile.mkdtemp(), "index.db"))
+        song = create_song("abc")
+
+        assert await index.get_by_title("Hello,  goodbye") is None
+
+        index.put_title("Hello, Goodbye", None, song)
+
+        assert (await index.get_by_title("hello, goodbye")).id == song.id
+        assert (await index.get_by_id(song.id)).title == song.title
+        assert (await index.get_by_external_id(ExternalId(platform=SongPlatform.YOUTUBE, external_id="abc"))).id == song.id
+
+    asyncio.run(run())
@@ -0,0 +1,21 @@
+import asyncio
+
+from framework.interaction_handler.handler import TimeoutExecutor
+
+
+def test_on_timeout_runs_once_and_only_the_first_caller_is_told():
+
+    async def run():
+
+        calls = []
+        executor = TimeoutExecutor(timeout=0.05, on_timeout=lambda: calls.append("timeout"))
+
+        first, second = await asyncio.gather(executor._wait_timeout(), executor._wait_timeout())
+        late = await executor._wait_timeout()
+
+        assert (first, second, late) == (True, False, False)
+        assert calls == ["timeout"]
+        assert executor.timed_out
+        assert executor.timeout == 0
+
+    asyncio.run(run())